@@ -1,8 +1,11 @@
 from django.contrib import admin
+from zare_backend_new.admin_tools import LargeTableAdminMixin
+from zare_backend_new.db_routers import ReplicaReadsAdminMixin
+from zare_backend_new.search import TrigramSearchAdminMixin
 from .models import ContactSubmission
 
 @admin.register(ContactSubmission)
-class ContactSubmissionAdmin(admin.ModelAdmin):
+class ContactSubmissionAdmin(ReplicaReadsAdminMixin, LargeTableAdminMixin, TrigramSearchAdminMixin, admin.ModelAdmin):
     list_display = ['first_name', 'last_name', 'email', 'created_at']
     list_filter = ['created_at']
     search_fields = ['first_name', 'last_name', 'email']
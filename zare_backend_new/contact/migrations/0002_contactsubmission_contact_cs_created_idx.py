@@ -0,0 +1,21 @@
+# Generated by Django 5.2.4 on 2026-10-19 10:03
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('contact', '0001_initial'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='contactsubmission',
+            index=models.Index(fields=['-created_at'], name='contact_cs_created_idx'),
+        ),
+    ]
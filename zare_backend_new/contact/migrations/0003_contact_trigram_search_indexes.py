@@ -0,0 +1,34 @@
+# Generated by Django 5.2.4 on 2026-10-19 13:41
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.comparison
+import django.db.models.functions.text
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('contact', '0002_contactsubmission_contact_cs_created_idx'),
+        # Creates the pg_trgm extension
+        ('profiles', '0004_trigram_search_indexes'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='contactsubmission',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper(django.db.models.functions.comparison.Cast('first_name', output_field=models.TextField())), name='gin_trgm_ops'), name='contact_cs_first_name_trgm_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='contactsubmission',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper(django.db.models.functions.comparison.Cast('last_name', output_field=models.TextField())), name='gin_trgm_ops'), name='contact_cs_last_name_trgm_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='contactsubmission',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper(django.db.models.functions.comparison.Cast('email', output_field=models.TextField())), name='gin_trgm_ops'), name='contact_cs_email_trgm_idx'),
+        ),
+    ]
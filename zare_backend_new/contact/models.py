@@ -1,4 +1,5 @@
 from django.db import models
+from zare_backend_new.search import trigram_index
 
 class ContactSubmission(models.Model):
     first_name = models.CharField(max_length=100)
@@ -12,6 +13,12 @@ class ContactSubmission(models.Model):
     
     class Meta:
         ordering = ['-created_at']  # Most recent first
+        indexes = [
+            models.Index(fields=['-created_at'], name='contact_cs_created_idx'),
+            trigram_index('first_name', 'contact_cs_first_name_trgm_idx'),
+            trigram_index('last_name', 'contact_cs_last_name_trgm_idx'),
+            trigram_index('email', 'contact_cs_email_trgm_idx'),
+        ]
 
 
 Contact = ContactSubmission
\ No newline at end of file
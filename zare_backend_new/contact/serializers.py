@@ -1,8 +1,10 @@
 from rest_framework import serializers
+from zare_backend_new.metrics import TimedListSerializer, TimedSerializerMixin
 from .models import ContactSubmission
 
-class ContactSubmissionSerializer(serializers.ModelSerializer):
+class ContactSubmissionSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = ContactSubmission
+        list_serializer_class = TimedListSerializer
         fields = ['id', 'first_name', 'last_name', 'email', 'message', 'created_at']
         read_only_fields = ['id', 'created_at']
\ No newline at end of file
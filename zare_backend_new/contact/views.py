@@ -2,11 +2,13 @@ from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
+from profiles.idempotency import idempotent
 from .models import ContactSubmission
 from .serializers import ContactSubmissionSerializer
 
 @api_view(['POST'])
 @permission_classes([AllowAny])  # Allow anyone to submit contact form
+@idempotent
 def contact_submit(request):
     """
     Submit a contact form
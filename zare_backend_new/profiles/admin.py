@@ -1,14 +1,89 @@
 # profiles/admin.py
+from datetime import datetime, timezone as dt_timezone
+
 from django.contrib import admin
 from django.contrib.auth.models import User  # Add this import
-from .models import UserProfile, VolunteerOpportunity, VolunteerHistory
+from django.db.models import Q
+from zare_backend_new.admin_tools import LargeTableAdminMixin
+from zare_backend_new.db_routers import ReplicaReadsAdminMixin
+from zare_backend_new.search import TrigramSearchAdminMixin
+from .models import (
+    ArchivedVolunteerHistory, ArchivedVolunteerOpportunity, Notification, Skill, SkillAlias, UserProfile,
+    VolunteerHistory, VolunteerOpportunity,
+)
+from .partitions import add_months, month_start
+from .taxonomy import merge_skills
+from .transitions import TransitionError, bulk_transition
+
+class BucketListFilter(admin.SimpleListFilter):
+    """Fixed ranges instead of one filter choice per DISTINCT value (which scans the table)"""
+    buckets = ()  # (value, label, Q)
+    
+    def lookups(self, request, model_admin):
+        return [(value, label) for value, label, condition in self.buckets]
+    
+    def queryset(self, request, queryset):
+        for value, label, condition in self.buckets:
+            if self.value() == value:
+                return queryset.filter(condition)
+        return queryset
+
+class VolunteerHoursFilter(BucketListFilter):
+    title = 'volunteer hours'
+    parameter_name = 'hours'
+    buckets = (
+        ('0', 'None', Q(volunteer_hours=0)),
+        ('1-10', '1-10', Q(volunteer_hours__range=(1, 10))),
+        ('11-50', '11-50', Q(volunteer_hours__range=(11, 50))),
+        ('51-100', '51-100', Q(volunteer_hours__range=(51, 100))),
+        ('101-500', '101-500', Q(volunteer_hours__range=(101, 500))),
+        ('500+', 'More than 500', Q(volunteer_hours__gt=500)),
+    )
+
+class RatingFilter(BucketListFilter):
+    title = 'rating'
+    parameter_name = 'rating'
+    buckets = (
+        ('low', '1-2', Q(rating__range=(1, 2))),
+        ('mid', '3', Q(rating=3)),
+        ('high', '4-5', Q(rating__range=(4, 5))),
+        ('none', 'Not rated', Q(rating__isnull=True)),
+    )
+
+class CreatedMonthFilter(admin.SimpleListFilter):
+    """
+    The last ``months`` UTC months of created_at, computed rather than read from the table
+    (date_hierarchy would scan every partition for its DISTINCT dates). Each choice is one
+    monthly partition of VolunteerHistory.
+    """
+    title = 'created'
+    parameter_name = 'created_month'
+    months = 12
+    
+    def lookups(self, request, model_admin):
+        this_month = month_start(datetime.now(dt_timezone.utc))
+        months = [add_months(this_month, -offset) for offset in range(self.months)]
+        return [(f'{month:%Y-%m}', f'{month:%B %Y}') for month in months]
+    
+    def queryset(self, request, queryset):
+        for value, label in self.lookup_choices:
+            if self.value() == value:
+                start = datetime.strptime(value, '%Y-%m').replace(tzinfo=dt_timezone.utc)
+                end = add_months(start, 1)
+                return queryset.filter(
+                    created_at__gte=start,
+                    created_at__lt=datetime(end.year, end.month, 1, tzinfo=dt_timezone.utc),
+                )
+        return queryset
 
 @admin.register(UserProfile)
-class UserProfileAdmin(admin.ModelAdmin):
+class UserProfileAdmin(ReplicaReadsAdminMixin, LargeTableAdminMixin, TrigramSearchAdminMixin, admin.ModelAdmin):
     list_display = ('user', 'phone', 'location', 'volunteer_hours', 'created_at')
-    list_filter = ('created_at', 'location', 'volunteer_hours')
-    search_fields = ('user__username', 'user__email', 'user__first_name', 'user__last_name', 'phone')
+    list_filter = ('created_at', VolunteerHoursFilter)
+    list_select_related = ('user',)
+    search_fields = ('user__username', 'user__email', 'user__first_name', 'user__last_name', 'phone', 'location')
     readonly_fields = ('created_at', 'updated_at')
+    autocomplete_fields = ('user',)
     
     fieldsets = (
         ('User Information', {
@@ -30,18 +105,108 @@ class UserProfileAdmin(admin.ModelAdmin):
     )
 
 @admin.register(VolunteerOpportunity)
-class VolunteerOpportunityAdmin(admin.ModelAdmin):
+class VolunteerOpportunityAdmin(ReplicaReadsAdminMixin, LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ('title', 'organization', 'location', 'hours_required', 'date_posted', 'created_by')
-    list_filter = ('date_posted', 'organization', 'location')
+    list_filter = ('date_posted',)
+    list_select_related = ('created_by',)
     search_fields = ('title', 'description', 'organization', 'location')
     readonly_fields = ('date_posted',)
+    autocomplete_fields = ('created_by',)
 
 @admin.register(VolunteerHistory)
-class VolunteerHistoryAdmin(admin.ModelAdmin):
+class VolunteerHistoryAdmin(ReplicaReadsAdminMixin, LargeTableAdminMixin, TrigramSearchAdminMixin, admin.ModelAdmin):
     list_display = ('user', 'opportunity', 'hours_contributed', 'status', 'start_date', 'rating')
-    list_filter = ('status', 'start_date', 'rating')
+    list_filter = ('status', 'start_date', RatingFilter, CreatedMonthFilter)
+    list_select_related = ('user', 'opportunity')
     search_fields = ('user__username', 'opportunity__title')
     readonly_fields = ('created_at',)
+    autocomplete_fields = ('user', 'opportunity')
+    ordering = ('-created_at',)
+    actions = ['mark_accepted', 'mark_in_progress', 'mark_completed', 'mark_cancelled']
+    
+    def _transition(self, request, queryset, to_status):
+        try:
+            results = bulk_transition(queryset.values_list('id', flat=True), to_status, request.user)
+        except TransitionError as e:
+            self.message_user(request, str(e), level='error')
+            return
+        updated = [result for result in results if result['success']]
+        message = f'Moved {len(updated)} of {len(results)} applications to {to_status}'
+        if to_status == 'completed':
+            message += f', crediting {sum(result["hours_credited"] for result in updated)} hours'
+        self.message_user(request, message + '.', level='success' if len(updated) == len(results) else 'warning')
+    
+    @admin.action(description='Mark selected applications accepted')
+    def mark_accepted(self, request, queryset):
+        self._transition(request, queryset, 'accepted')
+    
+    @admin.action(description='Mark selected applications in progress')
+    def mark_in_progress(self, request, queryset):
+        self._transition(request, queryset, 'in_progress')
+    
+    @admin.action(description='Mark selected applications completed and credit hours')
+    def mark_completed(self, request, queryset):
+        self._transition(request, queryset, 'completed')
+    
+    @admin.action(description='Cancel selected applications')
+    def mark_cancelled(self, request, queryset):
+        self._transition(request, queryset, 'cancelled')
+
+@admin.register(Notification)
+class NotificationAdmin(ReplicaReadsAdminMixin, LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = ('user', 'opportunity', 'kind', 'status', 'attempts', 'created_at', 'sent_at')
+    list_filter = ('status', 'kind')
+    list_select_related = ('user', 'opportunity')
+    search_fields = ('user__email', 'opportunity__title')
+    readonly_fields = ('created_at', 'claimed_at', 'next_attempt_at', 'sent_at', 'last_error')
+    autocomplete_fields = ('user', 'opportunity')
+
+class SkillAliasInline(admin.TabularInline):
+    model = SkillAlias
+    fields = ('alias', 'key')
+    readonly_fields = ('key',)
+    extra = 1
+
+@admin.register(Skill)
+class SkillAdmin(admin.ModelAdmin):
+    list_display = ('name', 'key', 'updated_at')
+    search_fields = ('name', 'key', 'aliases__key')
+    readonly_fields = ('key', 'created_at', 'updated_at')
+    inlines = [SkillAliasInline]
+    actions = ['merge_into_oldest']
+    
+    @admin.action(description='Merge selected skills into the oldest one')
+    def merge_into_oldest(self, request, queryset):
+        skills = list(queryset.order_by('id'))
+        if len(skills) < 2:
+            self.message_user(request, 'Select at least two skills to merge.', level='warning')
+            return
+        target, sources = skills[0], skills[1:]
+        rewritten = merge_skills(target, sources)
+        self.message_user(request, f'Merged {len(sources)} skills into "{target.name}" ({rewritten} rows updated).')
+
+class ArchiveAdminMixin:
+    """Archive rows are written only by archive_opportunities"""
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+@admin.register(ArchivedVolunteerOpportunity)
+class ArchivedVolunteerOpportunityAdmin(ArchiveAdminMixin, ReplicaReadsAdminMixin, LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = ('title', 'organization', 'deadline', 'date_posted', 'archived_at', 'created_by')
+    list_filter = ('archived_at',)
+    list_select_related = ('created_by',)
+    search_fields = ('title', 'organization')
+
+@admin.register(ArchivedVolunteerHistory)
+class ArchivedVolunteerHistoryAdmin(ArchiveAdminMixin, ReplicaReadsAdminMixin, LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = ('user', 'opportunity', 'hours_contributed', 'status', 'start_date', 'archived_at')
+    list_filter = ('status', 'archived_at')
+    list_select_related = ('user', 'opportunity')
+    search_fields = ('user__username', 'opportunity__title')
 
 #  User admin to see email/login data
 class UserProfileInline(admin.StackedInline):
@@ -54,7 +219,7 @@ class UserProfileInline(admin.StackedInline):
         }),
     )
 
-class CustomUserAdmin(admin.ModelAdmin):
+class CustomUserAdmin(ReplicaReadsAdminMixin, LargeTableAdminMixin, TrigramSearchAdminMixin, admin.ModelAdmin):
     list_display = ['email', 'first_name', 'last_name', 'date_joined', 'last_login', 'is_active']
     list_filter = ['date_joined', 'last_login', 'is_active', 'is_staff']
     search_fields = ['email', 'first_name', 'last_name', 'username']
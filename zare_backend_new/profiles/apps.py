@@ -1,6 +1,26 @@
 from django.apps import AppConfig
+from django.core import checks
+from django.db.models.signals import post_migrate
+
+
+def ensure_history_partitions(sender, using, **kwargs):
+    from django.db import connections
+    from .partitions import ensure_partitions, is_partitioned
+
+    connection = connections[using]
+    if is_partitioned(connection):
+        ensure_partitions(connection=connection)
 
 
 class ProfilesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'profiles'
+
+    def ready(self):
+        from zare_backend_new.db_routers import check_pin_cache
+
+        post_migrate.connect(ensure_history_partitions, sender=self)
+        checks.register(check_pin_cache)
+        # Registers the signal handlers that keep each process's skill taxonomy and
+        # profile cache current
+        from . import profile_cache, taxonomy  # noqa: F401
@@ -0,0 +1,85 @@
+# profiles/archival.py
+"""
+Move expired opportunities, with their history, into the archive tables.
+
+An opportunity is archivable once its deadline is more than
+``OPPORTUNITY_ARCHIVE_AFTER_DAYS`` in the past and none of its applications is still
+in flight (applied / accepted / in progress). Each batch is one short transaction that
+copies the rows, deletes them from the hot tables and skips rows locked by others.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from .models import (
+    OPEN_APPLICATION_STATUSES, ArchivedVolunteerHistory, ArchivedVolunteerOpportunity,
+    VolunteerHistory, VolunteerOpportunity,
+)
+
+OPPORTUNITY_FIELDS = (
+    'id', 'title', 'description', 'organization', 'location', 'skills_required', 'date_posted',
+    'deadline', 'hours_required', 'schedule', 'shift_mask', 'created_by_id', 'updated_at',
+)
+HISTORY_FIELDS = (
+    'id', 'user_id', 'opportunity_id', 'hours_contributed', 'start_date', 'end_date', 'status',
+    'feedback', 'rating', 'created_at', 'updated_at',
+)
+
+
+def archive_cutoff(after_days=None):
+    if after_days is None:
+        after_days = settings.OPPORTUNITY_ARCHIVE_AFTER_DAYS
+    return timezone.now() - timedelta(days=after_days)
+
+
+def archivable_opportunities(cutoff):
+    open_applications = VolunteerHistory.objects.filter(
+        opportunity=OuterRef('pk'), status__in=OPEN_APPLICATION_STATUSES
+    )
+    return VolunteerOpportunity.objects.filter(deadline__lt=cutoff).exclude(Exists(open_applications))
+
+
+def _copy(rows, model, fields):
+    return [model(**{field: getattr(row, field) for field in fields}) for row in rows]
+
+
+def archive_batch(cutoff, batch_size):
+    """Archive up to ``batch_size`` opportunities; returns (opportunities, history rows) moved"""
+    with transaction.atomic():
+        ids = list(
+            archivable_opportunities(cutoff).order_by('deadline')
+            .select_for_update(skip_locked=True).values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            return 0, 0
+        opportunities = VolunteerOpportunity.objects.filter(id__in=ids)
+        history = VolunteerHistory.objects.filter(opportunity_id__in=ids)
+
+        ArchivedVolunteerOpportunity.objects.bulk_create(
+            _copy(opportunities, ArchivedVolunteerOpportunity, OPPORTUNITY_FIELDS)
+        )
+        archived_history = _copy(history, ArchivedVolunteerHistory, HISTORY_FIELDS)
+        ArchivedVolunteerHistory.objects.bulk_create(archived_history)
+
+        history.delete()
+        opportunities.delete()
+    return len(ids), len(archived_history)
+
+
+def archive_expired_opportunities(cutoff, batch_size=None, max_batches=None, log=None):
+    """Archive in batches until nothing is left (or ``max_batches``); returns the totals"""
+    log = log or (lambda message: None)
+    batch_size = batch_size or settings.OPPORTUNITY_ARCHIVE_BATCH_SIZE
+    total_opportunities = total_history = batches = 0
+    while max_batches is None or batches < max_batches:
+        moved, moved_history = archive_batch(cutoff, batch_size)
+        if not moved:
+            break
+        batches += 1
+        total_opportunities += moved
+        total_history += moved_history
+        log(f'Batch {batches}: archived {moved} opportunities and {moved_history} history rows')
+    return total_opportunities, total_history
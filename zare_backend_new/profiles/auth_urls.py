@@ -1,12 +1,13 @@
 from django.urls import path
-from . import social_auth
+from zare_backend_new.lazy import lazy_view
 
 app_name = 'auth'
 
+# social_auth and its providers are only imported once one of these is requested
 urlpatterns = [
-    path('social/login/', social_auth.social_login, name='social_login'),
-    path('social/logout/', social_auth.social_logout, name='social_logout'),
-    path('profile/', social_auth.get_user_profile, name='get_profile'),
-    path('social/link/', social_auth.link_social_account, name='link_social'),
-    path('social/unlink/', social_auth.unlink_social_account, name='unlink_social'),
-]
\ No newline at end of file
+    path('social/login/', lazy_view('profiles.social_auth.social_login'), name='social_login'),
+    path('social/logout/', lazy_view('profiles.social_auth.social_logout'), name='social_logout'),
+    path('profile/', lazy_view('profiles.social_auth.get_user_profile'), name='get_profile'),
+    path('social/link/', lazy_view('profiles.social_auth.link_social_account'), name='link_social'),
+    path('social/unlink/', lazy_view('profiles.social_auth.unlink_social_account'), name='unlink_social'),
+]
@@ -0,0 +1,97 @@
+# profiles/availability.py
+"""
+Weekly availability as a 21-bit integer: 7 days x 3 time slots, bit = day * 3 + slot.
+
+The JSON ``availability`` / ``schedule`` dicts stay the source of truth and accept:
+
+    {"weekdays": true, "weekends": false}        whole days
+    {"monday": true, "saturday": ["morning"]}    single days, optionally limited to slots
+    {"weekends": true, "evenings": true}         "mornings"/"afternoons"/"evenings" narrow
+                                                 whole-day selections (or every day if alone)
+
+The integer masks are derived in ``save()``. QuerySet.update() and bulk_update() skip it,
+so code writing the JSON that way must follow up with sync_masks() on the same rows.
+"""
+from django.db.models import F
+
+DAYS = ('monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday')
+SLOTS = ('morning', 'afternoon', 'evening')
+SLOTS_PER_DAY = len(SLOTS)
+FULL_DAY = (1 << SLOTS_PER_DAY) - 1
+FULL_WEEK = (1 << (len(DAYS) * SLOTS_PER_DAY)) - 1
+
+DAY_GROUPS = {
+    'weekdays': range(0, 5),
+    'weekends': range(5, 7),
+}
+
+
+def slot_bit(day, slot):
+    return 1 << (DAYS.index(day) * SLOTS_PER_DAY + SLOTS.index(slot))
+
+
+def _every_day(slot_bits):
+    return sum(slot_bits << (day * SLOTS_PER_DAY) for day in range(len(DAYS)))
+
+
+def availability_to_mask(availability):
+    """Normalize an availability/schedule dict to its weekly bitmap"""
+    if not isinstance(availability, dict):
+        return 0
+
+    whole_days = 0
+    explicit = 0
+    for key, value in availability.items():
+        key = str(key).strip().lower()
+        if key in DAY_GROUPS and value:
+            for day in DAY_GROUPS[key]:
+                whole_days |= FULL_DAY << (day * SLOTS_PER_DAY)
+        elif key in DAYS:
+            if isinstance(value, (list, tuple)):
+                for slot in value:
+                    slot = str(slot).strip().lower()
+                    if slot in SLOTS:
+                        explicit |= slot_bit(key, slot)
+            elif value:
+                whole_days |= FULL_DAY << (DAYS.index(key) * SLOTS_PER_DAY)
+
+    slot_bits = sum(1 << index for index, slot in enumerate(SLOTS) if availability.get(f'{slot}s'))
+    if slot_bits:
+        if not whole_days and not explicit:
+            whole_days = FULL_WEEK
+        whole_days &= _every_day(slot_bits)
+    return whole_days | explicit
+
+
+def mask_to_slots(mask):
+    """{'monday': ['morning', ...], ...} for the days present in ``mask``"""
+    slots = {}
+    for day_index, day in enumerate(DAYS):
+        day_slots = [slot for slot_index, slot in enumerate(SLOTS)
+                     if mask & (1 << (day_index * SLOTS_PER_DAY + slot_index))]
+        if day_slots:
+            slots[day] = day_slots
+    return slots
+
+
+def filter_available(queryset, shift_mask, full_coverage=True, field='availability_mask'):
+    """
+    Keep rows whose availability covers the whole shift (``full_coverage``) or overlaps
+    it at all. Compiles to one bitwise predicate: ("availability_mask" & shift) = shift.
+    """
+    overlap = F(field).bitand(shift_mask)
+    if full_coverage:
+        return queryset.alias(_overlap=overlap).filter(_overlap=shift_mask)
+    return queryset.alias(_overlap=overlap).filter(_overlap__gt=0)
+
+
+def sync_masks(queryset, source, target, batch_size=2000):
+    """Recompute ``target`` from ``source`` for every row of ``queryset``"""
+    batch = []
+    for obj in queryset.only('id', source).iterator(chunk_size=batch_size):
+        setattr(obj, target, availability_to_mask(getattr(obj, source)))
+        batch.append(obj)
+        if len(batch) >= batch_size:
+            queryset.model.objects.bulk_update(batch, [target])
+            batch = []
+    queryset.model.objects.bulk_update(batch, [target])
@@ -0,0 +1,58 @@
+# profiles/conditional.py
+import hashlib
+from calendar import timegm
+from functools import wraps
+
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+
+def make_etag(*parts):
+    """Build a stable ETag value from cheap metadata (timestamps, counts, ids)"""
+    raw = '|'.join('' if part is None else str(part) for part in parts)
+    return quote_etag(hashlib.md5(raw.encode(), usedforsecurity=False).hexdigest())
+
+
+def conditional_view(metadata_func):
+    """
+    Answer conditional GET/HEAD requests from metadata instead of the rendered body.
+
+    ``metadata_func(request, *args, **kwargs)`` must return ``(etag_parts, last_modified)``
+    using cheap queries only (``updated_at``, max timestamp + count, ...), or ``None`` to
+    skip conditional handling. Apply it *below* ``@api_view`` so that authentication and
+    content negotiation have already run:
+
+        @api_view(['GET'])
+        @permission_classes([IsAuthenticated])
+        @conditional_view(profile_metadata)
+        def get_user_profile(request): ...
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def _wrapped_view(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view_func(request, *args, **kwargs)
+
+            metadata = metadata_func(request, *args, **kwargs)
+            if metadata is None:
+                return view_func(request, *args, **kwargs)
+
+            etag_parts, last_modified = metadata
+            # The same data renders differently per media type (JSON vs browsable API)
+            etag = make_etag(getattr(request, 'accepted_media_type', ''), *etag_parts)
+            timestamp = timegm(last_modified.utctimetuple()) if last_modified else None
+
+            response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+            if response is None:
+                response = view_func(request, *args, **kwargs)
+
+            if response.status_code in (200, 304):
+                response.headers.setdefault('ETag', etag)
+                if timestamp is not None and not response.has_header('Last-Modified'):
+                    response.headers['Last-Modified'] = http_date(timestamp)
+                # Responses are per-user: never let a shared cache reuse them without revalidating
+                patch_cache_control(response, private=True, no_cache=True)
+                patch_vary_headers(response, ('Accept', 'Authorization', 'Cookie'))
+            return response
+        return _wrapped_view
+    return decorator
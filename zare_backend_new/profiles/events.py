@@ -0,0 +1,178 @@
+# profiles/events.py
+"""
+Write-behind view/apply analytics.
+
+The view endpoint (an explicit impression sent by the client, not the listing) and
+apply call ``record_views()``/``record_apply()``, which only append to an in-process
+buffer. A daemon thread flushes the buffer every ``EVENT_FLUSH_SECONDS``, or as soon
+as it holds ``EVENT_BUFFER_SIZE`` events, and once more at interpreter exit. Each flush is one
+transaction with two statements:
+
+1. a ``bulk_create`` of the events into the append-only OpportunityEvent table, and
+2. one ``INSERT ... ON CONFLICT DO UPDATE`` that adds the batch's totals to each
+   opportunity's OpportunityStats row.
+
+Trending uses forward decay: every event adds ``weight * 2 ** (age since TREND_EPOCH /
+half-life)`` to a per-opportunity sum, kept as a logarithm in ``OpportunityStats.trend``.
+Ordering by that column ranks by recently decayed activity, so reads are a plain
+index scan. Events are best-effort: a failed flush is logged and dropped.
+
+The view endpoint is public, so a flush first drops events whose id is not an existing
+opportunity (one query), and an id outside the bigint range never reaches the database
+to fail the whole batch.
+"""
+import atexit
+import logging
+import math
+import threading
+from collections import defaultdict
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
+from .models import OpportunityEvent, OpportunityStats, VolunteerOpportunity
+
+logger = logging.getLogger(__name__)
+
+TREND_EPOCH = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+MAX_ID = 2 ** 63 - 1
+WEIGHTS = {
+    OpportunityEvent.VIEW: 1.0,
+    OpportunityEvent.APPLY: 10.0,
+}
+
+
+def _decay_rate():
+    return math.log(2) / (settings.TRENDING_HALF_LIFE_HOURS * 3600)
+
+
+def trend_key(kind, at):
+    """log of one event's forward-decayed weight"""
+    return math.log(WEIGHTS[kind]) + _decay_rate() * (at - TREND_EPOCH).total_seconds()
+
+
+def log_add(a, b):
+    """log(exp(a) + exp(b)) without overflow"""
+    high, low = max(a, b), min(a, b)
+    return high + math.log1p(math.exp(low - high))
+
+
+def current_score(trend, now=None):
+    """Decayed activity as of ``now``: about one point per recent view"""
+    now = now or timezone.now()
+    return math.exp(trend - _decay_rate() * (now - TREND_EPOCH).total_seconds())
+
+
+def _upsert_stats(totals):
+    """Add {opportunity_id: (views, applications, trend)} to the counters in one statement"""
+    stats = OpportunityStats._meta.db_table
+    opportunities = VolunteerOpportunity._meta.db_table
+    values = ', '.join(['(%s, %s, %s, %s)'] * len(totals))
+    params = [value for opportunity_id, row in totals.items() for value in (opportunity_id, *row)]
+    with connection.cursor() as cursor:
+        # The join drops events for opportunities deleted or archived since
+        cursor.execute(
+            f'INSERT INTO {stats} (opportunity_id, views, applications, trend) '
+            f'SELECT batch.id, batch.views, batch.applications, batch.trend '
+            f'FROM (VALUES {values}) AS batch (id, views, applications, trend) '
+            f'JOIN {opportunities} ON {opportunities}.id = batch.id '
+            f'ON CONFLICT (opportunity_id) DO UPDATE SET '
+            f'views = {stats}.views + EXCLUDED.views, '
+            f'applications = {stats}.applications + EXCLUDED.applications, '
+            f'trend = GREATEST({stats}.trend, EXCLUDED.trend) '
+            f'+ ln(1 + exp(-abs({stats}.trend - EXCLUDED.trend)))',
+            params,
+        )
+
+
+def _known(events):
+    """The events whose opportunity still exists"""
+    ids = {opportunity_id for _, opportunity_id, _, _ in events if 0 < opportunity_id <= MAX_ID}
+    if not ids:
+        return []
+    existing = set(VolunteerOpportunity.objects.filter(pk__in=ids).values_list('pk', flat=True))
+    return [event for event in events if event[1] in existing]
+
+
+def write_events(events):
+    """Persist buffered (kind, opportunity_id, user_id, created_at) tuples of existing opportunities"""
+    events = _known(events)
+    if not events:
+        return
+    totals = defaultdict(lambda: [0, 0, None])
+    for kind, opportunity_id, user_id, created_at in events:
+        row = totals[opportunity_id]
+        row[0 if kind == OpportunityEvent.VIEW else 1] += 1
+        key = trend_key(kind, created_at)
+        row[2] = key if row[2] is None else log_add(row[2], key)
+    with transaction.atomic():
+        OpportunityEvent.objects.bulk_create(
+            [
+                OpportunityEvent(kind=kind, opportunity_id=opportunity_id, user_id=user_id, created_at=created_at)
+                for kind, opportunity_id, user_id, created_at in events
+            ],
+            batch_size=settings.EVENT_BUFFER_SIZE,
+        )
+        _upsert_stats(totals)
+
+
+class EventBuffer:
+    """Per-process buffer; the flusher thread starts on first use (after any fork)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._events = []
+        self._wakeup = threading.Event()
+        self._thread = None
+        self.dropped = 0
+
+    def record(self, kind, opportunity_ids, user_id=None):
+        created_at = timezone.now()
+        with self._lock:
+            self._events.extend((kind, opportunity_id, user_id, created_at) for opportunity_id in opportunity_ids)
+            full = len(self._events) >= settings.EVENT_BUFFER_SIZE
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='opportunity-events', daemon=True)
+                self._thread.start()
+                atexit.register(self.flush)
+        if full:
+            self._wakeup.set()
+
+    def flush(self):
+        with self._lock:
+            events, self._events = self._events, []
+        if not events:
+            return 0
+        try:
+            write_events(events)
+        except Exception:
+            self.dropped += len(events)
+            logger.exception('Dropped %s opportunity events', len(events))
+            return 0
+        return len(events)
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(settings.EVENT_FLUSH_SECONDS)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            finally:
+                close_old_connections()
+
+
+buffer = EventBuffer()
+
+
+def record_views(opportunity_ids, user=None):
+    buffer.record(OpportunityEvent.VIEW, opportunity_ids, _user_id(user))
+
+
+def record_apply(opportunity_id, user=None):
+    buffer.record(OpportunityEvent.APPLY, [opportunity_id], _user_id(user))
+
+
+def _user_id(user):
+    return user.pk if user is not None and user.is_authenticated else None
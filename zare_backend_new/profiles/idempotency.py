@@ -0,0 +1,167 @@
+# profiles/idempotency.py
+"""
+``Idempotency-Key`` support for POST endpoints.
+
+The first successful response for a (client key, user, path) is stored together with
+a hash of the request body. Retries with the same key and body get that response back, with
+``Idempotent-Replayed: true``, and the view does not run again. Reusing a key with a
+different body is rejected. A duplicate that arrives while the first request is still
+running waits on a Postgres advisory lock, then replays the stored result. Records
+expire after ``IDEMPOTENCY_TTL_HOURS``; ``purge_idempotency_keys`` deletes them.
+
+Anonymous keys are scoped to the client address, so two clients cannot collide on (or
+read back) each other's key. Nothing replayable is a secret: request bodies are stored
+as a keyed hash, and an auth token in the response is stored as null and looked up again
+on replay (the matching body hash already proves the retry carries the same password).
+"""
+import hashlib
+import hmac
+import json
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.response import Response
+from rest_framework.throttling import BaseThrottle
+
+from .models import IdempotencyRecord
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+# SQLSTATE raised when lock_timeout expires
+LOCK_NOT_AVAILABLE = '55P03'
+
+
+def _keyed_hash(value):
+    # Keyed so that stored hashes of bodies holding passwords cannot be brute-forced offline
+    return hmac.new(settings.SECRET_KEY.encode(), value.encode(), hashlib.sha256).hexdigest()
+
+
+def _request_hash(request):
+    return _keyed_hash(json.dumps(request.data, sort_keys=True, cls=DjangoJSONEncoder))
+
+
+def _owner(request):
+    if request.user.is_authenticated:
+        return f'user:{request.user.pk}'
+    # Same client address resolution (and NUM_PROXIES setting) as DRF's throttles
+    return f'anonymous:{_keyed_hash(BaseThrottle().get_ident(request))[:40]}'
+
+
+def _stored_body(data):
+    """The response body to keep, with the auth token blanked"""
+    if isinstance(data, dict) and data.get('token'):
+        return {**data, 'token': None}
+    return data
+
+
+def _replayed_body(body):
+    """Put the current auth token of the response's user back into a stored body"""
+    if isinstance(body, dict) and 'token' in body and body['token'] is None:
+        user_id = (body.get('user') or {}).get('id')
+        body = {**body, 'token': Token.objects.using(DEFAULT_DB_ALIAS).filter(
+            user_id=user_id
+        ).values_list('key', flat=True).first()}
+    return body
+
+
+def _lock_id(owner, path, key):
+    digest = hashlib.sha256(f'{owner}|{path}|{key}'.encode()).digest()
+    return int.from_bytes(digest[:8], 'big', signed=True)
+
+
+def _acquire_lock(connection, lock_id):
+    """Wait (bounded by IDEMPOTENCY_LOCK_TIMEOUT_MS) for a concurrent duplicate to finish"""
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT current_setting('lock_timeout'), set_config('lock_timeout', %s, true)",
+            [f'{settings.IDEMPOTENCY_LOCK_TIMEOUT_MS}ms'],
+        )
+        previous = cursor.fetchone()[0]
+        cursor.execute('SELECT pg_advisory_xact_lock(%s)', [lock_id])
+        # The view runs in the same transaction: its own lock waits keep the usual timeout
+        cursor.execute("SELECT set_config('lock_timeout', %s, true)", [previous])
+
+
+def _error(message, status_code):
+    return Response({
+        'success': False,
+        'error': message
+    }, status=status_code)
+
+
+def idempotent(view_func):
+    """
+    Apply *below* ``@api_view`` (like ``conditional_view``) so the request is already
+    authenticated and parsed. Requests without the header run as before.
+    """
+    @wraps(view_func)
+    def _wrapped_view(request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key:
+            return view_func(request, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return _error(f'{HEADER} must be at most {MAX_KEY_LENGTH} characters', status.HTTP_400_BAD_REQUEST)
+
+        owner = _owner(request)
+        path = request.path[:MAX_KEY_LENGTH]
+        request_hash = _request_hash(request)
+        connection = connections[DEFAULT_DB_ALIAS]
+
+        try:
+            with transaction.atomic(using=DEFAULT_DB_ALIAS):
+                _acquire_lock(connection, _lock_id(owner, path, key))
+                record = IdempotencyRecord.objects.using(DEFAULT_DB_ALIAS).filter(
+                    owner=owner, path=path, key=key, expires_at__gt=timezone.now()
+                ).first()
+                if record is not None:
+                    if record.request_hash != request_hash:
+                        return _error(
+                            f'{HEADER} was already used with a different request body',
+                            status.HTTP_422_UNPROCESSABLE_ENTITY,
+                        )
+                    response = Response(_replayed_body(record.response_body), status=record.status_code)
+                    response['Idempotent-Replayed'] = 'true'
+                    return response
+
+                # The view's writes and the stored response commit together
+                response = view_func(request, *args, **kwargs)
+                if response.status_code >= 400 or not isinstance(response, Response):
+                    # Only successes are kept: a retry after an error runs the view again. Rolling
+                    # back also recovers from database errors the view caught and turned into a 400.
+                    transaction.set_rollback(True)
+                    return response
+                now = timezone.now()
+                IdempotencyRecord.objects.using(DEFAULT_DB_ALIAS).update_or_create(
+                    owner=owner, path=path, key=key,
+                    defaults={
+                        'request_hash': request_hash,
+                        'status_code': response.status_code,
+                        'response_body': _stored_body(response.data),
+                        'created_at': now,
+                        'expires_at': now + timedelta(hours=settings.IDEMPOTENCY_TTL_HOURS),
+                    },
+                )
+                return response
+        except OperationalError as e:
+            if getattr(e.__cause__, 'sqlstate', None) == LOCK_NOT_AVAILABLE:
+                return _error(f'A request with this {HEADER} is still in progress', status.HTTP_409_CONFLICT)
+            raise
+    return _wrapped_view
+
+
+def purge_expired(batch_size=5000):
+    """Delete expired records in short batches; returns how many"""
+    purged = 0
+    while True:
+        ids = list(IdempotencyRecord.objects.filter(expires_at__lte=timezone.now()).values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return purged
+        purged += IdempotencyRecord.objects.filter(id__in=ids).delete()[0]
@@ -0,0 +1,107 @@
+# profiles/images.py
+"""
+Resized renditions of profile pictures.
+
+Each picture is addressed by the SHA-256 of its bytes (``UserProfile.picture_digest``),
+so a variant URL never changes meaning and can be cached forever. Variants are
+rendered with Pillow on first request and stored under
+``IMAGE_VARIANT_ROOT/<digest[:2]>/<digest>/<variant>.<format>``.
+"""
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.urls import reverse
+
+# name -> (width, height); pictures are center-cropped to fill the box
+VARIANTS = {
+    'thumb': (64, 64),
+    'small': (160, 160),
+    'medium': (400, 400),
+}
+# URL extension -> (Pillow format, content type)
+FORMATS = {
+    'webp': ('WEBP', 'image/webp'),
+    'jpg': ('JPEG', 'image/jpeg'),
+}
+QUALITY = 80
+HASH_CHUNK_SIZE = 64 * 1024
+
+
+def file_digest(field_file):
+    """SHA-256 of a stored or freshly uploaded file"""
+    digest = hashlib.sha256()
+    field_file.open('rb')
+    try:
+        field_file.seek(0)
+        for chunk in iter(lambda: field_file.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+        field_file.seek(0)
+    finally:
+        if field_file._committed:
+            field_file.close()
+    return digest.hexdigest()
+
+
+def variant_path(digest, variant, extension):
+    return Path(settings.IMAGE_VARIANT_ROOT) / digest[:2] / digest / f'{variant}.{extension}'
+
+
+def variant_etag(digest, variant, extension):
+    return f'"{digest[:32]}-{variant}-{extension}"'
+
+
+def variant_urls(digest, request=None, extension='webp'):
+    """{variant: url} for a picture digest, absolute when a request is available"""
+    if not digest:
+        return {}
+    urls = {}
+    for variant in VARIANTS:
+        url = reverse('profiles:picture_variant', kwargs={
+            'digest': digest, 'variant': variant, 'extension': extension,
+        })
+        urls[variant] = request.build_absolute_uri(url) if request is not None else url
+    return urls
+
+
+def render_variant(source, variant, extension, destination):
+    """Write the resized rendition of ``source`` (a file object) to ``destination`` atomically"""
+    from PIL import Image, ImageOps
+
+    image_format = FORMATS[extension][0]
+    with Image.open(source) as image:
+        image = ImageOps.exif_transpose(image)
+        image = ImageOps.fit(image, VARIANTS[variant], method=Image.Resampling.LANCZOS)
+        if image_format == 'JPEG' and image.mode != 'RGB':
+            image = image.convert('RGB')
+        elif image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA')
+
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        # Concurrent first requests may render the same variant; the last rename wins
+        handle, temporary = tempfile.mkstemp(dir=destination.parent, suffix='.tmp')
+        try:
+            with os.fdopen(handle, 'wb') as output:
+                image.save(output, format=image_format, quality=QUALITY, method=4)
+            os.replace(temporary, destination)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+
+def get_variant(digest, variant, extension, source_lookup):
+    """
+    Path of the rendition, rendering it first if needed. ``source_lookup(digest)``
+    returns the original's FieldFile (or None) and is only called on a miss.
+    """
+    path = variant_path(digest, variant, extension)
+    if path.is_file():
+        return path
+    source = source_lookup(digest)
+    if not source:
+        return None
+    with source.open('rb') as handle:
+        render_variant(handle, variant, extension, path)
+    return path
@@ -0,0 +1,240 @@
+# profiles/loadtesting.py
+"""
+HTTP load generation against a running server.
+
+Routes are described by builder functions that turn a ``LoadContext`` (base URL,
+seeded credentials and ids) into a request. ``run_load`` drives a weighted mix of them
+from a thread pool and ``summarize`` turns the samples into throughput and latency
+percentiles that can be saved as JSON and compared across commits.
+"""
+import json
+import random
+import subprocess
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import requests
+
+from .seeding import SEED_PASSWORD, SEED_USERNAME_PREFIX, seed_email
+
+SOCIAL_LOGIN_POOL = 200
+
+
+class LoadContext:
+    def __init__(self, base_url, user_count, tokens, opportunity_ids):
+        self.base_url = base_url.rstrip('/')
+        self.user_count = user_count
+        self.tokens = tokens
+        self.opportunity_ids = opportunity_ids
+
+
+def _auth(context, rng):
+    return {'Authorization': f'Token {rng.choice(context.tokens)}'}
+
+
+def build_login(context, rng):
+    index = rng.randrange(context.user_count)
+    return 'POST', '/api/auth/login/', {}, {'email': seed_email(index), 'password': SEED_PASSWORD}
+
+
+def build_opportunities(context, rng):
+    return 'GET', '/api/profiles/opportunities/', _auth(context, rng), None
+
+
+def build_history(context, rng):
+    return 'GET', '/api/profiles/history/', _auth(context, rng), None
+
+
+def build_profile(context, rng):
+    return 'GET', '/api/auth/profile/', _auth(context, rng), None
+
+
+def build_contact(context, rng):
+    number = rng.randrange(1_000_000)
+    return 'POST', '/api/contact/', {}, {
+        'first_name': 'Load',
+        'last_name': 'Test',
+        'email': f'{SEED_USERNAME_PREFIX}contact_lt_{number}@example.com',
+        'message': 'Load test message',
+    }
+
+
+def build_social_login(context, rng):
+    # A bounded pool of identities: the first hit creates the user, later ones are returning logins
+    index = rng.randrange(SOCIAL_LOGIN_POOL)
+    return 'POST', '/api/auth/social/login/', {}, {
+        'provider': 'google',
+        'access_token': f'mock_google_{index}',
+        'user_data': {
+            'id': f'loadtest_{index}',
+            'email': f'{SEED_USERNAME_PREFIX}social_{index}@example.com',
+            'first_name': 'Social',
+            'last_name': f'User{index}',
+        },
+    }
+
+
+ROUTES = {
+    'login': build_login,
+    'opportunities': build_opportunities,
+    'history': build_history,
+    'profile': build_profile,
+    'contact': build_contact,
+    'social_login': build_social_login,
+}
+
+DEFAULT_MIX = {
+    'opportunities': 40,
+    'history': 20,
+    'profile': 15,
+    'login': 10,
+    'social_login': 10,
+    'contact': 5,
+}
+
+
+def parse_mix(text):
+    """'opportunities=5,login=1' -> {'opportunities': 5, 'login': 1}"""
+    mix = {}
+    for item in filter(None, (part.strip() for part in text.split(','))):
+        name, _, weight = item.partition('=')
+        if name not in ROUTES:
+            raise ValueError(f'Unknown route {name!r}; choose from {", ".join(ROUTES)}')
+        mix[name] = float(weight or 1)
+    return mix
+
+
+class Samples:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+
+    def add(self, route, seconds, status):
+        with self._lock:
+            self.latencies[route].append(seconds * 1000)
+            self.statuses[route][status] += 1
+
+
+def send(session, context, method, path, headers, body, timeout=30):
+    """Issue one request; returns (seconds, status) with status 0 for transport errors"""
+    started = time.perf_counter()
+    try:
+        response = session.request(method, context.base_url + path, headers=headers, json=body, timeout=timeout)
+        status = response.status_code
+    except requests.RequestException:
+        status = 0
+    return time.perf_counter() - started, status
+
+
+def run_load(context, mix, concurrency, duration=None, total_requests=None, seed=0):
+    """Drive the weighted route mix until ``duration`` seconds or ``total_requests`` elapse"""
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    samples = Samples()
+    deadline = time.monotonic() + duration if duration else None
+    remaining = [total_requests]
+    counter_lock = threading.Lock()
+
+    def take_ticket():
+        if deadline is not None and time.monotonic() >= deadline:
+            return False
+        if remaining[0] is not None:
+            with counter_lock:
+                if remaining[0] <= 0:
+                    return False
+                remaining[0] -= 1
+        return True
+
+    def worker(worker_id):
+        rng = random.Random(seed * 1000 + worker_id)
+        session = requests.Session()
+        while take_ticket():
+            route = rng.choices(names, weights)[0]
+            method, path, headers, body = ROUTES[route](context, rng)
+            seconds, status = send(session, context, method, path, headers, body)
+            samples.add(route, seconds, status)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(worker, range(concurrency)))
+    return samples, time.perf_counter() - started
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return round(ordered[index], 2)
+
+
+def summarize_latencies(latencies, statuses, elapsed):
+    errors = sum(count for status, count in statuses.items() if status == 0 or status >= 500)
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'throughput_rps': round(len(latencies) / elapsed, 2) if elapsed else None,
+        'mean_ms': round(sum(latencies) / len(latencies), 2) if latencies else None,
+        'p50_ms': percentile(latencies, 50),
+        'p95_ms': percentile(latencies, 95),
+        'p99_ms': percentile(latencies, 99),
+        'max_ms': round(max(latencies), 2) if latencies else None,
+        'status_counts': {str(status): count for status, count in sorted(statuses.items())},
+    }
+
+
+def summarize(samples, elapsed):
+    routes = {
+        route: summarize_latencies(samples.latencies[route], samples.statuses[route], elapsed)
+        for route in sorted(samples.latencies)
+    }
+    all_latencies = [value for values in samples.latencies.values() for value in values]
+    all_statuses = defaultdict(int)
+    for statuses in samples.statuses.values():
+        for status, count in statuses.items():
+            all_statuses[status] += count
+    return {'routes': routes, 'total': summarize_latencies(all_latencies, all_statuses, elapsed)}
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def build_report(summary, elapsed, config, label=None):
+    return {
+        'label': label,
+        'git_revision': git_revision(),
+        'finished_at': datetime.now(timezone.utc).isoformat(),
+        'elapsed_seconds': round(elapsed, 2),
+        'config': config,
+        **summary,
+    }
+
+
+def save_report(report, path):
+    with open(path, 'w') as handle:
+        json.dump(report, handle, indent=2)
+
+
+def compare_reports(baseline, current):
+    """Per-route latency and throughput changes between two saved reports"""
+    rows = []
+    for route in sorted(set(baseline['routes']) | set(current['routes'])):
+        before = baseline['routes'].get(route, {})
+        after = current['routes'].get(route, {})
+        row = {'route': route}
+        for metric in ('p50_ms', 'p95_ms', 'p99_ms', 'throughput_rps'):
+            old, new = before.get(metric), after.get(metric)
+            row[metric] = (old, new)
+            row[f'{metric}_change_pct'] = round((new - old) / old * 100, 1) if old and new is not None else None
+        rows.append(row)
+    return rows
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from profiles.archival import archivable_opportunities, archive_cutoff, archive_expired_opportunities
+
+
+class Command(BaseCommand):
+    help = (
+        'Move opportunities whose deadline passed, and their settled history, into the archive '
+        'tables in bounded batches. Meant to run from cron, e.g. nightly.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-days', type=int,
+                            help='Grace period after the deadline (default: OPPORTUNITY_ARCHIVE_AFTER_DAYS)')
+        parser.add_argument('--batch-size', type=int, help='Opportunities per transaction')
+        parser.add_argument('--max-batches', type=int, help='Stop after this many batches')
+        parser.add_argument('--dry-run', action='store_true', help='Only count what would be archived')
+
+    def handle(self, *args, **options):
+        cutoff = archive_cutoff(options['older_than_days'])
+        if options['dry_run']:
+            count = archivable_opportunities(cutoff).count()
+            self.stdout.write(f'{count} opportunities with a deadline before {cutoff:%Y-%m-%d} can be archived')
+            return
+
+        opportunities, history = archive_expired_opportunities(
+            cutoff,
+            batch_size=options['batch_size'],
+            max_batches=options['max_batches'],
+            log=self.stdout.write,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Archived {opportunities} opportunities and {history} history rows'
+        ))
@@ -0,0 +1,69 @@
+import copy
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare per-request database latency with and without the connection pool. '
+        'Each simulated request connects, runs --queries statements and releases the '
+        'connection, exactly like the request_started/request_finished cycle.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--queries', type=int, default=3, help='Statements per simulated request')
+
+    def handle(self, *args, **options):
+        base = connections[options['database']]
+        if base.vendor != 'postgresql':
+            raise CommandError('Connection pooling is only configured for PostgreSQL')
+
+        unpooled_settings = copy.deepcopy(base.settings_dict)
+        unpooled_settings['OPTIONS'].pop('pool', None)
+        pooled_settings = copy.deepcopy(base.settings_dict)
+        pooled_settings['OPTIONS'].setdefault('pool', True)
+
+        wrapper_class = type(base)
+        results = {}
+        for mode, settings_dict in (('unpooled', unpooled_settings), ('pooled', pooled_settings)):
+            wrapper = wrapper_class(settings_dict, alias=f'benchmark_{mode}')
+            try:
+                # Warm up: opens the pool's min_size connections outside the measurement
+                self.simulate_request(wrapper, options['queries'])
+                samples = [self.simulate_request(wrapper, options['queries']) for _ in range(options['requests'])]
+            finally:
+                wrapper.close()
+                if mode == 'pooled':
+                    wrapper.close_pool()
+            results[mode] = samples
+
+        for mode, samples in results.items():
+            self.stdout.write(
+                f'{mode:>9}: mean {statistics.mean(samples):7.2f} ms  '
+                f'p50 {percentile(samples, 50):7.2f} ms  p95 {percentile(samples, 95):7.2f} ms  '
+                f'p99 {percentile(samples, 99):7.2f} ms'
+            )
+        saved = statistics.mean(results['unpooled']) - statistics.mean(results['pooled'])
+        self.stdout.write(self.style.SUCCESS(f'Pooling saves {saved:.2f} ms per request on average'))
+
+    def simulate_request(self, wrapper, queries):
+        started = time.perf_counter()
+        wrapper.ensure_connection()
+        with wrapper.cursor() as cursor:
+            for _ in range(queries):
+                cursor.execute('SELECT 1')
+                cursor.fetchone()
+        # With a pool this hands the connection back; without one it closes the socket
+        wrapper.close()
+        return (time.perf_counter() - started) * 1000
@@ -0,0 +1,88 @@
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# What a worker does before serving its first request: build the WSGI app, then load the URLconf
+COLD_START_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+from zare_backend_new.wsgi import application
+from django.urls import get_resolver
+get_resolver().url_patterns
+elapsed = time.perf_counter() - started
+print(json.dumps({'ms': elapsed * 1000, 'modules': sorted(sys.modules)}))
+"""
+
+# Modules that must only load when a request needs them
+LAZY_MODULES = (
+    'requests',
+    'jwt',
+    'profiles.social_auth',
+    'profiles.providers.google',
+    'profiles.providers.facebook',
+    'profiles.providers.apple',
+    'profiles.providers.jwks',
+)
+
+IMPORTTIME_RE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)$')
+
+
+def run_cold_start():
+    env = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'zare_backend_new.settings')}
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', COLD_START_SCRIPT],
+        cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise CommandError(f'Cold start failed:\n{result.stderr[-2000:]}')
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    top_level = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_RE.match(line)
+        # Only top-level imports (one space of indentation), so times are not double counted
+        if match and len(match[3]) == 1:
+            top_level.append((int(match[2]) / 1000, match[4]))
+    report['top_level'] = top_level
+    return report
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure worker cold start (WSGI app + URLconf) in fresh interpreters and fail if it '
+        'exceeds the budget or eagerly imports modules that should load lazily'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5, help='Fresh interpreters to start (median is used)')
+        parser.add_argument('--budget-ms', type=float,
+                            help='Fail above this median (default: IMPORT_TIME_BUDGET_MS)')
+        parser.add_argument('--top', type=int, default=15, help='Slowest top-level imports to list')
+
+    def handle(self, *args, **options):
+        budget = options['budget_ms'] or settings.IMPORT_TIME_BUDGET_MS
+        reports = [run_cold_start() for _ in range(options['runs'])]
+        median = statistics.median(report['ms'] for report in reports)
+
+        self.stdout.write('Slowest top-level imports (last run):')
+        for cumulative_ms, module in sorted(reports[-1]['top_level'], reverse=True)[:options['top']]:
+            self.stdout.write(f'  {cumulative_ms:8.1f} ms  {module}')
+        self.stdout.write(
+            f"Cold start: median {median:.1f} ms over {len(reports)} runs "
+            f"(min {min(r['ms'] for r in reports):.1f}, max {max(r['ms'] for r in reports):.1f}), budget {budget:.0f} ms"
+        )
+
+        problems = []
+        eager = [module for module in LAZY_MODULES if module in reports[-1]['modules']]
+        if eager:
+            problems.append(f"imported at startup but should be lazy: {', '.join(eager)}")
+        if median > budget:
+            problems.append(f'median {median:.1f} ms exceeds the {budget:.0f} ms budget')
+        if problems:
+            raise CommandError('Cold start regressed: ' + '; '.join(problems))
+        self.stdout.write(self.style.SUCCESS('Cold start within budget'))
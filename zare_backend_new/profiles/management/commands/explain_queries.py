@@ -0,0 +1,52 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from profiles.query_plans import check_endpoints, default_min_rows, large_tables
+from profiles.seeding import SEED_USERNAME_PREFIX, seed_database
+
+
+class Command(BaseCommand):
+    help = (
+        'Run EXPLAIN ANALYZE on every query issued by the hot endpoints and fail if a plan '
+        'falls back to a sequential scan on a large table or sorts on disk'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed-scale', type=float, default=0,
+                            help='Seed benchmark data at this scale first (0 = use existing seed data)')
+        parser.add_argument('--min-rows', type=int, default=None,
+                            help='Only flag sequential scans on tables with at least this many rows '
+                                 '(default: ADMIN_ESTIMATED_COUNT_THRESHOLD)')
+        parser.add_argument('--verbose-plans', action='store_true', help='Print every plan')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Query plans can only be checked against PostgreSQL')
+
+        if options['seed_scale']:
+            seed_database(scale=options['seed_scale'], log=self.stdout.write)
+
+        volunteer = (
+            User.objects.filter(username__startswith=SEED_USERNAME_PREFIX, volunteerhistory__isnull=False)
+            .order_by('id').first()
+        )
+        if volunteer is None:
+            raise CommandError('No seed data found: run with --seed-scale or `manage.py seed_data` first')
+
+        min_rows = default_min_rows() if options['min_rows'] is None else options['min_rows']
+        # Everything, including the throwaway admin account and applications, is rolled back
+        with transaction.atomic():
+            admin = User.objects.create_superuser('explain_queries_admin', 'explain@example.com', None)
+            try:
+                failures = check_endpoints(
+                    volunteer, admin, large_tables(min_rows), log=self.stdout.write, show_plans=options['verbose_plans'],
+                )
+            except ValueError as e:
+                raise CommandError(str(e))
+            finally:
+                transaction.set_rollback(True)
+
+        if failures:
+            raise CommandError('Query plan regressions:\n' + '\n'.join(failures))
+        self.stdout.write(self.style.SUCCESS('All endpoint query plans use indexes and in-memory sorts'))
@@ -0,0 +1,109 @@
+import json
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.authtoken.models import Token
+
+from profiles.loadtesting import (
+    DEFAULT_MIX, LoadContext, build_report, compare_reports, parse_mix, run_load, save_report, summarize,
+)
+from profiles.models import VolunteerOpportunity
+from profiles.seeding import SEED_USERNAME_PREFIX, seed_database
+
+TOKEN_POOL = 500
+
+
+def ensure_tokens(user_ids):
+    """Auth tokens for the given users, created in bulk where missing"""
+    existing = dict(Token.objects.filter(user_id__in=user_ids).values_list('user_id', 'key'))
+    missing = [Token(user_id=user_id, key=Token.generate_key()) for user_id in user_ids if user_id not in existing]
+    Token.objects.bulk_create(missing)
+    return list(existing.values()) + [token.key for token in missing]
+
+
+def format_change(pair, change):
+    old, new = pair
+    if change is None:
+        return f'{old} -> {new}'
+    return f'{old} -> {new} ({change:+.1f}%)'
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed data and drive a weighted mix of real API routes against a running server, '
+        'reporting throughput and p50/p95/p99 latency per route'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+        parser.add_argument('--scale', type=float, default=1, help='Seed scale factor (see seed_data)')
+        parser.add_argument('--skip-seed', action='store_true', help='Reuse previously seeded data')
+        parser.add_argument('--mix', default=','.join(f'{name}={weight}' for name, weight in DEFAULT_MIX.items()),
+                            help='Weighted routes, e.g. "opportunities=5,login=1"')
+        parser.add_argument('--concurrency', type=int, default=10)
+        parser.add_argument('--duration', type=float, default=30, help='Seconds to run (ignored with --requests)')
+        parser.add_argument('--requests', type=int, help='Stop after this many requests')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--label', help='Name for this run in the saved report')
+        parser.add_argument('--output', help='Write the JSON report here')
+        parser.add_argument('--compare', help='Previous JSON report to compare against')
+
+    def handle(self, *args, **options):
+        try:
+            mix = parse_mix(options['mix'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        if not options['skip_seed']:
+            seed_database(scale=options['scale'], seed=options['seed'], log=self.stdout.write)
+
+        user_ids = list(
+            User.objects.filter(username__startswith=SEED_USERNAME_PREFIX, username__endswith='@example.com')
+            .exclude(username__contains='social').order_by('id').values_list('id', flat=True)
+        )
+        if not user_ids:
+            raise CommandError('No seed data found: drop --skip-seed or run `manage.py seed_data`')
+        opportunity_ids = list(VolunteerOpportunity.objects.open().values_list('id', flat=True)[:1000])
+        context = LoadContext(
+            options['base_url'],
+            user_count=len(user_ids),
+            tokens=ensure_tokens(user_ids[:TOKEN_POOL]),
+            opportunity_ids=opportunity_ids,
+        )
+
+        duration = None if options['requests'] else options['duration']
+        self.stdout.write(
+            f"Driving {options['base_url']} with {options['concurrency']} workers "
+            f"({options['requests'] or str(duration) + 's'})"
+        )
+        samples, elapsed = run_load(
+            context, mix, options['concurrency'], duration=duration,
+            total_requests=options['requests'], seed=options['seed'],
+        )
+        config = {key: options[key] for key in ('base_url', 'scale', 'concurrency', 'duration', 'requests', 'seed')}
+        config['mix'] = mix
+        report = build_report(summarize(samples, elapsed), elapsed, config, label=options['label'])
+
+        self.stdout.write(f"{'route':<15}{'requests':>9}{'errors':>8}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}")
+        for route, stats in (*report['routes'].items(), ('TOTAL', report['total'])):
+            if not stats['requests']:
+                continue
+            self.stdout.write(
+                f"{route:<15}{stats['requests']:>9}{stats['errors']:>8}{stats['throughput_rps']:>9}"
+                f"{stats['p50_ms']:>9}{stats['p95_ms']:>9}{stats['p99_ms']:>9}"
+            )
+
+        if options['output']:
+            save_report(report, options['output'])
+            self.stdout.write(self.style.SUCCESS(f"Report saved to {options['output']}"))
+
+        if options['compare']:
+            with open(options['compare']) as handle:
+                baseline = json.load(handle)
+            self.stdout.write(f"Compared with {baseline.get('label') or baseline.get('git_revision')}:")
+            for row in compare_reports(baseline, report):
+                self.stdout.write(
+                    f"  {row['route']:<15} p50 {format_change(row['p50_ms'], row['p50_ms_change_pct'])}  "
+                    f"p95 {format_change(row['p95_ms'], row['p95_ms_change_pct'])}  "
+                    f"p99 {format_change(row['p99_ms'], row['p99_ms_change_pct'])}"
+                )
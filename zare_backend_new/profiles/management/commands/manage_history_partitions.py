@@ -0,0 +1,58 @@
+from datetime import datetime, timezone
+
+from django.core.management.base import BaseCommand, CommandError
+
+from profiles.partitions import (
+    add_months, detach_partitions, ensure_partitions, is_partitioned, list_partitions, month_start,
+)
+
+
+def parse_month(value):
+    try:
+        return datetime.strptime(value, '%Y-%m').date()
+    except ValueError:
+        raise CommandError(f'Expected YYYY-MM, got "{value}"')
+
+
+class Command(BaseCommand):
+    help = (
+        'Create upcoming monthly VolunteerHistory partitions and, for retention, detach '
+        '(or drop) old ones. Run from cron, e.g. daily.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ahead', type=int, help='Months to create ahead (default: HISTORY_PARTITION_MONTHS_AHEAD)')
+        parser.add_argument('--retain-months', type=int,
+                            help='Detach partitions older than this many months')
+        parser.add_argument('--detach-before', help='Detach partitions that end on or before this month (YYYY-MM)')
+        parser.add_argument('--drop', action='store_true', help='Drop detached partitions instead of keeping them')
+        parser.add_argument('--list', action='store_true', help='Only list partitions')
+
+    def handle(self, *args, **options):
+        if not is_partitioned():
+            raise CommandError('profiles_volunteerhistory is not partitioned; run migrate first')
+
+        if options['list']:
+            for month, name, estimate in list_partitions():
+                self.stdout.write(f'{month:%Y-%m}  {name}  ~{estimate} rows')
+            return
+
+        for name in ensure_partitions(months_ahead=options['ahead']):
+            self.stdout.write(f'Created {name}')
+
+        this_month = month_start(datetime.now(timezone.utc))
+        before = None
+        if options['detach_before']:
+            before = parse_month(options['detach_before'])
+        elif options['retain_months'] is not None:
+            before = add_months(this_month, -options['retain_months'])
+        elif options['drop']:
+            raise CommandError('--drop needs --retain-months or --detach-before')
+        if before is not None:
+            if before > this_month:
+                raise CommandError('Refusing to detach the current or future partitions')
+            verb = 'Dropped' if options['drop'] else 'Detached'
+            for name in detach_partitions(before, drop=options['drop']):
+                self.stdout.write(f'{verb} {name}')
+
+        self.stdout.write(self.style.SUCCESS('Partitions up to date'))
@@ -0,0 +1,76 @@
+import json
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        'Sign a Google or Apple style ID token with a locally generated key, to exercise '
+        'social logins offline. Point GOOGLE_JWKS_URL/APPLE_JWKS_URL at the printed file:// '
+        'URL and list the audience in GOOGLE_CLIENT_IDS/APPLE_CLIENT_IDS. --rotate adds a '
+        'new signing key, which the server picks up through its unknown-kid refresh.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('provider', choices=sorted(settings.SOCIAL_ID_TOKENS))
+        parser.add_argument('--keys-dir', default=str(settings.BASE_DIR / 'var' / 'test-jwks'))
+        parser.add_argument('--sub', default='local-user-1')
+        parser.add_argument('--email', default='local-user-1@example.com')
+        parser.add_argument('--name', default='Local Tester', help='Given and family name, space separated')
+        parser.add_argument('--audience', help='Client id (default: the first configured one, else "local-client")')
+        parser.add_argument('--expires-in', type=int, default=3600)
+        parser.add_argument('--rotate', action='store_true', help='Generate a new signing key first')
+
+    def _signing_key(self, keys_dir, rotate):
+        from cryptography.hazmat.primitives import serialization
+        from cryptography.hazmat.primitives.asymmetric import rsa
+        from jwt.algorithms import RSAAlgorithm
+
+        private_path = keys_dir / 'private.pem'
+        jwks_path = keys_dir / 'jwks.json'
+        jwks = json.loads(jwks_path.read_text()) if jwks_path.exists() else {'keys': []}
+        if rotate or not private_path.exists() or not jwks['keys']:
+            private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+            public_jwk = json.loads(RSAAlgorithm.to_jwk(private_key.public_key()))
+            # Old public keys stay published so tokens already issued keep verifying
+            jwks['keys'].append({**public_jwk, 'kid': f'local-{time.time_ns()}', 'alg': 'RS256', 'use': 'sig'})
+            keys_dir.mkdir(parents=True, exist_ok=True)
+            private_path.write_bytes(private_key.private_bytes(
+                serialization.Encoding.PEM,
+                serialization.PrivateFormat.PKCS8,
+                serialization.NoEncryption(),
+            ))
+            jwks_path.write_text(json.dumps(jwks, indent=2))
+        return private_path.read_bytes(), jwks['keys'][-1]['kid'], jwks_path
+
+    def handle(self, *args, **options):
+        try:
+            import jwt
+        except ImportError:
+            raise CommandError('PyJWT (with cryptography) is required: pip install "PyJWT[crypto]"')
+
+        provider = options['provider']
+        config = settings.SOCIAL_ID_TOKENS[provider]
+        private_key, kid, jwks_path = self._signing_key(Path(options['keys_dir']).resolve(), options['rotate'])
+        audience = options['audience'] or (config['audiences'] or ['local-client'])[0]
+        given_name, _, family_name = options['name'].partition(' ')
+        now = int(time.time())
+        claims = {
+            'iss': config['issuers'][0],
+            'aud': audience,
+            'sub': options['sub'],
+            'email': options['email'],
+            'email_verified': True if provider == 'google' else 'true',
+            'iat': now,
+            'exp': now + options['expires_in'],
+        }
+        if provider == 'google':
+            claims.update(given_name=given_name, family_name=family_name)
+        token = jwt.encode(claims, private_key, algorithm='RS256', headers={'kid': kid})
+
+        self.stderr.write(f'{provider.upper()}_JWKS_URL={jwks_path.as_uri()}')
+        self.stderr.write(f'{provider.upper()}_CLIENT_IDS={audience}')
+        self.stdout.write(token)
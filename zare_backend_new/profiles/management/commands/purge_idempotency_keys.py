@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from profiles.idempotency import purge_expired
+
+
+class Command(BaseCommand):
+    help = 'Delete stored Idempotency-Key responses older than IDEMPOTENCY_TTL_HOURS. Meant to run from cron, e.g. hourly.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000, help='Records deleted per statement')
+
+    def handle(self, *args, **options):
+        purged = purge_expired(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Purged {purged} expired idempotency records'))
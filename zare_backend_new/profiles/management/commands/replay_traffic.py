@@ -0,0 +1,101 @@
+import json
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from profiles.loadtesting import build_report, compare_reports, save_report, summarize
+from profiles.management.commands.loadtest import TOKEN_POOL, ensure_tokens, format_change
+from profiles.models import Skill, VolunteerHistory, VolunteerOpportunity
+from profiles.replay import ReplayContext, load_capture, replay, summarize_capture
+from profiles.seeding import SEED_USERNAME_PREFIX, seed_database
+
+ID_POOL_SIZE = 10000
+
+
+class Command(BaseCommand):
+    help = (
+        'Replay captured production traffic (TRAFFIC_CAPTURE_DIR files) against a running server '
+        'seeded at a matching scale, and report per-route latency'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('captures', nargs='+', help='Capture files or directories')
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+        parser.add_argument('--scale', type=float, default=1,
+                            help='Seed scale factor; match production row counts (see seed_data)')
+        parser.add_argument('--skip-seed', action='store_true', help='Reuse previously seeded data')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--speed', type=float, default=1,
+                            help='Multiple of the captured pace (0 = as fast as possible)')
+        parser.add_argument('--concurrency', type=int, default=20)
+        parser.add_argument('--limit', type=int, help='Replay only the first N captured requests')
+        parser.add_argument('--label', help='Name for this run in the saved report')
+        parser.add_argument('--output', help='Write the JSON report here')
+        parser.add_argument('--compare', help='Previous JSON report (e.g. of another build) to compare against')
+
+    def handle(self, *args, **options):
+        records = load_capture(options['captures'], limit=options['limit'])
+        if not records:
+            raise CommandError('No captured requests found')
+
+        if not options['skip_seed']:
+            seed_database(scale=options['scale'], seed=options['seed'], log=self.stdout.write)
+
+        users = User.objects.filter(username__startswith=SEED_USERNAME_PREFIX, username__endswith='@example.com')
+        user_ids = list(users.exclude(username__contains='social').order_by('id').values_list('id', flat=True))
+        if not user_ids:
+            raise CommandError('No seed data found: drop --skip-seed or run `manage.py seed_data`')
+        context = ReplayContext(
+            options['base_url'],
+            user_count=len(user_ids),
+            tokens=ensure_tokens(user_ids[:TOKEN_POOL]),
+            pools={
+                'user': user_ids[:ID_POOL_SIZE],
+                'opportunity': list(
+                    VolunteerOpportunity.objects.open().order_by('id').values_list('id', flat=True)[:ID_POOL_SIZE]
+                ),
+                'history': list(
+                    VolunteerHistory.objects.filter(user_id__in=user_ids[:ID_POOL_SIZE])
+                    .order_by('id').values_list('id', flat=True)[:ID_POOL_SIZE]
+                ),
+                'skill': list(Skill.objects.order_by('id').values_list('id', flat=True)),
+            },
+        )
+
+        span = records[-1]['ts'] - records[0]['ts']
+        self.stdout.write(
+            f"Replaying {len(records)} requests captured over {span:.0f}s against {options['base_url']} "
+            f"at {options['speed'] or 'max'}x with {options['concurrency']} workers"
+        )
+        samples, elapsed = replay(records, context, options['concurrency'], speed=options['speed'])
+        config = {key: options[key] for key in ('base_url', 'scale', 'seed', 'speed', 'concurrency', 'limit')}
+        config['captures'] = options['captures']
+        report = build_report(summarize(samples, elapsed), elapsed, config, label=options['label'])
+        report['captured'] = summarize_capture(records)
+
+        self.stdout.write(
+            f"{'route':<55}{'requests':>9}{'errors':>8}{'p50':>9}{'p95':>9}{'p99':>9}{'prod p50':>10}{'queries':>9}"
+        )
+        for route, stats in report['routes'].items():
+            captured = report['captured'].get(route, {})
+            self.stdout.write(
+                f"{route[:54]:<55}{stats['requests']:>9}{stats['errors']:>8}{stats['p50_ms']:>9}"
+                f"{stats['p95_ms']:>9}{stats['p99_ms']:>9}{str(captured.get('p50_ms')):>10}"
+                f"{str(captured.get('queries_mean')):>9}"
+            )
+
+        if options['output']:
+            save_report(report, options['output'])
+            self.stdout.write(self.style.SUCCESS(f"Report saved to {options['output']}"))
+
+        if options['compare']:
+            with open(options['compare']) as handle:
+                baseline = json.load(handle)
+            self.stdout.write(f"Compared with {baseline.get('label') or baseline.get('git_revision')}:")
+            for row in compare_reports(baseline, report):
+                self.stdout.write(
+                    f"  {row['route'][:54]:<55} p50 {format_change(row['p50_ms'], row['p50_ms_change_pct'])}  "
+                    f"p95 {format_change(row['p95_ms'], row['p95_ms_change_pct'])}  "
+                    f"p99 {format_change(row['p99_ms'], row['p99_ms_change_pct'])}"
+                )
+
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from profiles.seeding import clear_seed_data, seed_database
+
+
+class Command(BaseCommand):
+    help = 'Load deterministic benchmark data (users, profiles, opportunities, history, contacts)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=float, default=1, help='1 = 1k users, 100 opportunities, 5k history rows')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed for reproducible data')
+        parser.add_argument('--clear', action='store_true', help='Only delete previously seeded rows')
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            clear_seed_data()
+            self.stdout.write(self.style.SUCCESS('Seed data removed'))
+            return
+        counts = seed_database(scale=options['scale'], seed=options['seed'], log=self.stdout.write)
+        summary = ', '.join(f'{count} {name}' for name, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f'Seeded {summary}'))
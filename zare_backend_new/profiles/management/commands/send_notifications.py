@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from profiles.notifications import run_worker
+
+
+class Command(BaseCommand):
+    help = (
+        'Queue "new opportunity" emails for matching volunteers and deliver them with a pool '
+        'of persistent SMTP connections. To try it locally, run a debugging SMTP server '
+        '(`python -m aiosmtpd -n -l localhost:1025`) and set EMAIL_HOST=localhost EMAIL_PORT=1025.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, help='SMTP connections (default: NOTIFICATION_WORKERS)')
+        parser.add_argument('--batch-size', type=int, help='Notifications claimed per batch')
+        parser.add_argument('--poll-interval', type=float, default=5, help='Seconds to sleep when idle')
+        parser.add_argument('--once', action='store_true', help='Exit once the queue is empty')
+
+    def handle(self, *args, **options):
+        run_worker(
+            workers=options['workers'],
+            batch_size=options['batch_size'],
+            once=options['once'],
+            poll_interval=options['poll_interval'],
+            log=self.stdout.write,
+        )
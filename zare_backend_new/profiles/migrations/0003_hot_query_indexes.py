@@ -0,0 +1,41 @@
+# Generated by Django 5.2.4 on 2026-10-19 10:03
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('profiles', '0002_volunteeropportunity_updated_at_volunteerhistory_updated_at'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='userprofile',
+            index=models.Index(fields=['-created_at'], name='profiles_up_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='volunteeropportunity',
+            index=models.Index(fields=['-date_posted'], name='profiles_vo_posted_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='volunteeropportunity',
+            index=models.Index(fields=['updated_at'], name='profiles_vo_updated_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='volunteerhistory',
+            index=models.Index(fields=['user', '-created_at'], name='profiles_vh_user_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='volunteerhistory',
+            index=models.Index(fields=['user', 'opportunity'], name='profiles_vh_user_opp_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='volunteerhistory',
+            index=models.Index(condition=models.Q(('status__in', ['applied', 'accepted', 'in_progress'])), fields=['opportunity', 'status'], name='profiles_vh_open_idx'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.4 on 2026-10-19 13:41
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.comparison
+import django.db.models.functions.text
+from django.contrib.postgres.operations import AddIndexConcurrently, TrigramExtension
+from django.db import migrations, models
+
+# auth_user belongs to django.contrib.auth, so its indexes are managed with raw SQL.
+# The expression matches what icontains compiles to: UPPER("auth_user"."email"::text).
+AUTH_USER_TRIGRAM_FIELDS = ('username', 'email', 'first_name', 'last_name')
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('profiles', '0003_hot_query_indexes'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        AddIndexConcurrently(
+            model_name='userprofile',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper(django.db.models.functions.comparison.Cast('phone', output_field=models.TextField())), name='gin_trgm_ops'), name='profiles_up_phone_trgm_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='userprofile',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper(django.db.models.functions.comparison.Cast('location', output_field=models.TextField())), name='gin_trgm_ops'), name='profiles_up_location_trgm_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='volunteeropportunity',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper(django.db.models.functions.comparison.Cast('title', output_field=models.TextField())), name='gin_trgm_ops'), name='profiles_vo_title_trgm_idx'),
+        ),
+        *[
+            migrations.RunSQL(
+                f'CREATE INDEX CONCURRENTLY IF NOT EXISTS auth_user_{field}_trgm_idx '
+                f'ON auth_user USING gin ((UPPER({field}::text)) gin_trgm_ops)',
+                f'DROP INDEX CONCURRENTLY IF EXISTS auth_user_{field}_trgm_idx',
+            )
+            for field in AUTH_USER_TRIGRAM_FIELDS
+        ],
+    ]
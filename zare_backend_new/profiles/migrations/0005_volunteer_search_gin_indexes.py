@@ -0,0 +1,34 @@
+# Generated by Django 5.2.4 on 2026-10-19 14:27
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('profiles', '0004_trigram_search_indexes'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='userprofile',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['volunteer_skills'], name='profiles_up_skills_gin_idx', opclasses=['jsonb_path_ops']),
+        ),
+        AddIndexConcurrently(
+            model_name='userprofile',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['volunteer_interests'], name='profiles_up_interests_gin_idx', opclasses=['jsonb_path_ops']),
+        ),
+        AddIndexConcurrently(
+            model_name='userprofile',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['certifications'], name='profiles_up_certs_gin_idx', opclasses=['jsonb_path_ops']),
+        ),
+        AddIndexConcurrently(
+            model_name='userprofile',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['availability'], name='profiles_up_avail_gin_idx', opclasses=['jsonb_path_ops']),
+        ),
+    ]
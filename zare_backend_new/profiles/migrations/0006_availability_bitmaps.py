@@ -0,0 +1,43 @@
+# Generated by Django 5.2.4 on 2026-10-19 15:02
+
+from django.db import migrations, models
+
+from profiles.availability import sync_masks
+
+
+def backfill_masks(apps, schema_editor):
+    UserProfile = apps.get_model('profiles', 'UserProfile')
+    VolunteerOpportunity = apps.get_model('profiles', 'VolunteerOpportunity')
+    sync_masks(UserProfile.objects.all(), 'availability', 'availability_mask')
+    sync_masks(VolunteerOpportunity.objects.all(), 'schedule', 'shift_mask')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0005_volunteer_search_gin_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='availability_mask',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='volunteeropportunity',
+            name='schedule',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='volunteeropportunity',
+            name='shift_mask',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_masks, migrations.RunPython.noop),
+        # Availability filters use the masks now, not jsonb containment
+        migrations.RemoveIndex(
+            model_name='userprofile',
+            name='profiles_up_avail_gin_idx',
+        ),
+    ]
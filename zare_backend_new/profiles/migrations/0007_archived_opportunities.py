@@ -0,0 +1,58 @@
+# Generated by Django 5.2.4 on 2026-10-19 15:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0006_availability_bitmaps'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedVolunteerOpportunity',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=200)),
+                ('description', models.TextField()),
+                ('organization', models.CharField(max_length=200)),
+                ('location', models.CharField(max_length=200)),
+                ('skills_required', models.JSONField(default=list)),
+                ('date_posted', models.DateTimeField()),
+                ('deadline', models.DateTimeField(blank=True, null=True)),
+                ('hours_required', models.IntegerField(default=0)),
+                ('schedule', models.JSONField(blank=True, default=dict)),
+                ('shift_mask', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('created_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_opportunities', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-date_posted'], name='profiles_avo_posted_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedVolunteerHistory',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('hours_contributed', models.IntegerField(default=0)),
+                ('start_date', models.DateTimeField()),
+                ('end_date', models.DateTimeField(blank=True, null=True)),
+                ('status', models.CharField(choices=[('applied', 'Applied'), ('accepted', 'Accepted'), ('in_progress', 'In Progress'), ('completed', 'Completed'), ('cancelled', 'Cancelled')], max_length=50)),
+                ('feedback', models.TextField(blank=True)),
+                ('rating', models.IntegerField(blank=True, null=True)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('opportunity', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='history', to='profiles.archivedvolunteeropportunity')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_volunteer_history', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', '-created_at'], name='profiles_avh_user_created_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.4 on 2026-10-19 15:41
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('profiles', '0007_archived_opportunities'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='volunteeropportunity',
+            index=models.Index(condition=models.Q(('deadline__isnull', True)), fields=['-date_posted'], name='profiles_vo_open_ended_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='volunteeropportunity',
+            index=models.Index(condition=models.Q(('deadline__isnull', False)), fields=['deadline'], name='profiles_vo_deadline_idx'),
+        ),
+    ]
@@ -0,0 +1,100 @@
+# Generated by Django 5.2.4 on 2026-10-19 16:10
+
+from django.db import migrations, models
+
+from profiles.partitions import (
+    DEFAULT_PARTITION, HISTORY_TABLE, add_months, create_partition_sql, month_start,
+)
+
+LEGACY_TABLE = f'{HISTORY_TABLE}_legacy'
+SEQUENCE = f'{HISTORY_TABLE}_id_seq'
+MONTHS_AHEAD = 3
+
+
+def partition_history(apps, schema_editor):
+    """
+    Rebuild profiles_volunteerhistory as a table partitioned by month on created_at.
+
+    The primary key becomes (id, created_at) because a partitioned table's unique
+    constraints must include the partition key; ids still come from one sequence, so
+    Django keeps treating ``id`` as the primary key. Index and foreign key definitions
+    are copied from the old table under their original names.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    execute = schema_editor.execute
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT relkind FROM pg_class WHERE oid = %s::regclass", [HISTORY_TABLE]
+        )
+        if cursor.fetchone()[0] == 'p':
+            return
+        cursor.execute(
+            """
+            SELECT indexname, indexdef FROM pg_indexes
+            WHERE schemaname = current_schema() AND tablename = %s AND indexname <> %s
+            """,
+            [HISTORY_TABLE, f'{HISTORY_TABLE}_pkey'],
+        )
+        indexes = cursor.fetchall()
+        cursor.execute(
+            """
+            SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint
+            WHERE conrelid = %s::regclass AND contype = 'f'
+            """,
+            [HISTORY_TABLE],
+        )
+        foreign_keys = cursor.fetchall()
+        cursor.execute(f'SELECT MIN(created_at), MAX(id) FROM {HISTORY_TABLE}')
+        oldest, max_id = cursor.fetchone()
+        cursor.execute('SELECT now()')
+        now = cursor.fetchone()[0]
+
+    execute(f'ALTER TABLE {HISTORY_TABLE} RENAME TO {LEGACY_TABLE}')
+    execute(f'ALTER TABLE {LEGACY_TABLE} DROP CONSTRAINT {HISTORY_TABLE}_pkey')
+    for name, definition in foreign_keys:
+        execute(f'ALTER TABLE {LEGACY_TABLE} DROP CONSTRAINT {name}')
+    for name, definition in indexes:
+        execute(f'DROP INDEX {name}')
+    # Drops the identity sequence so the new table can own one under the same name
+    execute(f'ALTER TABLE {LEGACY_TABLE} ALTER COLUMN id DROP IDENTITY IF EXISTS')
+
+    execute(f'CREATE TABLE {HISTORY_TABLE} (LIKE {LEGACY_TABLE} INCLUDING DEFAULTS) PARTITION BY RANGE (created_at)')
+    execute(f'CREATE SEQUENCE {SEQUENCE} OWNED BY {HISTORY_TABLE}.id')
+    execute(f"ALTER TABLE {HISTORY_TABLE} ALTER COLUMN id SET DEFAULT nextval('{SEQUENCE}')")
+    if max_id is not None:
+        execute(f"SELECT setval('{SEQUENCE}', %s)", [max_id])
+    execute(f'ALTER TABLE {HISTORY_TABLE} ADD CONSTRAINT {HISTORY_TABLE}_pkey PRIMARY KEY (id, created_at)')
+
+    month = month_start(oldest or now)
+    last = add_months(month_start(now), MONTHS_AHEAD)
+    while month <= last:
+        execute(create_partition_sql(month))
+        month = add_months(month, 1)
+    execute(f'CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {HISTORY_TABLE} DEFAULT')
+
+    execute(f'INSERT INTO {HISTORY_TABLE} SELECT * FROM {LEGACY_TABLE}')
+    execute(f'DROP TABLE {LEGACY_TABLE}')
+
+    # Indexes created on the parent cascade to every partition, existing and future
+    for name, definition in indexes:
+        execute(definition)
+    for name, definition in foreign_keys:
+        execute(f'ALTER TABLE {HISTORY_TABLE} ADD CONSTRAINT {name} {definition}')
+    execute(f'ANALYZE {HISTORY_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0008_open_opportunity_indexes'),
+    ]
+
+    operations = [
+        # The partitioned table is a drop-in replacement, so there is nothing to undo
+        migrations.RunPython(partition_history, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='volunteerhistory',
+            index=models.Index(fields=['created_at'], name='profiles_vh_created_idx'),
+        ),
+    ]
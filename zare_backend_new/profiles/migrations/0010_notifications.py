@@ -0,0 +1,49 @@
+# Generated by Django 5.2.4 on 2026-10-19 16:45
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0009_partition_volunteer_history'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='volunteeropportunity',
+            name='notified_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        # Existing postings predate notifications; don't announce them all at once
+        migrations.RunSQL(
+            'UPDATE profiles_volunteeropportunity SET notified_at = now() WHERE notified_at IS NULL',
+            migrations.RunSQL.noop,
+        ),
+        migrations.AddIndex(
+            model_name='volunteeropportunity',
+            index=models.Index(condition=models.Q(('notified_at__isnull', True)), fields=['id'], name='profiles_vo_unnotified_idx'),
+        ),
+        migrations.CreateModel(
+            name='Notification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(default='new_opportunity', max_length=50)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('sending', 'Sending'), ('sent', 'Sent'), ('skipped', 'Skipped'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('attempts', models.IntegerField(default=0)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('claimed_at', models.DateTimeField(blank=True, null=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('opportunity', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to='profiles.volunteeropportunity')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('status__in', ['pending', 'sending'])), fields=['status', 'id'], name='profiles_notif_queue_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'opportunity', 'kind'), name='profiles_notification_once')],
+            },
+        ),
+    ]
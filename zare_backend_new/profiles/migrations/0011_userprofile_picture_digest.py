@@ -0,0 +1,31 @@
+# Generated by Django 5.2.4 on 2026-10-19 17:20
+
+from django.db import migrations, models
+
+from profiles.images import file_digest
+
+
+def backfill_picture_digests(apps, schema_editor):
+    UserProfile = apps.get_model('profiles', 'UserProfile')
+    for profile in UserProfile.objects.exclude(profile_picture='').exclude(profile_picture__isnull=True).iterator():
+        try:
+            profile.picture_digest = file_digest(profile.profile_picture)
+        except OSError:
+            continue
+        profile.save(update_fields=['picture_digest'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0010_notifications'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='picture_digest',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=64),
+        ),
+        migrations.RunPython(backfill_picture_digests, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+import django.contrib.postgres.indexes
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0012_idempotencyrecord'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OpportunityEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('opportunity_id', models.BigIntegerField()),
+                ('user_id', models.BigIntegerField(blank=True, null=True)),
+                ('kind', models.CharField(choices=[('view', 'View'), ('apply', 'Apply')], max_length=10)),
+                ('created_at', models.DateTimeField()),
+            ],
+            options={
+                'indexes': [django.contrib.postgres.indexes.BrinIndex(fields=['created_at'], name='profiles_oe_created_brin')],
+            },
+        ),
+        migrations.CreateModel(
+            name='OpportunityStats',
+            fields=[
+                ('opportunity', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='profiles.volunteeropportunity')),
+                ('views', models.BigIntegerField(default=0)),
+                ('applications', models.BigIntegerField(default=0)),
+                ('trend', models.FloatField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-trend'], name='profiles_os_trend_idx')],
+            },
+        ),
+    ]
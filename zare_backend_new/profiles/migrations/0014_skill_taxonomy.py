@@ -0,0 +1,93 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+from profiles.skills import display_name, normalize
+
+SKILL_FIELDS = (
+    ('UserProfile', ('volunteer_skills', 'volunteer_interests', 'certifications')),
+    ('VolunteerOpportunity', ('skills_required',)),
+    ('ArchivedVolunteerOpportunity', ('skills_required',)),
+)
+BATCH_SIZE = 1000
+
+
+def _rewrite(apps, convert):
+    for model_name, fields in SKILL_FIELDS:
+        model = apps.get_model('profiles', model_name)
+        batch = []
+        for row in model.objects.only('pk', *fields).iterator(chunk_size=BATCH_SIZE):
+            for field in fields:
+                converted = []
+                for value in getattr(row, field) or []:
+                    value = convert(value)
+                    if value is not None and value not in converted:
+                        converted.append(value)
+                setattr(row, field, converted)
+            batch.append(row)
+            if len(batch) >= BATCH_SIZE:
+                model.objects.bulk_update(batch, fields)
+                batch = []
+        if batch:
+            model.objects.bulk_update(batch, fields)
+
+
+def intern_skill_lists(apps, schema_editor):
+    """Free-text lists ("Teaching", "teaching ") become lists of canonical Skill ids"""
+    Skill = apps.get_model('profiles', 'Skill')
+    ids = {}
+
+    def skill_id(value):
+        if isinstance(value, int) and not isinstance(value, bool):
+            return value
+        if not isinstance(value, str) or not normalize(value):
+            return None
+        key = normalize(value)[:100]
+        if key not in ids:
+            skill, _ = Skill.objects.get_or_create(key=key, defaults={'name': display_name(value)[:100]})
+            ids[key] = skill.id
+        return ids[key]
+
+    _rewrite(apps, skill_id)
+
+
+def restore_skill_names(apps, schema_editor):
+    Skill = apps.get_model('profiles', 'Skill')
+    names = dict(Skill.objects.values_list('id', 'name'))
+    _rewrite(apps, lambda value: names.get(value, value if isinstance(value, str) else None))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0013_opportunity_events'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Skill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('key', models.CharField(editable=False, max_length=100, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='SkillAlias',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('alias', models.CharField(max_length=100)),
+                ('key', models.CharField(editable=False, max_length=100, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('skill', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='aliases', to='profiles.skill')),
+            ],
+            options={
+                'verbose_name_plural': 'skill aliases',
+            },
+        ),
+        migrations.RunPython(intern_skill_lists, restore_skill_names),
+    ]
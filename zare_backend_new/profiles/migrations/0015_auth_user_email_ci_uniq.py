@@ -0,0 +1,52 @@
+from django.db import migrations
+
+INDEX = 'auth_user_email_ci_uniq'
+
+
+def check_duplicate_emails(apps, schema_editor):
+    """The unique index cannot be built while duplicates exist; list them instead of failing obscurely"""
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT lower(email), array_agg(id ORDER BY id) FROM auth_user "
+            "WHERE email <> '' GROUP BY lower(email) HAVING count(*) > 1 ORDER BY 1 LIMIT 50"
+        )
+        duplicates = cursor.fetchall()
+    if duplicates:
+        listing = '\n'.join(f'  {email}: user ids {ids}' for email, ids in duplicates)
+        raise RuntimeError(
+            'These emails belong to more than one account. Merge the accounts or change '
+            f'their emails, then run migrate again:\n{listing}'
+        )
+
+
+def drop_invalid_index(apps, schema_editor):
+    """
+    A CREATE INDEX CONCURRENTLY that failed (e.g. on a duplicate) leaves an invalid index
+    behind, which IF NOT EXISTS would then skip; drop it so the build is retried.
+    """
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT NOT indisvalid FROM pg_index WHERE indexrelid = to_regclass(%s)', [INDEX]
+        )
+        row = cursor.fetchone()
+        if row and row[0]:
+            cursor.execute(f'DROP INDEX CONCURRENTLY {INDEX}')
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('profiles', '0014_skill_taxonomy'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_duplicate_emails, migrations.RunPython.noop),
+        migrations.RunPython(drop_invalid_index, migrations.RunPython.noop),
+        migrations.RunSQL(
+            f"CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS {INDEX} ON auth_user (lower(NULLIF(email, '')))",
+            f'DROP INDEX CONCURRENTLY IF EXISTS {INDEX}',
+        ),
+    ]
@@ -0,0 +1,67 @@
+from django.db import migrations
+
+CHANNEL = 'profile_changed'
+FUNCTION = 'profiles_notify_profile_change'
+# table -> column holding the user id
+TABLES = (
+    ('auth_user', 'id'),
+    ('profiles_userprofile', 'user_id'),
+    ('socialaccount_socialaccount', 'user_id'),
+)
+EVENTS = (
+    ('INSERT', 'NEW'),
+    ('UPDATE', 'NEW'),
+    ('DELETE', 'OLD'),
+)
+
+# Statement-level, so a bulk UPDATE sends one notification rather than one per row.
+# Payload: distinct user ids joined by commas, or "*" (drop everything) when it would
+# exceed NOTIFY's 8000-byte limit. Notifications are delivered on commit.
+CREATE_FUNCTION = f"""
+CREATE OR REPLACE FUNCTION {FUNCTION}() RETURNS trigger AS $$
+DECLARE
+    payload text;
+BEGIN
+    EXECUTE format('SELECT string_agg(DISTINCT %I::text, '','') FROM changed_rows', TG_ARGV[0]) INTO payload;
+    IF payload IS NOT NULL THEN
+        IF length(payload) > 7900 THEN
+            payload := '*';
+        END IF;
+        PERFORM pg_notify('{CHANNEL}', payload);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+
+def trigger_name(table, event):
+    return f'{table}_profile_notify_{event.lower()}'
+
+
+CREATE_TRIGGERS = [
+    f'CREATE TRIGGER {trigger_name(table, event)} AFTER {event} ON {table} '
+    f'REFERENCING {transition} TABLE AS changed_rows '
+    f"FOR EACH STATEMENT EXECUTE FUNCTION {FUNCTION}('{column}')"
+    for table, column in TABLES
+    for event, transition in EVENTS
+]
+DROP_TRIGGERS = [
+    f'DROP TRIGGER IF EXISTS {trigger_name(table, event)} ON {table}'
+    for table, column in TABLES
+    for event, transition in EVENTS
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('socialaccount', '0001_initial'),
+        ('profiles', '0015_auth_user_email_ci_uniq'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_FUNCTION, f'DROP FUNCTION IF EXISTS {FUNCTION}()'),
+        migrations.RunSQL(CREATE_TRIGGERS, DROP_TRIGGERS),
+    ]
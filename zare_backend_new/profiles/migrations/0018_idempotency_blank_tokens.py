@@ -0,0 +1,24 @@
+from django.db import migrations
+
+# Responses stored before tokens were blanked; replays look the token up again
+BLANK_TOKENS = """
+UPDATE profiles_idempotencyrecord
+SET response_body = jsonb_set(response_body, '{token}', 'null')
+WHERE jsonb_typeof(response_body) = 'object' AND response_body ? 'token'
+"""
+
+
+def blank_tokens(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(BLANK_TOKENS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0017_notification_retry_backoff'),
+    ]
+
+    operations = [
+        migrations.RunPython(blank_tokens, migrations.RunPython.noop),
+    ]
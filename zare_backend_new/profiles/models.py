@@ -1,9 +1,57 @@
 # zare_backend_new/models.py
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import User
+from django.contrib.postgres.indexes import BrinIndex, GinIndex
+from django.core.serializers.json import DjangoJSONEncoder
+from .availability import availability_to_mask
+from .images import file_digest
+from .skills import normalize
+from zare_backend_new.search import trigram_index
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 
+class Skill(models.Model):
+    """
+    Canonical skill, interest or certification. Profile and opportunity JSON lists hold
+    these ids; profiles.skills maps free text (names and aliases) onto them.
+    """
+    name = models.CharField(max_length=100, unique=True)
+    # profiles.skills.normalize(name): what input is matched against
+    key = models.CharField(max_length=100, unique=True, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['name']
+    
+    def save(self, *args, **kwargs):
+        self.key = normalize(self.name)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'name' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'key'}
+        super().save(*args, **kwargs)
+    
+    def __str__(self):
+        return self.name
+
+class SkillAlias(models.Model):
+    """Another spelling of a Skill ("tutoring" for "Teaching")"""
+    skill = models.ForeignKey(Skill, on_delete=models.CASCADE, related_name='aliases')
+    alias = models.CharField(max_length=100)
+    key = models.CharField(max_length=100, unique=True, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name_plural = 'skill aliases'
+    
+    def save(self, *args, **kwargs):
+        self.key = normalize(self.alias)
+        super().save(*args, **kwargs)
+    
+    def __str__(self):
+        return f"{self.alias} -> {self.skill.name}"
+
 class UserProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     
@@ -12,13 +60,18 @@ class UserProfile(models.Model):
     bio = models.TextField(max_length=500, blank=True)
     location = models.CharField(max_length=100, blank=True)
     profile_picture = models.ImageField(upload_to='profiles/', blank=True, null=True)
+    # SHA-256 of the picture's bytes; addresses its resized variants (profiles.images)
+    picture_digest = models.CharField(max_length=64, blank=True, editable=False, db_index=True)
     
     # Volunteer-specific data
-    volunteer_skills = models.JSONField(default=list, blank=True)  # ["teaching", "healthcare"]
-    volunteer_interests = models.JSONField(default=list, blank=True)  # ["education", "environment"]
+    volunteer_skills = models.JSONField(default=list, blank=True)  # Skill ids: [3, 17]
+    volunteer_interests = models.JSONField(default=list, blank=True)  # Skill ids
     availability = models.JSONField(default=dict, blank=True)  # {"weekdays": true, "weekends": false}
+    # Bitmap of availability (see profiles.availability), kept in sync by save() only:
+    # .update() and bulk_update() of availability must call sync_masks() afterwards
+    availability_mask = models.IntegerField(default=0, editable=False)
     volunteer_hours = models.IntegerField(default=0)  # Total hours volunteered
-    certifications = models.JSONField(default=list, blank=True)  # ["first_aid", "teaching_license"]
+    certifications = models.JSONField(default=list, blank=True)  # Skill ids
     
     # Preferences
     notification_preferences = models.JSONField(default=dict, blank=True)
@@ -28,9 +81,53 @@ class UserProfile(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at'], name='profiles_up_created_idx'),
+            trigram_index('phone', 'profiles_up_phone_trgm_idx'),
+            trigram_index('location', 'profiles_up_location_trgm_idx'),
+            # jsonb containment (@>) for organizer search
+            GinIndex(fields=['volunteer_skills'], opclasses=['jsonb_path_ops'], name='profiles_up_skills_gin_idx'),
+            GinIndex(fields=['volunteer_interests'], opclasses=['jsonb_path_ops'], name='profiles_up_interests_gin_idx'),
+            GinIndex(fields=['certifications'], opclasses=['jsonb_path_ops'], name='profiles_up_certs_gin_idx'),
+        ]
+    
     def __str__(self):
         return f"{self.user.username}'s Profile"
     
+    # Picture name the stored digest belongs to (set when loaded and after each save)
+    _digested_picture_name = None
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'profile_picture' in field_names:
+            instance._digested_picture_name = values[field_names.index('profile_picture')] or ''
+        return instance
+    
+    def _picture_digest_stale(self):
+        if 'profile_picture' in self.get_deferred_fields():
+            return False
+        name = self.profile_picture.name or ''
+        return name != self._digested_picture_name or bool(name and not self.picture_digest)
+    
+    def save(self, *args, **kwargs):
+        self.availability_mask = availability_to_mask(self.availability)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'availability' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'availability_mask'}
+        if self._picture_digest_stale():
+            try:
+                self.picture_digest = file_digest(self.profile_picture) if self.profile_picture else ''
+            except OSError:
+                # Missing file: no variants until a new picture is uploaded
+                self.picture_digest = ''
+            if update_fields is not None and 'profile_picture' in update_fields:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'picture_digest'}
+        super().save(*args, **kwargs)
+        if 'profile_picture' not in self.get_deferred_fields():
+            self._digested_picture_name = self.profile_picture.name or ''
+    
     @property
     def full_name(self):
         return f"{self.user.first_name} {self.user.last_name}".strip()
@@ -42,25 +139,77 @@ def create_user_profile(sender, instance, created, **kwargs):
         UserProfile.objects.create(user=instance)
 
 @receiver(post_save, sender=User)
-def save_user_profile(sender, instance, **kwargs):
+def save_user_profile(sender, instance, created, **kwargs):
+    if created:
+        # create_user_profile just inserted it
+        return
     try:
         instance.userprofile.save()
     except UserProfile.DoesNotExist:
         UserProfile.objects.create(user=instance)
 
+# VolunteerHistory statuses for applications that are still in flight
+OPEN_APPLICATION_STATUSES = ['applied', 'accepted', 'in_progress']
+
+class VolunteerOpportunityQuerySet(models.QuerySet):
+    def open(self):
+        """Postings still accepting volunteers: no deadline, or a deadline in the future"""
+        return self.filter(models.Q(deadline__isnull=True) | models.Q(deadline__gte=timezone.now()))
+
 class VolunteerOpportunity(models.Model):
     title = models.CharField(max_length=200)
     description = models.TextField()
     organization = models.CharField(max_length=200)
     location = models.CharField(max_length=200)
-    skills_required = models.JSONField(default=list)
+    skills_required = models.JSONField(default=list)  # Skill ids
     date_posted = models.DateTimeField(auto_now_add=True)
     deadline = models.DateTimeField(blank=True, null=True)
     hours_required = models.IntegerField(default=0)
+    schedule = models.JSONField(default=dict, blank=True)  # same format as UserProfile.availability
+    # Bitmap of schedule (see profiles.availability), kept in sync by save() only:
+    # .update() and bulk_update() of schedule must call sync_masks() afterwards
+    shift_mask = models.IntegerField(default=0, editable=False)
     created_by = models.ForeignKey(User, on_delete=models.CASCADE)
+    updated_at = models.DateTimeField(auto_now=True)
+    # Set once send_notifications has queued the "new opportunity" emails
+    notified_at = models.DateTimeField(blank=True, null=True, editable=False)
+    
+    objects = VolunteerOpportunityQuerySet.as_manager()
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['-date_posted'], name='profiles_vo_posted_idx'),
+            # Max(updated_at) for the listing's conditional GET
+            models.Index(fields=['updated_at'], name='profiles_vo_updated_idx'),
+            trigram_index('title', 'profiles_vo_title_trgm_idx'),
+            # open(): the two halves of "no deadline OR deadline >= now()", also used by the archiver
+            models.Index(
+                fields=['-date_posted'],
+                name='profiles_vo_open_ended_idx',
+                condition=models.Q(deadline__isnull=True),
+            ),
+            models.Index(
+                fields=['deadline'],
+                name='profiles_vo_deadline_idx',
+                condition=models.Q(deadline__isnull=False),
+            ),
+            # Postings still waiting for their notification fan-out
+            models.Index(
+                fields=['id'],
+                name='profiles_vo_unnotified_idx',
+                condition=models.Q(notified_at__isnull=True),
+            ),
+        ]
     
     def __str__(self):
         return self.title
+    
+    def save(self, *args, **kwargs):
+        self.shift_mask = availability_to_mask(self.schedule)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'schedule' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'shift_mask'}
+        super().save(*args, **kwargs)
 
 class VolunteerHistory(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -78,6 +227,184 @@ class VolunteerHistory(models.Model):
     feedback = models.TextField(blank=True)
     rating = models.IntegerField(blank=True, null=True)  # 1-5 rating
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        # The table is range-partitioned by month on created_at (migration 0009, profiles.partitions);
+        # filter on created_at where possible so Postgres can skip partitions.
+        indexes = [
+            models.Index(fields=['created_at'], name='profiles_vh_created_idx'),
+            models.Index(fields=['user', '-created_at'], name='profiles_vh_user_created_idx'),
+            # Duplicate-application check in apply_for_opportunity
+            models.Index(fields=['user', 'opportunity'], name='profiles_vh_user_opp_idx'),
+            # Applications still in flight, per opportunity; settled rows are never looked up this way
+            models.Index(
+                fields=['opportunity', 'status'],
+                name='profiles_vh_open_idx',
+                condition=models.Q(status__in=OPEN_APPLICATION_STATUSES),
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.user.username} - {self.opportunity.title}"
+
+class Notification(models.Model):
+    """One queued email, written by the fan-out and delivered by send_notifications"""
+    PENDING = 'pending'
+    SENDING = 'sending'
+    SENT = 'sent'
+    SKIPPED = 'skipped'
+    FAILED = 'failed'
+    NEW_OPPORTUNITY = 'new_opportunity'
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications')
+    opportunity = models.ForeignKey(VolunteerOpportunity, on_delete=models.CASCADE, related_name='notifications')
+    kind = models.CharField(max_length=50, choices=[
+        (NEW_OPPORTUNITY, 'New opportunity'),
+    ], default=NEW_OPPORTUNITY)
+    status = models.CharField(max_length=20, choices=[
+        (PENDING, 'Pending'),
+        (SENDING, 'Sending'),
+        (SENT, 'Sent'),
+        (SKIPPED, 'Skipped'),
+        (FAILED, 'Failed'),
+    ], default=PENDING)
+    attempts = models.IntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    claimed_at = models.DateTimeField(blank=True, null=True)
+    # A failed send stays pending but is not claimed again before this (exponential backoff)
+    next_attempt_at = models.DateTimeField(blank=True, null=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+    
+    class Meta:
+        constraints = [
+            # Re-running a fan-out never queues the same email twice
+            models.UniqueConstraint(fields=['user', 'opportunity', 'kind'], name='profiles_notification_once'),
+        ]
+        indexes = [
+            # The worker's queue: pending and in-flight rows only, in id order
+            models.Index(
+                fields=['status', 'id'],
+                name='profiles_notif_queue_idx',
+                condition=models.Q(status__in=['pending', 'sending']),
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.kind} for {self.user.username} ({self.status})"
+
+class OpportunityEvent(models.Model):
+    """
+    Append-only view/apply log, written in bulk by profiles.events. Plain ids instead of
+    foreign keys keep inserts cheap and let events outlive archived opportunities.
+    """
+    VIEW = 'view'
+    APPLY = 'apply'
+    
+    opportunity_id = models.BigIntegerField()
+    user_id = models.BigIntegerField(blank=True, null=True)
+    kind = models.CharField(max_length=10, choices=[(VIEW, 'View'), (APPLY, 'Apply')])
+    created_at = models.DateTimeField()
+    
+    class Meta:
+        indexes = [
+            # Rows arrive in created_at order, so a BRIN index stays tiny
+            BrinIndex(fields=['created_at'], name='profiles_oe_created_brin'),
+        ]
+    
+    def __str__(self):
+        return f"{self.kind} of {self.opportunity_id}"
+
+class OpportunityStats(models.Model):
+    """Per-opportunity counters, incremented by each profiles.events flush"""
+    opportunity = models.OneToOneField(
+        VolunteerOpportunity, on_delete=models.CASCADE, primary_key=True, related_name='stats'
+    )
+    views = models.BigIntegerField(default=0)
+    applications = models.BigIntegerField(default=0)
+    # log of the forward-decayed activity (profiles.events.TREND_EPOCH); ordering by it
+    # ranks by recent activity without recomputing anything at read time
+    trend = models.FloatField(default=0)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['-trend'], name='profiles_os_trend_idx'),
+        ]
+    
+    @property
+    def conversion_rate(self):
+        return self.applications / self.views if self.views else 0.0
+    
+    def __str__(self):
+        return f"{self.opportunity_id}: {self.views} views, {self.applications} applications"
+
+class ArchivedVolunteerOpportunity(models.Model):
+    """Expired opportunity moved out of the hot table by archive_opportunities (keeps its id)"""
+    id = models.BigIntegerField(primary_key=True)
+    title = models.CharField(max_length=200)
+    description = models.TextField()
+    organization = models.CharField(max_length=200)
+    location = models.CharField(max_length=200)
+    skills_required = models.JSONField(default=list)
+    date_posted = models.DateTimeField()
+    deadline = models.DateTimeField(blank=True, null=True)
+    hours_required = models.IntegerField(default=0)
+    schedule = models.JSONField(default=dict, blank=True)
+    shift_mask = models.IntegerField(default=0)
+    created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_opportunities')
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['-date_posted'], name='profiles_avo_posted_idx'),
+        ]
+    
+    def __str__(self):
+        return self.title
+
+class ArchivedVolunteerHistory(models.Model):
+    """Settled VolunteerHistory of an archived opportunity (keeps its id)"""
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_volunteer_history')
+    opportunity = models.ForeignKey(ArchivedVolunteerOpportunity, on_delete=models.CASCADE, related_name='history')
+    hours_contributed = models.IntegerField(default=0)
+    start_date = models.DateTimeField()
+    end_date = models.DateTimeField(blank=True, null=True)
+    status = models.CharField(max_length=50, choices=VolunteerHistory._meta.get_field('status').choices)
+    feedback = models.TextField(blank=True)
+    rating = models.IntegerField(blank=True, null=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='profiles_avh_user_created_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.user.username} - {self.opportunity.title}"
+
+class IdempotencyRecord(models.Model):
+    """Stored response of a POST sent with an Idempotency-Key (profiles.idempotency)"""
+    owner = models.CharField(max_length=64)
+    path = models.CharField(max_length=255)
+    key = models.CharField(max_length=255)
+    request_hash = models.CharField(max_length=64)
+    status_code = models.IntegerField()
+    response_body = models.JSONField(encoder=DjangoJSONEncoder, blank=True, null=True)
+    created_at = models.DateTimeField()
+    expires_at = models.DateTimeField()
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['owner', 'path', 'key'], name='profiles_idempotency_key_once'),
+        ]
+        indexes = [
+            models.Index(fields=['expires_at'], name='profiles_idem_expires_idx'),
+        ]
     
     def __str__(self):
-        return f"{self.user.username} - {self.opportunity.title}"
\ No newline at end of file
+        return f"{self.owner} {self.path} {self.key}"
@@ -0,0 +1,260 @@
+# profiles/notifications.py
+"""
+"New opportunity" email fan-out.
+
+Creating an opportunity only saves it with ``notified_at`` unset; the request never
+waits on recipients. The ``send_notifications`` worker then:
+
+1. fans out: walks the matching volunteers in user_id order (keyset batches of
+   ``NOTIFICATION_FANOUT_BATCH_SIZE``) and bulk-inserts one Notification per volunteer,
+   each batch in its own short transaction, and
+2. delivers: claims pending rows with FOR UPDATE SKIP LOCKED and sends them from a
+   thread pool in which every thread keeps its SMTP connection open across batches.
+
+A failed send goes back to pending with ``next_attempt_at`` pushed out exponentially
+(``NOTIFICATION_RETRY_BASE_SECONDS`` doubled per attempt) until it reaches
+``NOTIFICATION_MAX_ATTEMPTS``. Re-running a fan-out is harmless (a unique constraint
+drops duplicates), and several workers can run side by side.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Notification, UserProfile, VolunteerOpportunity
+
+logger = logging.getLogger(__name__)
+
+# notification_preferences key -> default when the volunteer never chose
+PREFERENCE_DEFAULTS = {
+    'new_opportunities': True,
+}
+# Rows left in "sending" by a worker that died are retried after this long
+STALE_CLAIM = timedelta(minutes=10)
+
+
+def wants(preferences, key):
+    return bool((preferences or {}).get(key, PREFERENCE_DEFAULTS[key]))
+
+
+def matching_volunteers(opportunity):
+    """Active volunteers whose skills or interests include one of the posting's skills_required"""
+    skill_ids = [skill_id for skill_id in opportunity.skills_required or [] if isinstance(skill_id, int)]
+    if not skill_ids:
+        return UserProfile.objects.none()
+    match = Q()
+    for skill_id in skill_ids:
+        # Single-element containment, served by the jsonb_path_ops GIN indexes
+        match |= Q(volunteer_skills__contains=[skill_id]) | Q(volunteer_interests__contains=[skill_id])
+    return UserProfile.objects.filter(match, user__is_active=True).exclude(
+        user__email=''
+    ).exclude(
+        user_id=opportunity.created_by_id
+    ).exclude(notification_preferences__contains={'new_opportunities': False})
+
+
+def fan_out(opportunity, batch_size=None):
+    """Queue a notification for every matching volunteer; returns how many were considered"""
+    batch_size = batch_size or settings.NOTIFICATION_FANOUT_BATCH_SIZE
+    recipients = matching_volunteers(opportunity).order_by('user_id').values_list('user_id', flat=True)
+    last_user_id = 0
+    queued = 0
+    while True:
+        user_ids = list(recipients.filter(user_id__gt=last_user_id)[:batch_size])
+        if not user_ids:
+            break
+        Notification.objects.bulk_create(
+            [Notification(user_id=user_id, opportunity=opportunity) for user_id in user_ids],
+            ignore_conflicts=True,
+        )
+        queued += len(user_ids)
+        last_user_id = user_ids[-1]
+    return queued
+
+
+def fan_out_pending(log=None):
+    """Fan out every opportunity that has not been announced yet; returns how many"""
+    log = log or (lambda message: None)
+    count = 0
+    while True:
+        opportunity = VolunteerOpportunity.objects.filter(notified_at__isnull=True).order_by('id').first()
+        if opportunity is None:
+            return count
+        if opportunity.deadline and opportunity.deadline < timezone.now():
+            queued = 0
+        else:
+            queued = fan_out(opportunity)
+        VolunteerOpportunity.objects.filter(id=opportunity.id).update(notified_at=timezone.now())
+        log(f'Queued {queued} notifications for opportunity {opportunity.id}')
+        count += 1
+
+
+def retry_delay(attempts):
+    return timedelta(seconds=settings.NOTIFICATION_RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+
+
+def claim_batch(batch_size):
+    now = timezone.now()
+    due = Q(next_attempt_at__isnull=True) | Q(next_attempt_at__lte=now)
+    with transaction.atomic():
+        ids = list(
+            Notification.objects.filter(
+                Q(due, status=Notification.PENDING) | Q(status=Notification.SENDING, claimed_at__lt=now - STALE_CLAIM)
+            ).order_by('id').select_for_update(skip_locked=True).values_list('id', flat=True)[:batch_size]
+        )
+        Notification.objects.filter(id__in=ids).update(
+            status=Notification.SENDING, claimed_at=timezone.now(), attempts=F('attempts') + 1
+        )
+    return list(
+        Notification.objects.filter(id__in=ids).select_related('user__userprofile', 'opportunity').order_by('id')
+    )
+
+
+def build_message(notification):
+    opportunity = notification.opportunity
+    lines = [
+        f'{opportunity.organization} posted "{opportunity.title}" in {opportunity.location}.',
+        '',
+        opportunity.description,
+    ]
+    if opportunity.deadline:
+        lines += ['', f'Apply by {opportunity.deadline:%B %d, %Y}.']
+    lines += [
+        '',
+        'You are receiving this because it matches your volunteer skills or interests. '
+        'Turn off "new_opportunities" in your notification preferences to stop these emails.',
+    ]
+    return EmailMessage(
+        subject=f'New volunteer opportunity: {opportunity.title}',
+        body='\n'.join(lines),
+        to=[notification.user.email],
+    )
+
+
+class SMTPWorkerPool:
+    """Thread pool whose threads each keep one open email connection across batches"""
+
+    def __init__(self, workers):
+        self.workers = workers
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='notification-smtp')
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = set()
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = get_connection()
+            connection.open()
+            self._local.connection = connection
+            with self._lock:
+                self._connections.add(connection)
+        return connection
+
+    def _discard_connection(self):
+        connection = getattr(self._local, 'connection', None)
+        self._local.connection = None
+        if connection is not None:
+            with self._lock:
+                self._connections.discard(connection)
+            try:
+                connection.close()
+            except Exception:
+                pass
+
+    def _send_chunk(self, messages):
+        errors = []
+        for message in messages:
+            try:
+                self._connection().send_messages([message])
+                errors.append(None)
+            except Exception as e:
+                # Reconnect for the next message: the server may have dropped us
+                self._discard_connection()
+                errors.append(str(e) or e.__class__.__name__)
+        return errors
+
+    def send(self, messages):
+        """Send ``messages`` across the pool; returns an error string (or None) per message"""
+        chunks = [messages[start::self.workers] for start in range(self.workers)]
+        futures = [self.executor.submit(self._send_chunk, chunk) for chunk in chunks if chunk]
+        errors = [None] * len(messages)
+        for start, future in enumerate(futures):
+            for offset, error in enumerate(future.result()):
+                errors[start + offset * self.workers] = error
+        return errors
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        for connection in list(self._connections):
+            try:
+                connection.close()
+            except Exception:
+                pass
+        self._connections.clear()
+
+
+def deliver_batch(pool, batch_size=None):
+    """Claim and send one batch; returns the number of notifications claimed"""
+    notifications = claim_batch(batch_size or settings.NOTIFICATION_BATCH_SIZE)
+    if not notifications:
+        return 0
+
+    to_send, skipped = [], []
+    for notification in notifications:
+        user = notification.user
+        try:
+            preferences = user.userprofile.notification_preferences
+        except UserProfile.DoesNotExist:
+            preferences = {}
+        # Preferences may have changed since the fan-out
+        if user.is_active and user.email and wants(preferences, 'new_opportunities'):
+            to_send.append(notification)
+        else:
+            skipped.append(notification.id)
+
+    errors = pool.send([build_message(notification) for notification in to_send])
+    now = timezone.now()
+    sent, failed = [], []
+    for notification, error in zip(to_send, errors):
+        if error is None:
+            sent.append(notification.id)
+            continue
+        notification.last_error = error
+        if notification.attempts >= settings.NOTIFICATION_MAX_ATTEMPTS:
+            notification.status = Notification.FAILED
+        else:
+            notification.status = Notification.PENDING
+            notification.next_attempt_at = now + retry_delay(notification.attempts)
+        failed.append(notification)
+        logger.warning('Notification %s failed (attempt %s): %s', notification.id, notification.attempts, error)
+
+    Notification.objects.filter(id__in=sent).update(status=Notification.SENT, sent_at=now, last_error='')
+    Notification.objects.filter(id__in=skipped).update(status=Notification.SKIPPED)
+    Notification.objects.bulk_update(failed, ['status', 'last_error', 'next_attempt_at'])
+    return len(notifications)
+
+
+def run_worker(workers=None, batch_size=None, once=False, poll_interval=5, log=None):
+    """Fan out and deliver until stopped, or until the queue is empty with ``once``"""
+    log = log or (lambda message: None)
+    pool = SMTPWorkerPool(workers or settings.NOTIFICATION_WORKERS)
+    try:
+        while True:
+            announced = fan_out_pending(log)
+            delivered = deliver_batch(pool, batch_size)
+            if delivered:
+                log(f'Processed {delivered} notifications')
+            if not announced and not delivered:
+                if once:
+                    return
+                time.sleep(poll_interval)
+    finally:
+        pool.close()
@@ -0,0 +1,22 @@
+# profiles/pagination.py
+from rest_framework.pagination import CursorPagination
+
+
+class NewestProfilesCursorPagination(CursorPagination):
+    """Stable keyset pages over profiles, served by profiles_up_created_idx"""
+    ordering = '-created_at'
+    page_size = 25
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class ArchivedOpportunitiesCursorPagination(CursorPagination):
+    """
+    Pages of archived_opportunities on the opportunity listing, served by
+    profiles_avo_posted_idx. Own query parameters, since the listing itself is not paged.
+    """
+    ordering = ('-date_posted', '-id')
+    page_size = 50
+    page_size_query_param = 'archived_page_size'
+    max_page_size = 200
+    cursor_query_param = 'archived_cursor'
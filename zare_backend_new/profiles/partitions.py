@@ -0,0 +1,141 @@
+# profiles/partitions.py
+"""
+Monthly range partitions of profiles_volunteerhistory on created_at.
+
+Partitions are named ``profiles_volunteerhistory_pYYYYMM`` and cover one UTC month;
+``profiles_volunteerhistory_pdefault`` catches rows outside every monthly range so an
+insert never fails because the partition job fell behind. Creating a month whose rows
+already landed in the default moves them into the new partition (see create_partition).
+Kept free of model imports so migrations can use it.
+"""
+import re
+from datetime import date, datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import connection as default_connection, transaction
+
+HISTORY_TABLE = 'profiles_volunteerhistory'
+DEFAULT_PARTITION = f'{HISTORY_TABLE}_pdefault'
+PARTITION_RE = re.compile(rf'^{HISTORY_TABLE}_p(\d{{4}})(\d{{2}})$')
+
+
+def month_start(value):
+    return date(value.year, value.month, 1)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f'{HISTORY_TABLE}_p{month:%Y%m}'
+
+
+def _bound(month):
+    return datetime(month.year, month.month, 1, tzinfo=dt_timezone.utc).isoformat()
+
+
+def create_partition_sql(month):
+    return (
+        f'CREATE TABLE IF NOT EXISTS {partition_name(month)} PARTITION OF {HISTORY_TABLE} '
+        f"FOR VALUES FROM ('{_bound(month)}') TO ('{_bound(add_months(month, 1))}')"
+    )
+
+
+def create_partition(month, connection=None):
+    """
+    Create the partition for ``month``. Postgres refuses to create it while the default
+    partition holds rows of that month, so in that case the default is detached, the
+    new partition created, the rows moved into it and the default re-attached, all in
+    one transaction. That holds an exclusive lock on the parent until it commits.
+    """
+    connection = connection or default_connection
+    lower, upper = _bound(month), _bound(add_months(month, 1))
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE created_at >= %s AND created_at < %s)',
+            [lower, upper],
+        )
+        if not cursor.fetchone()[0]:
+            cursor.execute(create_partition_sql(month))
+            return
+        cursor.execute(f'ALTER TABLE {HISTORY_TABLE} DETACH PARTITION {DEFAULT_PARTITION}')
+        cursor.execute(create_partition_sql(month))
+        cursor.execute(
+            f'WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE created_at >= %s AND created_at < %s '
+            f'RETURNING *) INSERT INTO {HISTORY_TABLE} SELECT * FROM moved',
+            [lower, upper],
+        )
+        cursor.execute(f'ALTER TABLE {HISTORY_TABLE} ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT')
+
+
+def is_partitioned(connection=None):
+    connection = connection or default_connection
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", [HISTORY_TABLE])
+        row = cursor.fetchone()
+    return bool(row) and row[0] == 'p'
+
+
+def list_partitions(connection=None):
+    """[(month, name, estimated rows)] of attached monthly partitions, oldest first"""
+    connection = connection or default_connection
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT child.relname, GREATEST(child.reltuples, 0)::bigint
+            FROM pg_inherits
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE pg_inherits.inhparent = %s::regclass
+            """,
+            [HISTORY_TABLE],
+        )
+        rows = cursor.fetchall()
+    partitions = []
+    for name, estimate in rows:
+        match = PARTITION_RE.match(name)
+        if match:
+            partitions.append((date(int(match[1]), int(match[2]), 1), name, estimate))
+    return sorted(partitions)
+
+
+def ensure_partitions(months_ahead=None, since=None, connection=None):
+    """Create any missing monthly partitions from ``since`` (default: this month) through ``months_ahead``"""
+    connection = connection or default_connection
+    if months_ahead is None:
+        months_ahead = settings.HISTORY_PARTITION_MONTHS_AHEAD
+    first = month_start(since or datetime.now(dt_timezone.utc))
+    last = add_months(month_start(datetime.now(dt_timezone.utc)), months_ahead)
+    existing = {name for month, name, estimate in list_partitions(connection)}
+    created = []
+    month = first
+    while month <= last:
+        if partition_name(month) not in existing:
+            create_partition(month, connection)
+            created.append(partition_name(month))
+        month = add_months(month, 1)
+    return created
+
+
+def detach_partitions(before, drop=False, connection=None):
+    """
+    Detach the monthly partitions that end on or before ``before`` (a date) and,
+    with ``drop``, delete them. Detached tables keep their data for dumping or
+    re-attaching. Each DETACH briefly locks the parent table (CONCURRENTLY is not
+    available while a default partition exists), so run it off-peak.
+    """
+    connection = connection or default_connection
+    cutoff = month_start(before)
+    removed = []
+    for month, name, estimate in list_partitions(connection):
+        if add_months(month, 1) > cutoff:
+            break
+        with connection.cursor() as cursor:
+            cursor.execute(f'ALTER TABLE {HISTORY_TABLE} DETACH PARTITION {name}')
+            if drop:
+                cursor.execute(f'DROP TABLE {name}')
+        removed.append(name)
+    return removed
@@ -0,0 +1,17 @@
+# profiles/permissions.py
+from django.conf import settings
+from rest_framework.permissions import BasePermission
+
+
+def is_organizer(user):
+    """Staff, or members of the ORGANIZER_GROUP group"""
+    if not user or not user.is_authenticated:
+        return False
+    return user.is_staff or user.groups.filter(name=settings.ORGANIZER_GROUP).exists()
+
+
+class IsOrganizer(BasePermission):
+    message = 'Organizer access required'
+
+    def has_permission(self, request, view):
+        return is_organizer(request.user)
@@ -0,0 +1,207 @@
+# profiles/profile_cache.py
+"""
+Per-process cache of assembled profiles: the UserProfile row with its User and the
+providers of the user's SocialAccounts, read in one query.
+
+Invalidation comes from Postgres: statement-level triggers on auth_user,
+profiles_userprofile and socialaccount_socialaccount (migration 0016) NOTIFY the ids
+of the affected users on ``profile_changed`` when the writing transaction commits, so
+ORM saves, bulk updates and raw SQL all reach every worker within milliseconds. Each
+process listens on its own connection (outside the pool) in a daemon thread. ORM saves
+and deletes also drop the user locally once their transaction commits, so the writing
+process reads its own change even before the notification arrives.
+
+The cache only serves while that connection is listening. When it drops, the cache
+is cleared and lookups read the database until LISTEN is re-established. Lookups
+always read the primary, so a lagging replica cannot refill an entry with old rows,
+and a read that raced with a notification is not stored. Callers get their own copy
+and may modify it.
+"""
+import copy
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from allauth.socialaccount.models import SocialAccount
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.postgres.expressions import ArraySubquery
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import OuterRef
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import UserProfile
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'profile_changed'
+MAX_RECONNECT_DELAY_SECONDS = 30
+
+
+def load_profile(user_id):
+    """UserProfile with ``user`` and ``social_providers`` attached, from the primary"""
+    providers = SocialAccount.objects.filter(user_id=OuterRef('user_id')).order_by('provider').values('provider')
+    return (
+        UserProfile.objects.using(DEFAULT_DB_ALIAS)
+        .select_related('user')
+        .annotate(social_providers=ArraySubquery(providers))
+        .filter(user_id=user_id)
+        .first()
+    )
+
+
+class ProfileCache:
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        # user id -> token of the lookup in flight; invalidation removes it
+        self._pending = {}
+        self._listening = False
+        self._thread = None
+        self._pid = None
+        self.hits = 0
+        self.misses = 0
+        self.bypasses = 0
+        self.invalidations = 0
+        self.evictions = 0
+        self.reconnects = 0
+
+    def get(self, user_id):
+        """Copy of the user's assembled profile, or None when there is none"""
+        self._ensure_listener()
+        with self._lock:
+            profile = self._entries.get(user_id)
+            if profile is not None:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return copy.deepcopy(profile)
+            if not self._listening:
+                self.bypasses += 1
+                token = None
+            else:
+                self.misses += 1
+                token = self._pending[user_id] = object()
+
+        profile = load_profile(user_id)
+        if profile is None or token is None:
+            return profile
+        with self._lock:
+            if self._pending.get(user_id) is token:
+                del self._pending[user_id]
+                self._entries[user_id] = copy.deepcopy(profile)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return profile
+
+    def invalidate(self, user_ids=None):
+        """Drop the given users, or everything with None"""
+        with self._lock:
+            if user_ids is None:
+                self.invalidations += len(self._entries)
+                self._entries.clear()
+                self._pending.clear()
+                return
+            for user_id in user_ids:
+                self._pending.pop(user_id, None)
+                if self._entries.pop(user_id, None) is not None:
+                    self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses + self.bypasses
+            return {
+                'pid': os.getpid(),
+                'listening': self._listening,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'bypasses': self.bypasses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else None,
+                'invalidations': self.invalidations,
+                'evictions': self.evictions,
+                'reconnects': self.reconnects,
+            }
+
+    def _set_listening(self, listening):
+        with self._lock:
+            self._listening = listening
+            self._entries.clear()
+            self._pending.clear()
+
+    def _handle(self, payload):
+        if payload == '*':
+            self.invalidate()
+            return
+        self.invalidate(int(user_id) for user_id in payload.split(',') if user_id.isdigit())
+
+    def _ensure_listener(self):
+        # The listener starts on first use, i.e. in the worker process after any fork
+        if self._pid == os.getpid() or connections[DEFAULT_DB_ALIAS].vendor != 'postgresql':
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._listening = False
+            self._entries.clear()
+            self._pending.clear()
+            self._thread = threading.Thread(target=self._listen, name='profile-cache-listener', daemon=True)
+            self._thread.start()
+
+    def _listen(self):
+        import psycopg
+
+        params = connections[DEFAULT_DB_ALIAS].get_connection_params()
+        delay = 1
+        while True:
+            try:
+                with psycopg.connect(**params, autocommit=True) as conn:
+                    conn.execute(f'LISTEN {CHANNEL}')
+                    self._set_listening(True)
+                    delay = 1
+                    while True:
+                        for notify in conn.notifies(timeout=settings.PROFILE_CACHE_HEALTHCHECK_SECONDS):
+                            self._handle(notify.payload)
+                        # No traffic for a while: make sure the connection is still alive
+                        conn.execute('SELECT 1')
+            except Exception:
+                logger.warning('Profile cache listener disconnected; retrying in %ss', delay, exc_info=True)
+            self._set_listening(False)
+            with self._lock:
+                self.reconnects += 1
+            time.sleep(delay)
+            delay = min(delay * 2, MAX_RECONNECT_DELAY_SECONDS)
+
+
+cache = ProfileCache(settings.PROFILE_CACHE_MAX_ENTRIES)
+
+
+def get_profile(user):
+    """The user's profile (with .user and .social_providers), served from the cache when possible"""
+    if not settings.PROFILE_CACHE_ENABLED:
+        return load_profile(user.pk)
+    return cache.get(user.pk)
+
+
+def _invalidate_on_commit(user_id, using):
+    transaction.on_commit(lambda: cache.invalidate([user_id]), using=using)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def _user_changed(sender, instance, using, **kwargs):
+    _invalidate_on_commit(instance.pk, using)
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+@receiver(post_save, sender=SocialAccount)
+@receiver(post_delete, sender=SocialAccount)
+def _profile_changed(sender, instance, using, **kwargs):
+    _invalidate_on_commit(instance.user_id, using)
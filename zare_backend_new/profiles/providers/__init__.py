@@ -0,0 +1,27 @@
+# profiles/providers/__init__.py
+"""
+Social login providers, imported on first use.
+
+``social_login`` looks handlers up here instead of importing every provider (and the
+HTTP client they share) when a worker boots. Each entry is the dotted path of
+``authenticate(access_token, user_data)``, which returns ``{'success': True, 'user',
+'is_new_user', 'provider_data'}`` or ``{'success': False, 'error', 'code'}``.
+"""
+from functools import lru_cache
+
+from django.utils.module_loading import import_string
+
+PROVIDERS = {
+    'google': 'profiles.providers.google.authenticate',
+    'facebook': 'profiles.providers.facebook.authenticate',
+    'apple': 'profiles.providers.apple.authenticate',
+}
+
+
+def is_supported(name):
+    return name in PROVIDERS
+
+
+@lru_cache(maxsize=None)
+def get_handler(name):
+    return import_string(PROVIDERS[name])
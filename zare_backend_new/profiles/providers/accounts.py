@@ -0,0 +1,141 @@
+# profiles/providers/accounts.py
+"""
+User resolution shared by every social login provider.
+
+A returning user costs at most ``RETURNING_USER_QUERIES`` queries: one joined read
+of the social account with its user, profile and token, one ``INSERT ... ON CONFLICT``
+upsert of the account's extra_data, and, only when the provider fills in a name the
+user is missing, one UPDATE. First logins run in the same transaction, serialized per
+(provider, uid) by an advisory lock so two concurrent first logins cannot create two
+users.
+"""
+import hashlib
+
+from django.contrib.auth.models import User
+from django.db import IntegrityError, connection, transaction
+from allauth.socialaccount.models import SocialAccount
+from rest_framework.authtoken.models import Token
+from zare_backend_new.auth_backends import get_user_by_email
+
+from ..models import UserProfile
+
+RETURNING_USER_QUERIES = 3
+USERNAME_ATTEMPTS = 3
+
+
+def _lock_first_login(provider, uid):
+    digest = hashlib.sha256(f'social:{provider}:{uid}'.encode()).digest()
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_advisory_xact_lock(%s)', [int.from_bytes(digest[:8], 'big', signed=True)])
+
+
+def _available_username(base):
+    """``base``, or ``base`` plus the first free counter, in one query"""
+    base = base[:140] or 'user'
+    taken = set(User.objects.filter(username__startswith=base).values_list('username', flat=True))
+    username, counter = base, 1
+    while username in taken:
+        username = f"{base}{counter}"
+        counter += 1
+    return username
+
+
+def _create_user(username_base, email, first_name, last_name):
+    for attempt in range(USERNAME_ATTEMPTS):
+        username = _available_username(username_base)
+        try:
+            with transaction.atomic():
+                return User.objects.create_user(
+                    username=username,
+                    # Providers without an email get a placeholder, as before
+                    email=email or f"{username}@example.com",
+                    first_name=first_name,
+                    last_name=last_name,
+                )
+        except IntegrityError:
+            # Pick again only if a concurrent signup took the username (not the email)
+            if attempt == USERNAME_ATTEMPTS - 1 or not User.objects.filter(username=username).exists():
+                raise
+
+
+def _fill_names(user, first_name, last_name):
+    """Set names the user is missing; bumps the profile's updated_at so its ETag changes"""
+    names = {}
+    if not user.first_name and first_name:
+        names['first_name'] = user.first_name = first_name
+    if not user.last_name and last_name:
+        names['last_name'] = user.last_name = last_name
+    if not names:
+        return
+    assignments = ', '.join(f'{connection.ops.quote_name(column)} = %s' for column in names)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'WITH renamed AS (UPDATE auth_user SET {assignments} WHERE id = %s RETURNING id) '
+            f'UPDATE {UserProfile._meta.db_table} SET updated_at = now() '
+            f'WHERE user_id IN (SELECT id FROM renamed)',
+            [*names.values(), user.pk],
+        )
+
+
+def _upsert_social_account(user, provider, uid, extra_data):
+    SocialAccount.objects.bulk_create(
+        [SocialAccount(user=user, provider=provider, uid=uid, extra_data=extra_data)],
+        update_conflicts=True,
+        unique_fields=['provider', 'uid'],
+        update_fields=['extra_data', 'last_login'],
+    )
+
+
+def _ensure_profile_and_token(user):
+    if not hasattr(user, 'userprofile'):
+        UserProfile.objects.bulk_create([UserProfile(user=user)], ignore_conflicts=True)
+    if not hasattr(user, 'auth_token'):
+        token = Token(user=user)
+        token.key = token.generate_key()
+        Token.objects.bulk_create([token], ignore_conflicts=True)
+
+
+def resolve_user(provider, uid, extra_data, email=None, match_email=True,
+                 username=None, first_name='', last_name=''):
+    """
+    Find or create the user for a verified provider identity. ``email`` is None when the
+    provider gave none; ``match_email`` links to an existing account with that email.
+    Returns ``(user, is_new_user)``, with ``user.userprofile`` and ``user.auth_token`` loaded.
+    """
+    uid = str(uid)
+    with transaction.atomic():
+        account = SocialAccount.objects.select_related(
+            'user__userprofile', 'user__auth_token'
+        ).filter(provider=provider, uid=uid).first()
+
+        if account is not None and hasattr(account.user, 'userprofile') and hasattr(account.user, 'auth_token'):
+            # Returning user
+            user = account.user
+            _fill_names(user, first_name, last_name)
+            _upsert_social_account(user, provider, uid, extra_data)
+            return user, False
+
+        _lock_first_login(provider, uid)
+        account = SocialAccount.objects.select_related('user').filter(provider=provider, uid=uid).first()
+        is_new_user = False
+        if account is not None:
+            user = account.user
+        elif email and match_email:
+            user = get_user_by_email(email)
+        else:
+            user = None
+
+        if user is None:
+            try:
+                user = _create_user(username or (email or '').split('@')[0], email, first_name, last_name)
+                is_new_user = True
+            except IntegrityError:
+                # A concurrent signup registered the email first (case-insensitive unique index)
+                user = get_user_by_email(email) if email and match_email else None
+                if user is None:
+                    raise
+        else:
+            _fill_names(user, first_name, last_name)
+        _ensure_profile_and_token(user)
+        _upsert_social_account(user, provider, uid, extra_data)
+        return User.objects.select_related('userprofile', 'auth_token').get(pk=user.pk), is_new_user
@@ -0,0 +1,75 @@
+# profiles/providers/apple.py
+from django.conf import settings
+from .accounts import resolve_user
+from .jwks import InvalidIdToken, verify_id_token
+
+def authenticate(access_token, user_data):
+    """Handle Apple Sign In authentication"""
+    try:
+        # MOCK VERIFICATION (for testing, only with SOCIAL_LOGIN_ALLOW_MOCK_TOKENS)
+        if settings.SOCIAL_LOGIN_ALLOW_MOCK_TOKENS and access_token.startswith('mock'):
+            apple_id = user_data.get('id', 'apple_123')
+            email = user_data.get('email', 'test@icloud.com')
+            email_verified = True
+        else:
+            # Identity token: verified locally against Apple's cached keys
+            try:
+                claims = verify_id_token('apple', access_token)
+            except InvalidIdToken as e:
+                return {
+                    'success': False,
+                    'error': f'Invalid Apple ID token: {e}',
+                    'code': 'INVALID_TOKEN'
+                }
+            apple_id = claims.get('sub')
+            email = claims.get('email')
+            # Apple sends the flag as a string
+            email_verified = claims.get('email_verified') in (True, 'true')
+        
+        # Apple provides name info only on first sign-in, so we rely on user_data from client
+        first_name = user_data.get('first_name', '')
+        last_name = user_data.get('last_name', '')
+        
+        if not apple_id:
+            return {
+                'success': False,
+                'error': 'Apple ID not found in token',
+                'code': 'MISSING_APPLE_ID'
+            }
+        
+        # Only a verified email links to an existing account; without one the user gets a placeholder
+        user, is_new_user = resolve_user(
+            'apple', apple_id,
+            extra_data={
+                'sub': apple_id,
+                'email': email,
+                'first_name': first_name,
+                'last_name': last_name,
+                'email_verified': email_verified
+            },
+            email=email or None,
+            match_email=bool(email_verified),
+            username=None if email else f"apple_{apple_id[:8]}",
+            first_name=first_name,
+            last_name=last_name,
+        )
+        
+        return {
+            'success': True,
+            'user': user,
+            'is_new_user': is_new_user,
+            'provider_data': {'sub': apple_id, 'email': email}
+        }
+        
+    except ImportError:
+        return {
+            'success': False,
+            'error': 'PyJWT library not installed. Run: pip install PyJWT',
+            'code': 'MISSING_DEPENDENCY'
+        }
+    except Exception as e:
+        return {
+            'success': False,
+            'error': f'Apple authentication error: {str(e)}',
+            'code': 'APPLE_AUTH_ERROR'
+        }
@@ -0,0 +1,81 @@
+# profiles/providers/facebook.py
+from django.conf import settings
+from zare_backend_new.metrics import timer
+from .accounts import resolve_user
+from .http import TIMEOUT, get_session
+import requests
+
+def authenticate(access_token, user_data):
+    """Handle Facebook OAuth authentication"""
+    try:
+        # MOCK VERIFICATION (for testing, only with SOCIAL_LOGIN_ALLOW_MOCK_TOKENS)
+        if settings.SOCIAL_LOGIN_ALLOW_MOCK_TOKENS and access_token.startswith('mock_facebook'):
+            fb_user_info = {
+                'id': user_data.get('id', 'facebook_123'),
+                'email': user_data.get('email', 'test@facebook.com'),
+                'first_name': user_data.get('first_name', 'Test'),
+                'last_name': user_data.get('last_name', 'User'),
+                'name': f"{user_data.get('first_name', 'Test')} {user_data.get('last_name', 'User')}",
+                'picture': {'data': {'url': user_data.get('picture', '')}},
+            }
+        else:
+            # REAL VERIFICATION (uncomment for production)
+            with timer('external'):
+                fb_response = get_session().get(
+                    f'https://graph.facebook.com/me?access_token={access_token}&fields=id,name,email,first_name,last_name,picture.type(large)',
+                    timeout=TIMEOUT
+                )
+            
+            if fb_response.status_code != 200:
+                return {
+                    'success': False,
+                    'error': 'Invalid Facebook access token',
+                    'code': 'INVALID_TOKEN'
+                }
+            
+            fb_user_info = fb_response.json()
+        
+        # Extract user information
+        facebook_id = fb_user_info.get('id')
+        email = fb_user_info.get('email')
+        first_name = fb_user_info.get('first_name', '')
+        last_name = fb_user_info.get('last_name', '')
+        name = fb_user_info.get('name', '')
+        picture_data = fb_user_info.get('picture', {}).get('data', {})
+        picture = picture_data.get('url', '') if picture_data else ''
+        
+        # Use the full name when individual names are not available
+        if not first_name and not last_name and name:
+            name_parts = name.split(' ', 1)
+            first_name = name_parts[0]
+            last_name = name_parts[1] if len(name_parts) > 1 else ''
+        
+        # Facebook doesn't always provide email
+        user, is_new_user = resolve_user(
+            'facebook', facebook_id,
+            extra_data={**fb_user_info, 'picture': picture},
+            email=email or None,
+            username=None if email else f"fb_{facebook_id}",
+            first_name=first_name,
+            last_name=last_name,
+        )
+        
+        return {
+            'success': True,
+            'user': user,
+            'is_new_user': is_new_user,
+            'provider_data': fb_user_info
+        }
+        
+    except requests.RequestException as e:
+        return {
+            'success': False,
+            'error': f'Network error while verifying Facebook token: {str(e)}',
+            'code': 'NETWORK_ERROR'
+        }
+    except Exception as e:
+        return {
+            'success': False,
+            'error': f'Facebook authentication error: {str(e)}',
+            'code': 'FACEBOOK_AUTH_ERROR'
+        }
@@ -0,0 +1,104 @@
+# profiles/providers/google.py
+from django.conf import settings
+from zare_backend_new.metrics import timer
+from .accounts import resolve_user
+from .http import TIMEOUT, get_session
+from .jwks import InvalidIdToken, looks_like_jwt, verify_id_token
+import requests
+
+def authenticate(access_token, user_data):
+    """Handle Google OAuth authentication"""
+    try:
+        # MOCK VERIFICATION (for testing, only with SOCIAL_LOGIN_ALLOW_MOCK_TOKENS)
+        if settings.SOCIAL_LOGIN_ALLOW_MOCK_TOKENS and access_token.startswith('mock_google'):
+            google_user_info = {
+                'id': user_data.get('id', 'google_123'),
+                'email': user_data.get('email', 'test@gmail.com'),
+                'given_name': user_data.get('first_name', 'Test'),
+                'family_name': user_data.get('last_name', 'User'),
+                'picture': user_data.get('picture', ''),
+            }
+        elif looks_like_jwt(access_token):
+            # ID token: verified locally against Google's cached keys, no network call
+            try:
+                claims = verify_id_token('google', access_token)
+            except InvalidIdToken as e:
+                return {
+                    'success': False,
+                    'error': f'Invalid Google ID token: {e}',
+                    'code': 'INVALID_TOKEN'
+                }
+            google_user_info = {
+                'id': claims['sub'],
+                'email': claims.get('email'),
+                'verified_email': claims.get('email_verified', False),
+                'given_name': claims.get('given_name', ''),
+                'family_name': claims.get('family_name', ''),
+                'picture': claims.get('picture', ''),
+            }
+        else:
+            # Access token: ask Google's userinfo endpoint
+            with timer('external'):
+                google_response = get_session().get(
+                    f'https://www.googleapis.com/oauth2/v1/userinfo?access_token={access_token}',
+                    timeout=TIMEOUT
+                )
+            
+            if google_response.status_code != 200:
+                return {
+                    'success': False,
+                    'error': 'Invalid Google access token',
+                    'code': 'INVALID_TOKEN'
+                }
+            
+            google_user_info = google_response.json()
+        
+        # Extract user information
+        google_id = google_user_info.get('id')
+        email = google_user_info.get('email')
+        first_name = google_user_info.get('given_name', '')
+        last_name = google_user_info.get('family_name', '')
+        picture = google_user_info.get('picture', '')
+        
+        if not email:
+            return {
+                'success': False,
+                'error': 'Email not provided by Google',
+                'code': 'MISSING_EMAIL'
+            }
+        
+        user, is_new_user = resolve_user(
+            'google', google_id,
+            extra_data={**google_user_info, 'picture': picture},
+            email=email,
+            # Only a verified address links to an existing account
+            match_email=bool(google_user_info.get('verified_email', True)),
+            first_name=first_name,
+            last_name=last_name,
+        )
+        
+        return {
+            'success': True,
+            'user': user,
+            'is_new_user': is_new_user,
+            'provider_data': google_user_info
+        }
+        
+    except ImportError:
+        return {
+            'success': False,
+            'error': 'PyJWT library not installed. Run: pip install PyJWT',
+            'code': 'MISSING_DEPENDENCY'
+        }
+    except requests.RequestException as e:
+        return {
+            'success': False,
+            'error': f'Network error while verifying Google token: {str(e)}',
+            'code': 'NETWORK_ERROR'
+        }
+    except Exception as e:
+        return {
+            'success': False,
+            'error': f'Google authentication error: {str(e)}',
+            'code': 'GOOGLE_AUTH_ERROR'
+        }
@@ -0,0 +1,21 @@
+# profiles/providers/http.py
+"""Shared HTTP session for provider APIs; ``requests`` is imported on first use"""
+import threading
+
+TIMEOUT = 10
+
+_session = None
+_lock = threading.Lock()
+
+
+def get_session():
+    """One pooled session per process, so token checks reuse TLS connections"""
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                import requests
+                session = requests.Session()
+                session.mount('https://', requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=20))
+                _session = session
+    return _session
@@ -0,0 +1,202 @@
+# profiles/providers/jwks.py
+"""
+Local verification of Google and Apple ID tokens.
+
+Each provider's signing keys (its JWKS) are kept in memory and in a JSON file under
+``JWKS_CACHE_DIR``, so a worker that restarts without network access can still verify
+logins. Keys older than ``JWKS_MAX_AGE_SECONDS`` are refreshed by a background
+thread while the cached ones keep serving. A token signed with an unknown ``kid``
+(the provider rotated its keys) triggers a refresh at most once per
+``JWKS_MIN_REFRESH_INTERVAL_SECONDS`` and waits briefly for it. Logins never fetch
+keys otherwise.
+
+``jwks_url`` may be a ``file://`` URL, which is how the key set written by
+``mint_id_token`` is used to exercise logins offline.
+"""
+import base64
+import binascii
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+from urllib.parse import urlparse
+from urllib.request import url2pathname
+
+from django.conf import settings
+
+from zare_backend_new.metrics import timer
+from .http import TIMEOUT, get_session
+
+logger = logging.getLogger(__name__)
+
+# How long a login waits for the refresh its unknown kid triggered
+KID_MISS_WAIT_SECONDS = 3
+
+
+class InvalidIdToken(Exception):
+    pass
+
+
+def looks_like_jwt(token):
+    """True for a compact JWS whose header names an algorithm (access tokens are opaque)"""
+    parts = token.split('.')
+    if len(parts) != 3:
+        return False
+    try:
+        header = json.loads(base64.urlsafe_b64decode(parts[0] + '=' * (-len(parts[0]) % 4)))
+    except (ValueError, binascii.Error):
+        return False
+    return isinstance(header, dict) and 'alg' in header
+
+
+class KeySet:
+    """One provider's JWKS, cached in memory and on disk and refreshed off the login path"""
+
+    def __init__(self, name, url, cache_dir, max_age, min_refresh_interval):
+        self.name = name
+        self.url = url
+        self.cache_path = Path(cache_dir) / f'{name}.json'
+        self.max_age = max_age
+        self.min_refresh_interval = min_refresh_interval
+        self._keys = {}
+        self._fetched_at = 0.0
+        self._last_attempt = 0.0
+        self._loaded = False
+        self._lock = threading.Lock()
+        self._refreshed = threading.Condition(self._lock)
+        self._refreshing = False
+
+    def _fetch(self):
+        parsed = urlparse(self.url)
+        if parsed.scheme == 'file':
+            return json.loads(Path(url2pathname(parsed.path)).read_text())
+        with timer('external'):
+            response = get_session().get(self.url, timeout=TIMEOUT)
+        response.raise_for_status()
+        return response.json()
+
+    def _store(self, document, fetched_at):
+        self._keys = {key['kid']: key for key in document.get('keys', []) if key.get('kid')}
+        self._fetched_at = fetched_at
+
+    def _load_from_disk(self):
+        try:
+            cached = json.loads(self.cache_path.read_text())
+            self._store(cached['jwks'], cached['fetched_at'])
+        except (OSError, ValueError, KeyError):
+            pass
+
+    def _save_to_disk(self, document, fetched_at):
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            handle, temporary = tempfile.mkstemp(dir=self.cache_path.parent, suffix='.tmp')
+            with os.fdopen(handle, 'w') as output:
+                json.dump({'fetched_at': fetched_at, 'jwks': document}, output)
+            os.replace(temporary, self.cache_path)
+        except OSError as e:
+            logger.warning('Could not cache %s keys in %s: %s', self.name, self.cache_path, e)
+
+    def refresh(self):
+        """Fetch the key set now; returns True on success"""
+        try:
+            document = self._fetch()
+        except Exception as e:
+            logger.warning('Refreshing %s keys from %s failed: %s', self.name, self.url, e)
+            return False
+        fetched_at = time.time()
+        with self._lock:
+            self._store(document, fetched_at)
+        self._save_to_disk(document, fetched_at)
+        return True
+
+    def _refresh_in_background(self):
+        try:
+            self.refresh()
+        finally:
+            with self._lock:
+                self._refreshing = False
+                self._refreshed.notify_all()
+
+    def _start_refresh(self, force=False):
+        """Start a background refresh unless one is running or (without force) one ran recently"""
+        now = time.time()
+        if self._refreshing or (not force and now - self._last_attempt < self.min_refresh_interval):
+            return False
+        self._refreshing = True
+        self._last_attempt = now
+        threading.Thread(target=self._refresh_in_background, name=f'jwks-{self.name}', daemon=True).start()
+        return True
+
+    def get(self, kid):
+        """The JWK dict for ``kid``, or None if the provider does not (yet) publish it"""
+        with self._lock:
+            if not self._loaded:
+                self._loaded = True
+                self._load_from_disk()
+            if not self._keys:
+                # Cold start without a disk cache: the only login that waits on the network
+                self._start_refresh(force=True)
+            elif kid not in self._keys:
+                self._start_refresh()
+            elif time.time() - self._fetched_at > self.max_age:
+                self._start_refresh()
+                return self._keys[kid]
+            else:
+                return self._keys[kid]
+
+            deadline = time.monotonic() + KID_MISS_WAIT_SECONDS
+            while self._refreshing and kid not in self._keys:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._refreshed.wait(remaining)
+            return self._keys.get(kid)
+
+
+@lru_cache(maxsize=None)
+def key_set(provider):
+    config = settings.SOCIAL_ID_TOKENS[provider]
+    return KeySet(
+        provider,
+        config['jwks_url'],
+        settings.JWKS_CACHE_DIR,
+        settings.JWKS_MAX_AGE_SECONDS,
+        settings.JWKS_MIN_REFRESH_INTERVAL_SECONDS,
+    )
+
+
+def verify_id_token(provider, token):
+    """Claims of a valid ID token issued by ``provider`` for one of our client ids"""
+    import jwt
+
+    config = settings.SOCIAL_ID_TOKENS.get(provider)
+    if config is None:
+        raise InvalidIdToken(f'{provider} ID tokens are not configured')
+    if not config['audiences']:
+        raise InvalidIdToken(f'No {provider} client ids are configured')
+    try:
+        header = jwt.get_unverified_header(token)
+    except jwt.InvalidTokenError as e:
+        raise InvalidIdToken(str(e))
+    jwk = key_set(provider).get(header.get('kid'))
+    if jwk is None:
+        raise InvalidIdToken(f'Unknown {provider} signing key')
+    try:
+        claims = jwt.decode(
+            token,
+            jwt.PyJWK(jwk).key,
+            algorithms=[jwk.get('alg') or 'RS256'],
+            audience=config['audiences'],
+            leeway=settings.JWKS_LEEWAY_SECONDS,
+            options={'require': ['exp', 'iat', 'iss', 'aud', 'sub']},
+        )
+    except jwt.InvalidTokenError as e:
+        raise InvalidIdToken(str(e))
+    # Google uses two spellings of its issuer
+    if claims['iss'] not in config['issuers']:
+        raise InvalidIdToken(f'Unexpected issuer {claims["iss"]}')
+    return claims
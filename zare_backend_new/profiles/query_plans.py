@@ -0,0 +1,109 @@
+# profiles/query_plans.py
+"""
+EXPLAIN-based regression checks for the hot endpoints, shared by the explain_queries
+command (against a seeded database) and profiles.tests (against the test database).
+
+Every SELECT an endpoint issues is re-run under EXPLAIN ANALYZE; a sequential scan on a
+watched table or a sort that spills to disk is reported as a problem.
+"""
+import json
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from .models import VolunteerOpportunity
+
+# (label, method, path, who, relations allowed to be read sequentially)
+# ``who`` is 'user' (a seeded volunteer), 'staff' or 'admin' (session login for /admin/).
+ENDPOINTS = [
+    ('profile', 'get', '/api/profiles/profile/', 'user', set()),
+    ('social profile', 'get', '/api/auth/profile/', 'user', set()),
+    ('history', 'get', '/api/profiles/history/', 'user', set()),
+    ('apply', 'post', '/api/profiles/opportunities/{opportunity_id}/apply/', 'user', set()),
+    # The listings return every row, so reading the whole table is expected
+    ('opportunities', 'get', '/api/profiles/opportunities/', 'user', {'profiles_volunteeropportunity'}),
+    ('all users', 'get', '/api/profiles/users/', 'staff', {'profiles_userprofile'}),
+    ('admin profiles', 'get', '/admin/profiles/userprofile/', 'admin', set()),
+    ('admin history', 'get', '/admin/profiles/volunteerhistory/', 'admin', set()),
+    ('admin contacts', 'get', '/admin/contact/contactsubmission/', 'admin', set()),
+]
+
+
+def default_min_rows():
+    """Tables the admin still counts exactly stay below this size, so larger ones are watched"""
+    return settings.ADMIN_ESTIMATED_COUNT_THRESHOLD
+
+
+def walk_plan(node):
+    yield node
+    for child in node.get('Plans', []):
+        yield from walk_plan(child)
+
+
+def large_tables(min_rows):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT relname FROM pg_class WHERE relkind IN ('r', 'p') AND reltuples >= %s",
+            [min_rows],
+        )
+        return {row[0] for row in cursor.fetchall()}
+
+
+def explain(sql):
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}')
+        plan = cursor.fetchone()[0]
+    return json.loads(plan) if isinstance(plan, str) else plan
+
+
+def plan_problems(plan, watched_tables):
+    for node in walk_plan(plan[0]['Plan']):
+        relation = node.get('Relation Name')
+        if node['Node Type'] == 'Seq Scan' and relation in watched_tables:
+            yield f'sequential scan on {relation}'
+        if node.get('Sort Space Type') == 'Disk':
+            yield f"on-disk sort ({node.get('Sort Method')}, {node.get('Sort Space Used')} kB)"
+
+
+def check_endpoints(volunteer, admin, watched_tables, log=None, show_plans=False):
+    """
+    Call every endpoint as ``volunteer`` (or ``admin`` for /admin/) and return the list of
+    plan problems. Callers wrap this in a transaction they roll back: ``apply`` writes.
+    """
+    log = log or (lambda message: None)
+    failures = []
+    staff = User(id=volunteer.id, username=volunteer.username, is_staff=True)
+    opportunity_id = (
+        VolunteerOpportunity.objects.open().exclude(volunteerhistory__user=volunteer)
+        .values_list('id', flat=True).first()
+    )
+    if opportunity_id is None:
+        raise ValueError(f'No open opportunity that {volunteer.username} has not applied to; "apply" cannot be checked')
+    for label, method, path, who, allowed in ENDPOINTS:
+        client = APIClient()
+        if who == 'admin':
+            client.force_login(admin)
+        else:
+            client.force_authenticate(staff if who == 'staff' else volunteer)
+
+        url = path.format(opportunity_id=opportunity_id)
+        with CaptureQueriesContext(connection) as captured:
+            response = client.generic(method.upper(), url, data=json.dumps({
+                'start_date': '2030-01-01T00:00:00Z',
+            }), content_type='application/json')
+        if response.status_code >= 400:
+            failures.append(f'{label}: {method.upper()} {url} returned {response.status_code}')
+            continue
+
+        selects = [q['sql'] for q in captured.captured_queries if q['sql'].lstrip().upper().startswith('SELECT')]
+        log(f'{label}: {len(selects)} queries')
+        for sql in selects:
+            plan = explain(sql)
+            if show_plans:
+                log(json.dumps(plan, indent=2))
+            for problem in plan_problems(plan, watched_tables - allowed):
+                failures.append(f'{label}: {problem}\n    {sql}')
+    return failures
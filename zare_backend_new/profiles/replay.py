@@ -0,0 +1,170 @@
+# profiles/replay.py
+"""
+Deterministic replay of traffic captured by ``zare_backend_new.traffic``.
+
+``load_capture`` reads the NDJSON files in capture order. ``ReplayContext`` maps the
+anonymized markers onto seeded data: ids onto local ids of the matching kind, users
+and emails onto seeded accounts, text onto the seed vocabulary, numbers onto numbers
+of the same length, passwords onto SEED_PASSWORD and provider tokens onto mock tokens. Every mapping is a pseudonym
+modulo a pool ordered by id, so the same capture against the same seed always sends
+the same requests.
+
+``replay`` issues them at the captured pacing divided by ``speed`` (0 sends as fast as
+the workers allow) and returns loadtesting Samples keyed by "METHOD route", so reports
+are built and compared exactly like the synthetic load test's.
+"""
+import json
+import re
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import urlencode
+
+import requests
+
+from .loadtesting import SOCIAL_LOGIN_POOL, Samples, percentile, send
+from .seeding import INTERESTS, LOCATIONS, SEED_PASSWORD, SKILLS, seed_email
+
+PATH_PARAM_RE = re.compile(r'<(?:\w+:)?(\w+)>')
+WORDS = LOCATIONS + SKILLS + INTERESTS
+# Route segment -> id pool for bare "id"/"ids" keys
+ROUTE_POOLS = (('history', 'history'), ('skills', 'skill'), ('opportunities', 'opportunity'), ('users', 'user'))
+OMIT = object()
+
+
+class ReplayContext:
+    """``pools`` maps a kind ('opportunity', 'history', 'user', 'skill') to local ids"""
+
+    def __init__(self, base_url, user_count, tokens, pools):
+        self.base_url = base_url.rstrip('/')
+        self.user_count = user_count
+        self.tokens = tokens
+        self.pools = pools
+
+    def pick_id(self, n, key, route):
+        kind = re.sub(r'(^|_)ids?$', '', key)
+        if kind not in self.pools:
+            kind = next((pool for segment, pool in ROUTE_POOLS if segment in route), 'opportunity')
+        pool = self.pools.get(kind)
+        return pool[n % len(pool)] if pool else n
+
+
+def capture_files(paths):
+    files = []
+    for path in map(Path, paths):
+        # traffic.<pid>.ndjson plus its rotated traffic.<pid>.ndjson.N siblings
+        files.extend(sorted(path.glob('traffic.*.ndjson*')) if path.is_dir() else [path])
+    return files
+
+
+def load_capture(paths, limit=None):
+    """Captured records from files or capture directories, oldest first"""
+    records = []
+    for path in capture_files(paths):
+        with open(path) as handle:
+            for line in handle:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # a line cut short by a crash or rotation
+                if record.get('route') and record.get('method'):
+                    records.append(record)
+    records.sort(key=lambda record: record['ts'])
+    return records[:limit] if limit else records
+
+
+def route_label(record):
+    return f"{record['method']} {record['route']}"
+
+
+def resolve_number(marker):
+    """A number with as many digits as the captured one, as text if it was text"""
+    digits = marker.get('len', 1)
+    low = 10 ** (digits - 1) if digits > 1 else 0
+    number = low + marker['$num'] % (10 ** digits - low)
+    return str(number) if marker.get('str') else number
+
+
+def resolve(value, key, context, record):
+    """Replace capture markers in ``value`` with local values (OMIT drops the key)"""
+    if isinstance(value, list):
+        return [item for item in (resolve(item, key, context, record) for item in value) if item is not OMIT]
+    if not isinstance(value, dict):
+        return value
+    if '$id' in value:
+        return context.pick_id(value['$id'], key, record['route'])
+    if '$email' in value:
+        return seed_email(value['$email'] % context.user_count)
+    if '$text' in value:
+        return WORDS[value['$text'] % len(WORDS)]
+    if '$num' in value:
+        return resolve_number(value)
+    if '$secret' in value:
+        if 'password' in key:
+            return SEED_PASSWORD
+        if 'token' in key:
+            provider = (record.get('body') or {}).get('provider', 'google')
+            return f"mock_{provider}_{value['$secret'] % SOCIAL_LOGIN_POOL}"
+        return OMIT
+    resolved = {k: resolve(v, k, context, record) for k, v in value.items()}
+    return {k: v for k, v in resolved.items() if v is not OMIT}
+
+
+def build_request(record, context):
+    """(method, path, headers, body) for one captured record"""
+    kwargs = resolve(record.get('kwargs') or {}, '', context, record)
+    path = '/' + PATH_PARAM_RE.sub(lambda match: str(kwargs[match.group(1)]), record['route'])
+    query = resolve(record.get('query') or {}, '', context, record)
+    if query:
+        path += '?' + urlencode(query, doseq=True)
+    headers = {}
+    if record.get('user') is not None and context.tokens:
+        headers['Authorization'] = f"Token {context.tokens[record['user'] % len(context.tokens)]}"
+    body = record.get('body')
+    return record['method'], path, headers, resolve(body, '', context, record) if body is not None else None
+
+
+def replay(records, context, concurrency, speed=1.0):
+    """Send ``records`` with their captured spacing divided by ``speed``"""
+    samples = Samples()
+    local = threading.local()
+
+    def fire(label, request):
+        session = getattr(local, 'session', None)
+        if session is None:
+            session = local.session = requests.Session()
+        seconds, status = send(session, context, *request)
+        samples.add(label, seconds, status)
+
+    started = time.perf_counter()
+    first = records[0]['ts'] if records else 0
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for record in records:
+            if speed:
+                delay = (record['ts'] - first) / speed - (time.perf_counter() - started)
+                if delay > 0:
+                    time.sleep(delay)
+            pool.submit(fire, route_label(record), build_request(record, context))
+    return samples, time.perf_counter() - started
+
+
+def summarize_capture(records):
+    """Production-side latency and query counts per route, for reference next to a replay"""
+    durations = defaultdict(list)
+    queries = defaultdict(list)
+    for record in records:
+        label = route_label(record)
+        durations[label].append(record['duration_ms'])
+        if record.get('queries') is not None:
+            queries[label].append(record['queries'])
+    return {
+        label: {
+            'requests': len(values),
+            'p50_ms': percentile(values, 50),
+            'p95_ms': percentile(values, 95),
+            'queries_mean': round(sum(queries[label]) / len(queries[label]), 1) if queries[label] else None,
+        }
+        for label, values in sorted(durations.items())
+    }
@@ -0,0 +1,169 @@
+# profiles/seeding.py
+import random
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.utils import timezone
+
+from contact.models import ContactSubmission
+from .availability import DAYS, SLOTS, availability_to_mask
+from .models import UserProfile, VolunteerOpportunity, VolunteerHistory
+from .taxonomy import resolve
+
+SEED_USERNAME_PREFIX = 'seed_user_'
+SEED_PASSWORD = 'seed-password-123'
+
+# Rows created per unit of scale
+USERS_PER_SCALE = 1000
+OPPORTUNITIES_PER_SCALE = 100
+HISTORY_PER_USER = 5
+CONTACTS_PER_SCALE = 200
+
+SKILLS = ['teaching', 'healthcare', 'first_aid', 'cooking', 'driving', 'tutoring', 'coding', 'design']
+INTERESTS = ['education', 'environment', 'health', 'animals', 'elderly_care', 'arts', 'sports']
+CERTIFICATIONS = ['first_aid', 'teaching_license', 'food_safety']
+LOCATIONS = ['Toronto', 'Ottawa', 'Montreal', 'Vancouver', 'Calgary', 'Halifax', 'Winnipeg']
+STATUSES = ['applied', 'accepted', 'in_progress', 'completed', 'cancelled']
+BATCH_SIZE = 2000
+
+
+def seed_email(index):
+    return f'{SEED_USERNAME_PREFIX}{index}@example.com'
+
+
+def random_availability(rng):
+    """Mix of the whole-day and per-slot shapes volunteers actually submit"""
+    if rng.random() < 0.5:
+        return {'weekdays': rng.random() < 0.6, 'weekends': rng.random() < 0.5}
+    return {day: rng.sample(SLOTS, rng.randint(1, len(SLOTS))) for day in rng.sample(DAYS, rng.randint(1, 4))}
+
+
+def clear_seed_data():
+    """Delete everything created by seed_database (cascades to profiles and history)"""
+    User.objects.filter(username__startswith=SEED_USERNAME_PREFIX).delete()
+    ContactSubmission.objects.filter(email__startswith=SEED_USERNAME_PREFIX).delete()
+
+
+def seed_database(scale=1, seed=0, log=None):
+    """
+    Bulk-load deterministic users, profiles, opportunities, history and contact
+    submissions. ``scale=1`` creates 1k users; row counts grow linearly with it.
+    Seeded users can log in with their seed_email() and SEED_PASSWORD.
+    """
+    log = log or (lambda message: None)
+    rng = random.Random(seed)
+    now = timezone.now()
+    user_count = max(1, int(USERS_PER_SCALE * scale))
+    opportunity_count = max(1, int(OPPORTUNITIES_PER_SCALE * scale))
+    contact_count = max(1, int(CONTACTS_PER_SCALE * scale))
+
+    clear_seed_data()
+    # Hash once: create_user() would spend most of the seeding time in the password hasher
+    password = make_password(SEED_PASSWORD)
+
+    with transaction.atomic():
+        # bulk_create skips the serializers, so lists hold Skill ids directly
+        skills = resolve(SKILLS, create=True)
+        interests = resolve(INTERESTS, create=True)
+        certifications = resolve(CERTIFICATIONS, create=True)
+
+        log(f'Creating {user_count} users and profiles')
+        for start in range(0, user_count, BATCH_SIZE):
+            # bulk_create skips post_save, so profiles are created explicitly below
+            users = User.objects.bulk_create([
+                User(
+                    username=seed_email(i),
+                    email=seed_email(i),
+                    password=password,
+                    first_name=f'Seed{i}',
+                    last_name=rng.choice(LOCATIONS),
+                    date_joined=now - timedelta(days=rng.randint(0, 1000)),
+                )
+                for i in range(start, min(start + BATCH_SIZE, user_count))
+            ])
+            profiles = [
+                UserProfile(
+                    user=user,
+                    location=rng.choice(LOCATIONS),
+                    volunteer_skills=rng.sample(skills, rng.randint(0, 3)),
+                    volunteer_interests=rng.sample(interests, rng.randint(0, 3)),
+                    availability=random_availability(rng),
+                    volunteer_hours=rng.randint(0, 500),
+                    certifications=rng.sample(certifications, rng.randint(0, 2)),
+                )
+                for user in users
+            ]
+            # bulk_create skips save(), which keeps the bitmap in sync
+            for profile in profiles:
+                profile.availability_mask = availability_to_mask(profile.availability)
+            UserProfile.objects.bulk_create(profiles)
+
+        user_ids = list(
+            User.objects.filter(username__startswith=SEED_USERNAME_PREFIX).values_list('id', flat=True)
+        )
+
+        log(f'Creating {opportunity_count} opportunities')
+        organizers = rng.sample(user_ids, min(len(user_ids), max(1, opportunity_count // 10)))
+        opportunities = [
+            VolunteerOpportunity(
+                title=f'Opportunity {i}',
+                description=f'Seeded opportunity number {i}',
+                organization=f'Organization {i % 50}',
+                location=rng.choice(LOCATIONS),
+                skills_required=rng.sample(skills, rng.randint(1, 3)),
+                deadline=now + timedelta(days=rng.randint(-365, 365)),
+                hours_required=rng.randint(1, 40),
+                schedule={rng.choice(DAYS): [rng.choice(SLOTS)]},
+                created_by_id=rng.choice(organizers),
+                # Already "announced": send_notifications must not email seed users
+                notified_at=now,
+            )
+            for i in range(opportunity_count)
+        ]
+        for opportunity in opportunities:
+            opportunity.shift_mask = availability_to_mask(opportunity.schedule)
+        VolunteerOpportunity.objects.bulk_create(opportunities, batch_size=BATCH_SIZE)
+        opportunity_ids = list(
+            VolunteerOpportunity.objects.filter(created_by_id__in=organizers).values_list('id', flat=True)
+        )
+
+        log(f'Creating {user_count * HISTORY_PER_USER} history rows')
+        history = []
+        for user_id in user_ids:
+            for opportunity_id in rng.sample(opportunity_ids, min(HISTORY_PER_USER, len(opportunity_ids))):
+                history.append(VolunteerHistory(
+                    user_id=user_id,
+                    opportunity_id=opportunity_id,
+                    hours_contributed=rng.randint(0, 20),
+                    start_date=now - timedelta(days=rng.randint(0, 700)),
+                    status=rng.choice(STATUSES),
+                ))
+            if len(history) >= BATCH_SIZE:
+                VolunteerHistory.objects.bulk_create(history)
+                history = []
+        VolunteerHistory.objects.bulk_create(history)
+
+        log(f'Creating {contact_count} contact submissions')
+        ContactSubmission.objects.bulk_create([
+            ContactSubmission(
+                first_name=f'Seed{i}',
+                last_name='Contact',
+                email=f'{SEED_USERNAME_PREFIX}contact_{i}@example.com',
+                message='Seeded contact message',
+            )
+            for i in range(contact_count)
+        ], batch_size=BATCH_SIZE)
+
+    if connection.vendor == 'postgresql':
+        # Fresh statistics so the planner sees the seeded row counts
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    return {
+        'users': len(user_ids),
+        'opportunities': len(opportunity_ids),
+        'history': len(user_ids) * min(HISTORY_PER_USER, len(opportunity_ids)),
+        'contacts': contact_count,
+    }
@@ -1,7 +1,41 @@
 # profiles/serializers.py
 from rest_framework import serializers
 from django.contrib.auth.models import User
-from .models import UserProfile, VolunteerOpportunity, VolunteerHistory
+from zare_backend_new.metrics import TimedListSerializer, TimedSerializerMixin
+from . import taxonomy
+from .events import current_score
+from .images import variant_urls
+from .models import (
+    ArchivedVolunteerHistory, ArchivedVolunteerOpportunity, OpportunityStats, UserProfile, VolunteerHistory,
+    VolunteerOpportunity,
+)
+
+class SkillListField(serializers.Field):
+    """
+    A list of Skill ids in the database. Accepts names, aliases or ids of existing skills
+    and renders canonical names; new skills are added by staff in the admin.
+    """
+    default_error_messages = {
+        'not_a_list': 'Expected a list of skills.',
+        'invalid': 'Skills must be names of at most {max_length} characters or skill ids.',
+        'unknown': 'Unknown skills: {skills}',
+    }
+    
+    def to_internal_value(self, data):
+        if not isinstance(data, list):
+            self.fail('not_a_list')
+        for value in data:
+            valid_id = isinstance(value, int) and not isinstance(value, bool)
+            valid_name = isinstance(value, str) and len(value.strip()) <= taxonomy.MAX_NAME_LENGTH
+            if not (valid_id or valid_name):
+                self.fail('invalid', max_length=taxonomy.MAX_NAME_LENGTH)
+        try:
+            return taxonomy.resolve(data)
+        except taxonomy.UnknownSkills as e:
+            self.fail('unknown', skills=', '.join(map(str, e.values)))
+    
+    def to_representation(self, value):
+        return taxonomy.get_taxonomy().names_for(value)
 
 class UserSerializer(serializers.ModelSerializer):
     full_name = serializers.SerializerMethodField()
@@ -14,40 +48,131 @@ class UserSerializer(serializers.ModelSerializer):
     def get_full_name(self, obj):
         return f"{obj.first_name} {obj.last_name}".strip()
 
-class UserProfileSerializer(serializers.ModelSerializer):
+class UserProfileSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     # FIXED: Removed source='full_name' since it's redundant
     full_name = serializers.CharField(read_only=True)
+    profile_picture_variants = serializers.SerializerMethodField()
+    volunteer_skills = SkillListField(required=False)
+    volunteer_interests = SkillListField(required=False)
+    certifications = SkillListField(required=False)
     
     class Meta:
         model = UserProfile
+        list_serializer_class = TimedListSerializer
         fields = [
-            'user', 'full_name', 'phone', 'bio', 'location', 'profile_picture',
+            'user', 'full_name', 'phone', 'bio', 'location', 'profile_picture', 'profile_picture_variants',
             'volunteer_skills', 'volunteer_interests', 'availability', 
-            'volunteer_hours', 'certifications', 'notification_preferences',
+            'availability_mask', 'volunteer_hours', 'certifications', 'notification_preferences',
             'privacy_settings', 'created_at', 'updated_at'
         ]
-        read_only_fields = ['created_at', 'updated_at', 'volunteer_hours']
+        read_only_fields = ['availability_mask', 'created_at', 'updated_at', 'volunteer_hours']
+    
+    def get_profile_picture_variants(self, obj):
+        """{"thumb": url, "small": url, "medium": url} of WebP renditions; empty without a picture"""
+        return variant_urls(obj.picture_digest, self.context.get('request'))
 
-class VolunteerOpportunitySerializer(serializers.ModelSerializer):
+class VolunteerOpportunitySerializer(TimedSerializerMixin, serializers.ModelSerializer):
     created_by = UserSerializer(read_only=True)
+    skills_required = SkillListField(required=False)
     
     class Meta:
         model = VolunteerOpportunity
+        list_serializer_class = TimedListSerializer
         fields = [
             'id', 'title', 'description', 'organization', 'location',
-            'skills_required', 'date_posted', 'deadline', 'hours_required', 'created_by'
+            'skills_required', 'date_posted', 'deadline', 'hours_required', 'schedule',
+            'shift_mask', 'created_by'
         ]
-        read_only_fields = ['id', 'date_posted', 'created_by']
+        read_only_fields = ['id', 'date_posted', 'shift_mask', 'created_by']
 
-class VolunteerHistorySerializer(serializers.ModelSerializer):
+class VolunteerHistorySerializer(TimedSerializerMixin, serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     opportunity = VolunteerOpportunitySerializer(read_only=True)
     
     class Meta:
         model = VolunteerHistory
+        list_serializer_class = TimedListSerializer
         fields = [
             'id', 'user', 'opportunity', 'hours_contributed', 'start_date',
             'end_date', 'status', 'feedback', 'rating', 'created_at'
         ]
-        read_only_fields = ['id', 'created_at']
\ No newline at end of file
+        read_only_fields = ['id', 'created_at']
+
+class OpportunityStatsSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    opportunity = VolunteerOpportunitySerializer(read_only=True)
+    conversion_rate = serializers.FloatField(read_only=True)
+    score = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = OpportunityStats
+        list_serializer_class = TimedListSerializer
+        fields = ['opportunity', 'views', 'applications', 'conversion_rate', 'score']
+        read_only_fields = fields
+    
+    def get_score(self, obj):
+        return round(current_score(obj.trend), 3)
+
+class ArchivedVolunteerOpportunitySerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """Same shape as VolunteerOpportunitySerializer, plus archived_at"""
+    created_by = UserSerializer(read_only=True)
+    skills_required = SkillListField(read_only=True)
+    
+    class Meta:
+        model = ArchivedVolunteerOpportunity
+        list_serializer_class = TimedListSerializer
+        fields = VolunteerOpportunitySerializer.Meta.fields + ['archived_at']
+        read_only_fields = fields
+
+class ArchivedVolunteerHistorySerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """Same shape as VolunteerHistorySerializer, plus archived_at"""
+    user = UserSerializer(read_only=True)
+    opportunity = ArchivedVolunteerOpportunitySerializer(read_only=True)
+    
+    class Meta:
+        model = ArchivedVolunteerHistory
+        list_serializer_class = TimedListSerializer
+        fields = VolunteerHistorySerializer.Meta.fields + ['archived_at']
+        read_only_fields = fields
+
+class VolunteerSearchResultSerializer(serializers.ModelSerializer):
+    """Organizer-facing view of a volunteer that honors privacy_settings"""
+    user_id = serializers.IntegerField(read_only=True)
+    full_name = serializers.CharField(read_only=True)
+    email = serializers.SerializerMethodField()
+    phone = serializers.SerializerMethodField()
+    location = serializers.SerializerMethodField()
+    profile_picture_variants = serializers.SerializerMethodField()
+    volunteer_skills = SkillListField(read_only=True)
+    volunteer_interests = SkillListField(read_only=True)
+    certifications = SkillListField(read_only=True)
+    
+    # privacy_settings key -> default when the volunteer never chose
+    PRIVACY_DEFAULTS = {
+        'show_email': False,
+        'show_phone': False,
+        'show_location': True,
+    }
+    
+    class Meta:
+        model = UserProfile
+        fields = [
+            'id', 'user_id', 'full_name', 'email', 'phone', 'location', 'profile_picture_variants',
+            'volunteer_skills', 'volunteer_interests', 'certifications',
+            'availability', 'volunteer_hours'
+        ]
+    
+    def _allows(self, obj, setting):
+        return bool((obj.privacy_settings or {}).get(setting, self.PRIVACY_DEFAULTS[setting]))
+    
+    def get_email(self, obj):
+        return obj.user.email if self._allows(obj, 'show_email') else None
+    
+    def get_phone(self, obj):
+        return obj.phone if self._allows(obj, 'show_phone') else None
+    
+    def get_location(self, obj):
+        return obj.location if self._allows(obj, 'show_location') else None
+    
+    def get_profile_picture_variants(self, obj):
+        return variant_urls(obj.picture_digest, self.context.get('request'))
@@ -0,0 +1,65 @@
+# profiles/skills.py
+"""
+Text handling for the skill taxonomy: the normalized key that free text is matched
+on, display names for new skills, and the prefix trie behind autocomplete. The
+taxonomy itself (database, per-process cache) lives in profiles.taxonomy.
+"""
+import re
+import unicodedata
+
+_SEPARATORS = re.compile(r'[\s_\-]+')
+
+
+def normalize(text):
+    """Matching key: "  First_Aid " and "first aid" are the same skill"""
+    text = unicodedata.normalize('NFKC', str(text)).casefold()
+    return _SEPARATORS.sub(' ', text).strip()
+
+
+def display_name(text):
+    """Name for a skill first seen as ``text``; all-lowercase input is capitalized"""
+    text = _SEPARATORS.sub(' ', unicodedata.normalize('NFKC', str(text))).strip()
+    if text == text.lower():
+        text = ' '.join(word[:1].upper() + word[1:] for word in text.split(' '))
+    return text
+
+
+class SkillTrie:
+    """
+    Prefix trie over skill names and aliases. Every word of an entry is indexed, so "aid"
+    finds "First Aid". Each node keeps its ``limit`` best-ranked skill ids, making a
+    lookup O(len(prefix)).
+    """
+
+    def __init__(self, limit=20):
+        self.limit = limit
+        self._root = {}
+
+    def build(self, entries):
+        """``entries`` are (text, skill_id, rank) tuples; a lower rank sorts first"""
+        nodes = []
+        for text, skill_id, rank in entries:
+            words = normalize(text).split(' ')
+            for start in range(len(words)):
+                node = self._root
+                for char in ' '.join(words[start:]):
+                    if char not in node:
+                        node[char] = {None: {}}
+                        nodes.append(node[char])
+                    node = node[char]
+                    # The same skill reached through several entries keeps its best rank
+                    candidates = node[None]
+                    if skill_id not in candidates or rank < candidates[skill_id]:
+                        candidates[skill_id] = rank
+        for node in nodes:
+            ranked = sorted(node[None].items(), key=lambda item: (item[1], item[0]))
+            node[None] = [skill_id for skill_id, _ in ranked[:self.limit]]
+        return self
+
+    def complete(self, prefix, limit=None):
+        node = self._root
+        for char in normalize(prefix):
+            node = node.get(char)
+            if node is None:
+                return []
+        return node.get(None, [])[:limit or self.limit]
@@ -0,0 +1,199 @@
+# profiles/taxonomy.py
+"""
+The skill taxonomy as each worker process sees it.
+
+``get_taxonomy()`` returns an immutable snapshot: skill id -> name, normalized name or
+alias -> id, and the autocomplete trie. The snapshot is rebuilt right away when Skill
+or SkillAlias rows change in this process, and within SKILL_TAXONOMY_CHECK_SECONDS
+when they change in another one (a cheap count/max fingerprint is compared).
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max, Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import ArchivedVolunteerOpportunity, Skill, SkillAlias, UserProfile, VolunteerOpportunity
+from .skills import SkillTrie, display_name, normalize
+
+# Models and JSON list fields that hold Skill ids
+SKILL_FIELDS = (
+    (UserProfile, ('volunteer_skills', 'volunteer_interests', 'certifications')),
+    (VolunteerOpportunity, ('skills_required',)),
+    (ArchivedVolunteerOpportunity, ('skills_required',)),
+)
+# Stands in for search terms that match no skill; ids start at 1, so it never matches
+UNKNOWN_SKILL_ID = 0
+MAX_NAME_LENGTH = Skill._meta.get_field('name').max_length
+
+
+class UnknownSkills(ValueError):
+    def __init__(self, values):
+        self.values = values
+        super().__init__(f'Unknown skills: {", ".join(map(str, values))}')
+
+
+class Taxonomy:
+    def __init__(self, skills, aliases, fingerprint):
+        self.fingerprint = fingerprint
+        self.names = {skill_id: name for skill_id, name, key in skills}
+        # Canonical names win over aliases
+        self.ids = {key: skill_id for key, skill_id in aliases}
+        self.ids.update({key: skill_id for skill_id, name, key in skills})
+        ranks = {skill_id: (len(name), key) for skill_id, name, key in skills}
+        entries = [(name, skill_id, ranks[skill_id]) for skill_id, name, key in skills]
+        entries += [(key, skill_id, ranks[skill_id]) for key, skill_id in aliases if skill_id in ranks]
+        self.trie = SkillTrie(settings.SKILL_AUTOCOMPLETE_LIMIT).build(entries)
+
+    def lookup(self, value):
+        """Skill id for an id, name or alias, or None"""
+        if isinstance(value, bool):
+            return None
+        if isinstance(value, int):
+            return value if value in self.names else None
+        return self.ids.get(normalize(value))
+
+    def names_for(self, skill_ids):
+        return [self.names[skill_id] for skill_id in skill_ids or [] if skill_id in self.names]
+
+    def complete(self, prefix, limit=None):
+        return [
+            {'id': skill_id, 'name': self.names[skill_id]}
+            for skill_id in self.trie.complete(prefix, limit)
+        ]
+
+
+_lock = threading.Lock()
+_taxonomy = None
+_checked_at = 0.0
+_stale = False
+
+
+def _fingerprint():
+    skills = Skill.objects.aggregate(count=Count('id'), latest=Max('updated_at'))
+    aliases = SkillAlias.objects.aggregate(count=Count('id'), latest=Max('id'))
+    return skills['count'], skills['latest'], aliases['count'], aliases['latest']
+
+
+def get_taxonomy():
+    global _taxonomy, _checked_at, _stale
+    with _lock:
+        now = time.monotonic()
+        if _taxonomy is None or _stale or now - _checked_at > settings.SKILL_TAXONOMY_CHECK_SECONDS:
+            fingerprint = _fingerprint()
+            if _taxonomy is None or _stale or fingerprint != _taxonomy.fingerprint:
+                _taxonomy = Taxonomy(
+                    list(Skill.objects.values_list('id', 'name', 'key')),
+                    list(SkillAlias.objects.values_list('key', 'skill_id')),
+                    fingerprint,
+                )
+            _checked_at = now
+            _stale = False
+        return _taxonomy
+
+
+def invalidate():
+    global _stale
+    _stale = True
+
+
+@receiver(post_save, sender=Skill)
+@receiver(post_delete, sender=Skill)
+@receiver(post_delete, sender=SkillAlias)
+def _skills_changed(sender, **kwargs):
+    invalidate()
+
+
+@receiver(post_save, sender=SkillAlias)
+def _alias_saved(sender, instance, **kwargs):
+    # An edited alias keeps its id; touching the skill changes the fingerprint other processes check
+    Skill.objects.filter(pk=instance.skill_id).update(updated_at=timezone.now())
+    invalidate()
+
+
+def create_skills(names):
+    """Add skills for names the taxonomy does not know yet"""
+    new = {}
+    for name in names:
+        key = normalize(name)
+        if key and key not in new:
+            new[key] = Skill(name=display_name(name), key=key)
+    # bulk_create skips save(), so the key is set above; existing keys are left alone
+    Skill.objects.bulk_create(new.values(), ignore_conflicts=True)
+    invalidate()
+
+
+def resolve(values, create=False):
+    """
+    Skill ids (deduplicated, in input order) for a list of ids, names or aliases. With
+    ``create``, unknown names become new skills; otherwise they raise UnknownSkills.
+    """
+    taxonomy = get_taxonomy()
+    unknown = [value for value in values if taxonomy.lookup(value) is None]
+    if unknown:
+        if not create or not all(isinstance(value, str) for value in unknown):
+            raise UnknownSkills(unknown)
+        create_skills(unknown)
+        taxonomy = get_taxonomy()
+    ids = []
+    for value in values:
+        skill_id = taxonomy.lookup(value)
+        if skill_id is not None and skill_id not in ids:
+            ids.append(skill_id)
+    return ids
+
+
+def search_ids(values):
+    """Ids for search terms; unknown terms become UNKNOWN_SKILL_ID so they match nothing"""
+    taxonomy = get_taxonomy()
+    return [
+        skill_id if skill_id is not None else UNKNOWN_SKILL_ID
+        for skill_id in (taxonomy.lookup(value) for value in values)
+    ]
+
+
+def merge_skills(target, sources):
+    """
+    Fold ``sources`` into ``target``: rewrite every list that mentions them, keep their
+    names and aliases as aliases of ``target``, then delete them.
+    """
+    source_ids = [skill.id for skill in sources if skill.id != target.id]
+    if not source_ids:
+        return 0
+    rewritten = 0
+    now = timezone.now()
+    with transaction.atomic():
+        for model, fields in SKILL_FIELDS:
+            mentions = Q()
+            for field in fields:
+                for skill_id in source_ids:
+                    mentions |= Q(**{f'{field}__contains': [skill_id]})
+            update_fields = list(fields)
+            touch = model is not ArchivedVolunteerOpportunity
+            if touch:
+                update_fields.append('updated_at')
+            rows = list(model.objects.filter(mentions).select_for_update())
+            for row in rows:
+                for field in fields:
+                    merged = []
+                    for skill_id in getattr(row, field) or []:
+                        skill_id = target.id if skill_id in source_ids else skill_id
+                        if skill_id not in merged:
+                            merged.append(skill_id)
+                    setattr(row, field, merged)
+                if touch:
+                    row.updated_at = now
+            model.objects.bulk_update(rows, update_fields, batch_size=1000)
+            rewritten += len(rows)
+
+        aliases = [SkillAlias(skill=target, alias=skill.name, key=skill.key) for skill in sources if skill.id != target.id]
+        SkillAlias.objects.filter(skill_id__in=source_ids).update(skill=target)
+        Skill.objects.filter(id__in=source_ids).delete()
+        SkillAlias.objects.bulk_create(aliases, ignore_conflicts=True)
+        Skill.objects.filter(pk=target.pk).update(updated_at=now)
+    invalidate()
+    return rewritten
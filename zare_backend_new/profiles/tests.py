@@ -1,3 +1,477 @@
-from django.test import TestCase
+# profiles/tests.py
+import importlib.util
+import json
+import tempfile
+import time
+from pathlib import Path
+from unittest import skipUnless
+from unittest.mock import patch
 
-# Create your tests here.
+from allauth.socialaccount.models import SocialAccount
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from contact.models import ContactSubmission
+from zare_backend_new.traffic import anonymize, pseudonym
+
+from . import events, profile_cache, taxonomy
+from .availability import FULL_DAY, SLOTS_PER_DAY, availability_to_mask, mask_to_slots, slot_bit
+from .models import (
+    IdempotencyRecord, OpportunityEvent, OpportunityStats, Skill, UserProfile, VolunteerHistory, VolunteerOpportunity,
+)
+from .providers import apple
+from .providers.jwks import InvalidIdToken, key_set, verify_id_token
+from .query_plans import check_endpoints, large_tables
+from .seeding import SEED_USERNAME_PREFIX, seed_database
+from .serializers import UserProfileSerializer
+from .throttles import OpportunityViewThrottle
+from .transitions import TransitionError, bulk_transition
+
+HAS_JWT = bool(importlib.util.find_spec('jwt') and importlib.util.find_spec('cryptography'))
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Query plans are checked against PostgreSQL')
+@override_settings(PROFILE_CACHE_ENABLED=False)
+class QueryPlanTests(TestCase):
+    """
+    The test database is too small for the planner to prefer indexes, so sequential
+    scans are disabled: any that remain mean no index can serve the query.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        seed_database(scale=0.05)
+        cls.volunteer = (
+            User.objects.filter(username__startswith=SEED_USERNAME_PREFIX, volunteerhistory__isnull=False)
+            .order_by('id').first()
+        )
+        cls.admin = User.objects.create_superuser('plan_admin', 'plan_admin@example.com', None)
+        # Seeded volunteers have applied to most of the few seeded postings; "apply" needs a fresh one
+        VolunteerOpportunity.objects.create(
+            title='Plan check', description='Open posting for the apply endpoint', organization='Plans',
+            location='Anywhere', skills_required=[], created_by=cls.admin,
+        )
+
+    def test_hot_endpoints_use_indexes(self):
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        failures = check_endpoints(self.volunteer, self.admin, large_tables(0))
+        self.assertEqual(failures, [], 'Query plan regressions:\n' + '\n'.join(failures))
+
+
+@skipUnless(HAS_JWT, 'PyJWT and cryptography are needed to sign test tokens')
+class IdTokenVerificationTests(SimpleTestCase):
+    """Google ID tokens checked against a locally generated key set served from a file:// URL"""
+    audience = 'test-client'
+    issuer = 'https://accounts.google.com'
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.jwks_path = Path(directory.name) / 'jwks.json'
+        self.cache_dir = Path(directory.name) / 'cache'
+        self.private_keys = {}
+        self.add_key('key-1')
+        overrides = self.settings_for(self.jwks_path.as_uri())
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        key_set.cache_clear()
+        self.addCleanup(key_set.cache_clear)
+
+    def settings_for(self, jwks_url, min_refresh_interval=0):
+        return override_settings(
+            SOCIAL_ID_TOKENS={
+                'google': {
+                    'jwks_url': jwks_url,
+                    'issuers': [self.issuer],
+                    'audiences': [self.audience],
+                },
+                'apple': {
+                    'jwks_url': jwks_url,
+                    'issuers': ['https://appleid.apple.com'],
+                    'audiences': [self.audience],
+                },
+            },
+            JWKS_CACHE_DIR=self.cache_dir,
+            JWKS_MIN_REFRESH_INTERVAL_SECONDS=min_refresh_interval,
+        )
+
+    def add_key(self, kid):
+        """Generate a signing key and publish its public half"""
+        from cryptography.hazmat.primitives.asymmetric import rsa
+        from jwt.algorithms import RSAAlgorithm
+
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        self.private_keys[kid] = private_key
+        keys = [
+            {**json.loads(RSAAlgorithm.to_jwk(key.public_key())), 'kid': name, 'alg': 'RS256', 'use': 'sig'}
+            for name, key in self.private_keys.items()
+        ]
+        self.jwks_path.write_text(json.dumps({'keys': keys}))
+
+    def token(self, kid='key-1', **claims):
+        import jwt
+
+        now = int(time.time())
+        claims = {
+            'iss': self.issuer,
+            'aud': self.audience,
+            'sub': 'user-1',
+            'email': 'user-1@example.com',
+            'iat': now,
+            'exp': now + 600,
+            **claims,
+        }
+        return jwt.encode(claims, self.private_keys[kid], algorithm='RS256', headers={'kid': kid})
+
+    def test_valid_token(self):
+        claims = verify_id_token('google', self.token())
+        self.assertEqual(claims['sub'], 'user-1')
+        self.assertEqual(claims['email'], 'user-1@example.com')
+
+    def test_expired_token(self):
+        issued = int(time.time()) - 7200
+        with self.assertRaisesMessage(InvalidIdToken, 'expired'):
+            verify_id_token('google', self.token(iat=issued, exp=issued + 600))
+
+    def test_wrong_audience(self):
+        with self.assertRaises(InvalidIdToken):
+            verify_id_token('google', self.token(aud='someone-else'))
+
+    def test_wrong_issuer(self):
+        with self.assertRaisesMessage(InvalidIdToken, 'Unexpected issuer'):
+            verify_id_token('google', self.token(iss='https://evil.example.com'))
+
+    def test_unconfigured_provider(self):
+        with self.assertRaisesMessage(InvalidIdToken, 'not configured'):
+            verify_id_token('facebook', self.token())
+
+    def test_unknown_kid_refreshes_keys(self):
+        self.assertTrue(key_set('google').refresh())
+        verify_id_token('google', self.token())
+        self.add_key('key-2')
+        claims = verify_id_token('google', self.token(kid='key-2'))
+        self.assertEqual(claims['sub'], 'user-1')
+
+    def test_unknown_kid_refresh_is_rate_limited(self):
+        with self.settings_for(self.jwks_path.as_uri(), min_refresh_interval=3600):
+            key_set.cache_clear()
+            verify_id_token('google', self.token())
+            self.add_key('key-2')
+            with self.assertRaisesMessage(InvalidIdToken, 'Unknown google signing key'):
+                verify_id_token('google', self.token(kid='key-2'))
+
+    def test_cold_start_from_disk_cache(self):
+        self.assertTrue(key_set('google').refresh())
+        self.assertTrue((self.cache_dir / 'google.json').exists())
+        # A new process that cannot reach the key set still verifies from the disk cache
+        with self.settings_for((self.jwks_path.parent / 'missing.json').as_uri()):
+            key_set.cache_clear()
+            claims = verify_id_token('google', self.token())
+        self.assertEqual(claims['sub'], 'user-1')
+
+    @override_settings(SOCIAL_LOGIN_ALLOW_MOCK_TOKENS=False)
+    def test_mock_tokens_need_the_setting(self):
+        result = apple.authenticate('mock_apple_token', {'id': 'apple_123', 'email': 'user-1@example.com'})
+        self.assertFalse(result['success'])
+        self.assertEqual(result['code'], 'INVALID_TOKEN')
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Social logins lock and upsert with PostgreSQL SQL')
+@override_settings(DEBUG=True, SOCIAL_LOGIN_ALLOW_MOCK_TOKENS=True)
+class SocialLoginQueryBudgetTests(TestCase):
+    """With DEBUG on, a returning login over RETURNING_USER_QUERIES fails with a 500"""
+
+    def login(self):
+        return APIClient().post('/api/auth/social/login/', {
+            'provider': 'google',
+            'access_token': 'mock_google_budget',
+            'user_data': {'id': 'budget-1', 'email': 'budget-1@example.com', 'first_name': 'Budget'},
+        }, format='json')
+
+    def test_returning_user_stays_within_budget(self):
+        self.assertEqual(self.login().status_code, 200)
+        user = User.objects.get(email='budget-1@example.com')
+        skill = Skill.objects.create(name='First aid')
+        user.userprofile.volunteer_skills = [skill.id]
+        user.userprofile.save()
+        # The next serialization has to reload the taxonomy
+        taxonomy.invalidate()
+
+        response = self.login()
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertFalse(response.data['data']['is_new_user'])
+        self.assertEqual(response.data['data']['user']['volunteer_skills'], ['First aid'])
+
+
+class AvailabilityMaskTests(SimpleTestCase):
+    def day(self, index):
+        return FULL_DAY << (index * SLOTS_PER_DAY)
+
+    def test_day_groups(self):
+        weekdays = sum(self.day(index) for index in range(5))
+        self.assertEqual(availability_to_mask({'weekdays': True}), weekdays)
+        self.assertEqual(availability_to_mask({'weekdays': True, 'weekends': False}), weekdays)
+        self.assertEqual(availability_to_mask({'weekends': True}), self.day(5) | self.day(6))
+
+    def test_single_days_and_explicit_slots(self):
+        self.assertEqual(availability_to_mask({'monday': True}), self.day(0))
+        self.assertEqual(
+            availability_to_mask({'Saturday': ['Morning', 'evening', 'midnight']}),
+            slot_bit('saturday', 'morning') | slot_bit('saturday', 'evening'),
+        )
+
+    def test_slots_narrow_whole_days(self):
+        self.assertEqual(
+            availability_to_mask({'weekends': True, 'evenings': True}),
+            slot_bit('saturday', 'evening') | slot_bit('sunday', 'evening'),
+        )
+        # Explicit slots are not narrowed
+        self.assertEqual(
+            mask_to_slots(availability_to_mask({'monday': True, 'tuesday': ['morning'], 'evenings': True})),
+            {'monday': ['evening'], 'tuesday': ['morning']},
+        )
+
+    def test_slots_alone_mean_every_day(self):
+        mask = availability_to_mask({'mornings': True})
+        self.assertEqual(mask_to_slots(mask), {day: ['morning'] for day in mask_to_slots(mask)})
+        self.assertEqual(len(mask_to_slots(mask)), 7)
+
+    def test_invalid_input(self):
+        self.assertEqual(availability_to_mask(None), 0)
+        self.assertEqual(availability_to_mask(['monday']), 0)
+        self.assertEqual(availability_to_mask({'someday': True, 'monday': False}), 0)
+
+
+class IdempotencyTests(TestCase):
+    contact = {'first_name': 'Ada', 'last_name': 'Lovelace', 'email': 'ada@example.com', 'message': 'Hello'}
+
+    def post(self, path, data, key='key-1', address='203.0.113.1'):
+        return APIClient().post(path, data, format='json', HTTP_IDEMPOTENCY_KEY=key, REMOTE_ADDR=address)
+
+    def test_retry_replays_the_first_response(self):
+        first = self.post('/api/contact/', self.contact)
+        retry = self.post('/api/contact/', self.contact)
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(retry.data, first.data)
+        self.assertEqual(ContactSubmission.objects.count(), 1)
+
+    def test_key_reused_with_another_body_is_rejected(self):
+        self.post('/api/contact/', self.contact)
+        response = self.post('/api/contact/', {**self.contact, 'message': 'Changed'})
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(ContactSubmission.objects.count(), 1)
+
+    def test_errors_are_not_stored(self):
+        self.assertEqual(self.post('/api/contact/', {'first_name': 'Ada'}).status_code, 400)
+        self.assertEqual(self.post('/api/contact/', self.contact).status_code, 201)
+        self.assertFalse(IdempotencyRecord.objects.filter(status_code=400).exists())
+
+    def test_anonymous_keys_are_scoped_per_client(self):
+        self.post('/api/contact/', self.contact)
+        other = self.post('/api/contact/', self.contact, address='198.51.100.7')
+        self.assertFalse(other.has_header('Idempotent-Replayed'))
+        self.assertEqual(ContactSubmission.objects.count(), 2)
+
+    def test_signup_token_is_not_stored_but_replayed(self):
+        signup = {'email': 'grace@example.com', 'password': 'a-long-password'}
+        first = self.post('/api/auth/signup/', signup)
+        retry = self.post('/api/auth/signup/', signup)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(retry.data['token'], first.data['token'])
+        record = IdempotencyRecord.objects.get(path='/api/auth/signup/')
+        self.assertIsNone(record.response_body['token'])
+
+
+class OpportunityEventTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        organizer = User.objects.create_user('organizer', 'organizer@example.com', 'a-long-password')
+        cls.opportunity = VolunteerOpportunity.objects.create(
+            title='Beach clean-up', description='Bring gloves', organization='Coast',
+            location='Harbour', skills_required=[], created_by=organizer,
+        )
+
+    def setUp(self):
+        # Throttle history and view dedupe keys
+        cache.clear()
+
+    @skipUnless(connection.vendor == 'postgresql', 'Stats are upserted with PostgreSQL SQL')
+    def test_unknown_and_out_of_range_ids_are_dropped(self):
+        now = timezone.now()
+        events.write_events([
+            (OpportunityEvent.VIEW, self.opportunity.id, None, now),
+            (OpportunityEvent.VIEW, self.opportunity.id + 1000, None, now),
+            (OpportunityEvent.VIEW, 2 ** 63, None, now),
+        ])
+        self.assertEqual(list(OpportunityEvent.objects.values_list('opportunity_id', flat=True)), [self.opportunity.id])
+        self.assertEqual(OpportunityStats.objects.get(opportunity=self.opportunity).views, 1)
+
+    def test_repeated_views_count_once(self):
+        path = f'/api/profiles/opportunities/{self.opportunity.id}/view/'
+        with patch.object(events, 'record_views') as record_views:
+            for address in ('203.0.113.1', '203.0.113.1', '198.51.100.7'):
+                self.assertEqual(APIClient().post(path, REMOTE_ADDR=address).status_code, 202)
+        self.assertEqual(record_views.call_count, 2)
+
+    def test_views_are_throttled_per_client(self):
+        # The rates are read into the class when DRF is imported
+        with patch.object(OpportunityViewThrottle, 'THROTTLE_RATES', {'opportunity_view': '2/hour'}), \
+                patch.object(events, 'record_views'):
+            statuses = [
+                APIClient().post(f'/api/profiles/opportunities/{self.opportunity.id + offset}/view/').status_code
+                for offset in range(3)
+            ]
+        self.assertEqual(statuses, [202, 202, 429])
+
+
+class SkillListFieldTests(TestCase):
+    def setUp(self):
+        taxonomy.invalidate()
+        self.profile = User.objects.create_user('skills', 'skills@example.com', 'a-long-password').userprofile
+
+    def test_known_names_and_ids(self):
+        first_aid = Skill.objects.create(name='First Aid')
+        cooking = Skill.objects.create(name='Cooking')
+        serializer = UserProfileSerializer(
+            self.profile, data={'volunteer_skills': ['first_aid', cooking.id, 'First Aid']}, partial=True,
+        )
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        self.assertEqual(serializer.validated_data['volunteer_skills'], [first_aid.id, cooking.id])
+
+    def test_unknown_names_are_rejected_not_created(self):
+        serializer = UserProfileSerializer(self.profile, data={'volunteer_skills': ['Juggling', 12345]}, partial=True)
+        self.assertFalse(serializer.is_valid())
+        self.assertEqual(serializer.errors['volunteer_skills'], ['Unknown skills: Juggling, 12345'])
+        self.assertFalse(Skill.objects.exists())
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Transitions run as one PostgreSQL statement')
+class BulkTransitionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.organizer = User.objects.create_user('organizer', 'organizer@example.com', 'a-long-password', is_staff=True)
+        cls.volunteer = User.objects.create_user('volunteer', 'volunteer@example.com', 'a-long-password')
+        opportunity = VolunteerOpportunity.objects.create(
+            title='Food bank', description='Sort donations', organization='Pantry',
+            location='Depot', skills_required=[], hours_required=3, created_by=cls.organizer,
+        )
+        history = dict(user=cls.volunteer, opportunity=opportunity, start_date=timezone.now())
+        cls.started = VolunteerHistory.objects.create(status='in_progress', **history)
+        cls.logged = VolunteerHistory.objects.create(status='in_progress', hours_contributed=5, **history)
+        cls.applied = VolunteerHistory.objects.create(status='applied', **history)
+
+    def volunteer_hours(self):
+        return UserProfile.objects.get(user=self.volunteer).volunteer_hours
+
+    def test_completion_credits_hours(self):
+        results = bulk_transition([self.started.id, self.logged.id], 'completed', self.organizer)
+        self.assertEqual([(result['success'], result['hours_credited']) for result in results], [(True, 3), (True, 5)])
+        self.assertEqual(self.volunteer_hours(), 8)
+        self.started.refresh_from_db()
+        self.assertEqual((self.started.status, self.started.hours_contributed), ('completed', 3))
+
+    def test_explicit_hours_override_the_default(self):
+        results = bulk_transition([(self.started.id, 7)], 'completed', self.organizer)
+        self.assertEqual(results[0]['hours_credited'], 7)
+        self.assertEqual(self.volunteer_hours(), 7)
+
+    def test_duplicate_and_unknown_ids(self):
+        missing = self.applied.id + 1000
+        results = bulk_transition([self.started.id, missing, self.started.id], 'completed', self.organizer)
+        self.assertEqual([result['id'] for result in results], [self.started.id, missing])
+        self.assertTrue(results[0]['success'])
+        self.assertEqual(results[1]['error'], 'Application not found')
+        # Credited once
+        self.assertEqual(self.volunteer_hours(), 3)
+
+    def test_only_allowed_transitions(self):
+        results = bulk_transition([self.applied.id, self.started.id], 'accepted', self.organizer)
+        self.assertEqual([result['success'] for result in results], [True, False])
+        self.assertEqual(results[1]['error'], 'Cannot move from in_progress to accepted')
+        self.assertEqual(bulk_transition([self.applied.id], 'completed', self.organizer)[0]['error'],
+                         'Cannot move from accepted to completed')
+        with self.assertRaises(TransitionError):
+            bulk_transition([self.applied.id], 'applied', self.organizer)
+        self.assertEqual(self.volunteer_hours(), 0)
+
+    def test_out_of_range_values_are_bad_requests(self):
+        client = APIClient()
+        client.force_authenticate(self.organizer)
+        for body in ({'status': 'completed', 'ids': [2 ** 63]},
+                     {'status': 'completed', 'items': [{'id': self.started.id, 'hours': 2 ** 31}]}):
+            response = client.post('/api/profiles/history/transition/', body, format='json')
+            self.assertEqual(response.status_code, 400, response.data)
+        self.started.refresh_from_db()
+        self.assertEqual(self.started.status, 'in_progress')
+        self.assertEqual(self.volunteer_hours(), 0)
+
+
+class TrafficAnonymizationTests(SimpleTestCase):
+    def test_numbers_keep_only_their_length(self):
+        self.assertEqual(anonymize(5551234, 'phone'), {'$num': pseudonym(5551234), 'len': 7})
+        self.assertEqual(anonymize('0612', 'zip'), {'$num': pseudonym('0612'), 'len': 4, 'str': True})
+        self.assertEqual(anonymize(12.5, 'hours')['len'], 2)
+
+    def test_kept_params_and_booleans(self):
+        self.assertEqual(anonymize({'limit': 20, 'status': 'completed', 'remote': True, 'note': None}),
+                         {'limit': 20, 'status': 'completed', 'remote': True, 'note': None})
+
+    def test_emails_ids_and_secrets(self):
+        body = anonymize({
+            'email': 'Ada@Example.com', 'password': 'hunter2', 'access_token': 'abc', 'opportunity_id': 7,
+            'ids': [1, 2], 'user': 3, 'city': 'Haarlem',
+        })
+        self.assertEqual(body['email'], {'$email': pseudonym('ada@example.com')})
+        self.assertEqual(body['password'], {'$secret': pseudonym('hunter2')})
+        self.assertEqual(body['access_token'], {'$secret': pseudonym('abc')})
+        self.assertEqual(body['opportunity_id'], {'$id': pseudonym(7)})
+        self.assertEqual(body['ids'], [{'$id': pseudonym(1)}, {'$id': pseudonym(2)}])
+        self.assertEqual(body['user'], {'$id': pseudonym(3)})
+        self.assertEqual(body['city'], {'$text': pseudonym('Haarlem'), 'len': 7})
+        self.assertNotIn('Haarlem', json.dumps(body))
+
+    def test_replay_restores_number_shape(self):
+        # Replay talks HTTP through requests, imported only by the benchmark commands
+        from .replay import resolve_number
+
+        for marker in (anonymize(5551234, 'phone'), anonymize('0612', 'zip'), anonymize(0, 'count')):
+            number = resolve_number(marker)
+            self.assertIsInstance(number, str if marker.get('str') else int)
+            self.assertEqual(len(str(number)), marker['len'])
+
+
+class ProfileCacheInvalidationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('cached', 'cached@example.com', 'a-long-password')
+        self.addCleanup(profile_cache.cache.invalidate)
+
+    def cache_entry(self):
+        profile_cache.cache._entries[self.user.pk] = self.user.userprofile
+
+    def test_profile_save_drops_the_user_on_commit(self):
+        self.cache_entry()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.userprofile.bio = 'Weekend gardener'
+            self.user.userprofile.save()
+            # Other transactions cannot see the change yet
+            self.assertIn(self.user.pk, profile_cache.cache._entries)
+        self.assertNotIn(self.user.pk, profile_cache.cache._entries)
+
+    def test_user_and_social_account_changes(self):
+        for change in (
+            lambda: User.objects.get(pk=self.user.pk).save(),
+            lambda: SocialAccount.objects.create(user=self.user, provider='google', uid='cached-1'),
+        ):
+            self.cache_entry()
+            with self.captureOnCommitCallbacks(execute=True):
+                change()
+            self.assertNotIn(self.user.pk, profile_cache.cache._entries)
@@ -0,0 +1,13 @@
+# profiles/throttles.py
+from django.conf import settings
+from rest_framework.throttling import UserRateThrottle
+
+
+class OpportunityViewThrottle(UserRateThrottle):
+    """View events per user, or per client address for anonymous visitors"""
+    scope = 'opportunity_view'
+
+    def first_view(self, request, opportunity_id):
+        """False when this client already sent a view of the opportunity recently"""
+        key = f'{self.get_cache_key(request, None)}:{opportunity_id}'
+        return self.cache.add(key, True, settings.OPPORTUNITY_VIEW_DEDUPE_SECONDS)
@@ -0,0 +1,123 @@
+# profiles/transitions.py
+"""
+Set-based VolunteerHistory status changes for organizers.
+
+``bulk_transition()`` moves any number of applications in a single statement: a CTE
+validates each row's current status and the organizer's ownership of the opportunity,
+UPDATEs the rows that qualify and, when completing, credits ``hours_contributed`` and
+adds the same hours to each volunteer's ``UserProfile.volunteer_hours``. The final
+SELECT reports one result per requested id, in request order.
+
+The UPDATE re-checks the status of each row it locks, so a row moved concurrently is
+reported as an invalid transition rather than credited twice.
+"""
+from django.db import connection, transaction
+
+from .models import UserProfile, VolunteerHistory, VolunteerOpportunity
+
+# target status -> statuses it can be reached from
+ALLOWED_TRANSITIONS = {
+    'accepted': ['applied'],
+    'in_progress': ['accepted'],
+    'completed': ['in_progress'],
+    'cancelled': ['applied', 'accepted', 'in_progress'],
+}
+# Statuses that credit hours to the volunteer
+CREDITING_STATUSES = {'completed'}
+MAX_TRANSITIONS = 10000
+
+TRANSITION_SQL = """
+WITH requested AS (
+    SELECT DISTINCT ON (id) id, hours, position
+    FROM unnest(%(ids)s::bigint[], %(hours)s::integer[]) WITH ORDINALITY AS r (id, hours, position)
+    ORDER BY id, position
+),
+current AS (
+    SELECT h.id, h.status, o.hours_required, o.created_by_id
+    FROM {history} h JOIN {opportunity} o ON o.id = h.opportunity_id
+    WHERE h.id IN (SELECT id FROM requested)
+),
+updated AS (
+    UPDATE {history} h SET
+        status = %(to_status)s,
+        updated_at = now(),
+        hours_contributed = CASE WHEN %(credit)s
+            THEN COALESCE(r.hours, NULLIF(h.hours_contributed, 0), c.hours_required)
+            ELSE h.hours_contributed END,
+        end_date = CASE WHEN %(credit)s THEN COALESCE(h.end_date, now()) ELSE h.end_date END
+    FROM requested r JOIN current c ON c.id = r.id
+    WHERE h.id = r.id
+        AND h.status = ANY(%(from_statuses)s)
+        AND (%(any_opportunity)s OR c.created_by_id = %(actor_id)s)
+    RETURNING h.id, h.user_id, h.hours_contributed
+),
+credited AS (
+    UPDATE {profile} p SET volunteer_hours = p.volunteer_hours + totals.hours, updated_at = now()
+    FROM (SELECT user_id, sum(hours_contributed) AS hours FROM updated GROUP BY user_id) totals
+    WHERE %(credit)s AND p.user_id = totals.user_id
+    RETURNING p.user_id
+)
+SELECT r.id, c.status, c.created_by_id, u.id IS NOT NULL, u.hours_contributed
+FROM requested r
+LEFT JOIN current c ON c.id = r.id
+LEFT JOIN updated u ON u.id = r.id
+ORDER BY r.position
+"""
+
+
+class TransitionError(ValueError):
+    pass
+
+
+def bulk_transition(items, to_status, actor):
+    """
+    ``items`` are history ids, or ``(id, hours)`` pairs where hours overrides what is
+    credited on completion (default: hours already recorded, else the opportunity's
+    hours_required). Staff may move any row, organizers only rows of their own
+    opportunities. Returns one result dict per distinct id, in request order.
+    """
+    if to_status not in ALLOWED_TRANSITIONS:
+        raise TransitionError(f'status must be one of {", ".join(ALLOWED_TRANSITIONS)}')
+    ids, hours = [], []
+    for item in items:
+        history_id, item_hours = item if isinstance(item, (list, tuple)) else (item, None)
+        if item_hours is not None and (not isinstance(item_hours, int) or item_hours < 0):
+            raise TransitionError(f'hours for {history_id} must be a non-negative integer')
+        ids.append(int(history_id))
+        hours.append(item_hours)
+    if not ids:
+        return []
+    if len(ids) > MAX_TRANSITIONS:
+        raise TransitionError(f'At most {MAX_TRANSITIONS} transitions per request')
+
+    credit = to_status in CREDITING_STATUSES
+    sql = TRANSITION_SQL.format(
+        history=VolunteerHistory._meta.db_table,
+        opportunity=VolunteerOpportunity._meta.db_table,
+        profile=UserProfile._meta.db_table,
+    )
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(sql, {
+            'ids': ids,
+            'hours': hours,
+            'to_status': to_status,
+            'from_statuses': ALLOWED_TRANSITIONS[to_status],
+            'credit': credit,
+            'any_opportunity': actor.is_staff,
+            'actor_id': actor.pk,
+        })
+        rows = cursor.fetchall()
+
+    results = []
+    for history_id, current_status, created_by_id, updated, hours_contributed in rows:
+        result = {'id': history_id, 'from': current_status, 'to': to_status}
+        if updated:
+            result.update(success=True, hours_credited=hours_contributed if credit else 0)
+        elif current_status is None:
+            result.update(success=False, error='Application not found')
+        elif not actor.is_staff and created_by_id != actor.pk:
+            result.update(success=False, error='Not an application to your opportunity')
+        else:
+            result.update(success=False, error=f'Cannot move from {current_status} to {to_status}')
+        results.append(result)
+    return results
@@ -1,6 +1,6 @@
 # profiles/urls.py
 from django.urls import path
-from . import views, auth_views  # Add auth_views import
+from . import views
 
 app_name = 'profiles'
 
@@ -9,16 +9,19 @@ urlpatterns = [
     path('profile/', views.get_user_profile, name='get_profile'),
     path('profile/update/', views.update_user_profile, name='update_profile'),
     path('users/', views.get_all_users, name='all_users'),
+    path('staff/search/', views.staff_search, name='staff_search'),
+    path('volunteers/search/', views.search_volunteers, name='search_volunteers'),
+    path('skills/autocomplete/', views.skill_autocomplete, name='skill_autocomplete'),
+    path('pictures/<slug:digest>/<slug:variant>.<slug:extension>', views.profile_picture_variant, name='picture_variant'),
     
     # Volunteer opportunities
     path('opportunities/', views.get_volunteer_opportunities, name='opportunities'),
+    path('opportunities/trending/', views.trending_opportunities, name='trending_opportunities'),
     path('opportunities/create/', views.create_volunteer_opportunity, name='create_opportunity'),
     path('opportunities/<int:opportunity_id>/apply/', views.apply_for_opportunity, name='apply_opportunity'),
+    path('opportunities/<int:opportunity_id>/view/', views.record_opportunity_view, name='record_opportunity_view'),
     
     # Volunteer history
     path('history/', views.get_user_volunteer_history, name='user_history'),
-    
-    # Social authentication endpoints - ADD THESE
-    path('social/login/', auth_views.social_login, name='social_login'),
-    path('social/logout/', auth_views.social_logout, name='social_logout'),
+    path('history/transition/', views.transition_volunteer_history, name='transition_history'),
 ]
\ No newline at end of file
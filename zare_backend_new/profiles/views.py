@@ -1,18 +1,166 @@
 # profiles/views.py
+from datetime import datetime, time
+
 from rest_framework import status
-from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
+from rest_framework.permissions import AllowAny, IsAuthenticated, IsAuthenticatedOrReadOnly
 from rest_framework.response import Response
+from django.conf import settings
 from django.contrib.auth.models import User
-from .models import UserProfile, VolunteerOpportunity, VolunteerHistory
-from .serializers import UserProfileSerializer, VolunteerOpportunitySerializer, VolunteerHistorySerializer
+from django.http import FileResponse
+from django.utils.cache import get_conditional_response
+from django.db import DataError, IntegrityError, transaction
+from django.db.models import Count, F, Max, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from contact.models import ContactSubmission
+from contact.serializers import ContactSubmissionSerializer
+from zare_backend_new.auth_backends import normalize_email
+from zare_backend_new.db_routers import pin_to_primary, use_replicas
+from zare_backend_new.search import trigram_match_ids, trigram_rank
+from . import events, profile_cache, taxonomy
+from .availability import availability_to_mask, filter_available
+from .conditional import conditional_view
+from .idempotency import idempotent
+from .images import FORMATS, VARIANTS, get_variant, variant_etag
+from .models import (
+    ArchivedVolunteerHistory, ArchivedVolunteerOpportunity, OpportunityStats, UserProfile, VolunteerHistory,
+    VolunteerOpportunity,
+)
+from .pagination import ArchivedOpportunitiesCursorPagination, NewestProfilesCursorPagination
+from .permissions import IsOrganizer
+from .serializers import (
+    ArchivedVolunteerHistorySerializer, ArchivedVolunteerOpportunitySerializer, OpportunityStatsSerializer,
+    UserProfileSerializer, VolunteerOpportunitySerializer, VolunteerHistorySerializer, VolunteerSearchResultSerializer,
+)
+from .throttles import OpportunityViewThrottle
+from .transitions import TransitionError, bulk_transition
+
+STAFF_SEARCH_SCOPES = {
+    'users': (
+        UserProfile.objects.select_related('user'),
+        ('user__username', 'user__email', 'user__first_name', 'user__last_name', 'phone'),
+        UserProfileSerializer,
+    ),
+    'contacts': (
+        ContactSubmission.objects.all(),
+        ('first_name', 'last_name', 'email'),
+        ContactSubmissionSerializer,
+    ),
+}
+STAFF_SEARCH_MAX_LIMIT = 100
+TRENDING_MAX_LIMIT = 100
+TRENDING_SORTS = {
+    'trending': ['-trend'],
+    'views': ['-views', '-trend'],
+    'applications': ['-applications', '-trend'],
+    'conversion': ['-conversion', '-views'],
+}
+
+# Query parameter -> JSON list field searched with containment (@>)
+VOLUNTEER_SEARCH_LIST_FIELDS = {
+    'skills': 'volunteer_skills',
+    'interests': 'volunteer_interests',
+    'certifications': 'certifications',
+}
+
+def flag_param(request, name):
+    return request.query_params.get(name, '').lower() in ('1', 'true', 'yes')
+
+def split_param(value):
+    return [item.strip() for item in (value or '').split(',') if item.strip()]
+
+def containment_filter(field, fragments, match_all):
+    """
+    ``fragments`` are single-value containment documents ([value] or {key: true}).
+    AND merges them into one @> test, OR tests each one; both use the jsonb_path_ops GIN index.
+    """
+    if match_all:
+        if isinstance(fragments[0], dict):
+            merged = {key: value for fragment in fragments for key, value in fragment.items()}
+        else:
+            merged = [value for fragment in fragments for value in fragment]
+        return Q(**{f'{field}__contains': merged})
+    condition = Q()
+    for fragment in fragments:
+        condition |= Q(**{f'{field}__contains': fragment})
+    return condition
+
+def profile_metadata(request):
+    """ETag/Last-Modified source for the profile: saving the user also touches the profile"""
+    profile = profile_cache.get_profile(request.user)
+    if profile is None:
+        return None
+    return (profile.id, profile.updated_at.isoformat()), profile.updated_at
+
+def opportunities_metadata(request):
+    """ETag/Last-Modified source for the opportunity listing (open, or everything with include_archived)"""
+    if flag_param(request, 'include_archived'):
+        stats = VolunteerOpportunity.objects.aggregate(count=Count('id'), latest=Max('updated_at'))
+        archived = ArchivedVolunteerOpportunity.objects.aggregate(count=Count('id'), latest=Max('archived_at'))
+        # Each page of archived_opportunities is a different body
+        page = [request.query_params.get(param, '') for param in (
+            ArchivedOpportunitiesCursorPagination.cursor_query_param,
+            ArchivedOpportunitiesCursorPagination.page_size_query_param,
+        )]
+    else:
+        # An opportunity expiring changes the count, and therefore the ETag
+        stats = VolunteerOpportunity.objects.open().aggregate(count=Count('id'), latest=Max('updated_at'))
+        archived = {'count': None, 'latest': None}
+        page = []
+    timestamps = [ts for ts in (stats['latest'], archived['latest']) if ts]
+    latest = max(timestamps) if timestamps else None
+    return (stats['count'], archived['count'], *page, *(ts.isoformat() for ts in timestamps)), latest
+
+def history_range(request):
+    """
+    created_at bounds from ?since= / ?until= (ISO dates or datetimes); bounded queries
+    only touch the matching monthly partitions of VolunteerHistory
+    """
+    bounds = Q()
+    for param, lookup in (('since', 'created_at__gte'), ('until', 'created_at__lt')):
+        value = request.query_params.get(param)
+        if value:
+            parsed = parse_datetime(value)
+            if parsed is None:
+                day = parse_date(value)
+                if day is None:
+                    raise ValueError(f'{param} must be an ISO date or datetime')
+                parsed = datetime.combine(day, time.min)
+            if timezone.is_naive(parsed):
+                parsed = timezone.make_aware(parsed)
+            bounds &= Q(**{lookup: parsed})
+    return bounds
+
+def history_metadata(request):
+    """ETag/Last-Modified source for the user's history, including the nested opportunities"""
+    try:
+        bounds = history_range(request)
+    except ValueError:
+        return None
+    stats = VolunteerHistory.objects.filter(bounds, user=request.user).aggregate(
+        count=Count('id'),
+        latest=Max('updated_at'),
+        opportunity_latest=Max('opportunity__updated_at'),
+    )
+    archived = ArchivedVolunteerHistory.objects.filter(bounds, user=request.user).aggregate(
+        count=Count('id'), latest=Max('archived_at')
+    )
+    timestamps = [ts for ts in (stats['latest'], stats['opportunity_latest'], archived['latest']) if ts]
+    latest = max(timestamps) if timestamps else None
+    return (stats['count'], archived['count'], *(ts.isoformat() for ts in timestamps)), latest
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@use_replicas
+@conditional_view(profile_metadata)
 def get_user_profile(request):
     """Get current user's complete profile"""
     try:
-        profile, created = UserProfile.objects.get_or_create(user=request.user)
+        # get_or_create() always reads from the primary; only fall back to it when missing
+        profile = profile_cache.get_profile(request.user)
+        if profile is None:
+            profile, created = UserProfile.objects.get_or_create(user=request.user)
         serializer = UserProfileSerializer(profile)
         
         return Response({
@@ -30,33 +178,43 @@ def get_user_profile(request):
 def update_user_profile(request):
     """Update user profile"""
     try:
-        profile, created = UserProfile.objects.get_or_create(user=request.user)
-        
-        # Update user basic info
-        user = request.user
-        if 'first_name' in request.data:
-            user.first_name = request.data['first_name']
-        if 'last_name' in request.data:
-            user.last_name = request.data['last_name']
-        if 'email' in request.data:
-            user.email = request.data['email']
-        user.save()
-        
-        # Update profile
-        serializer = UserProfileSerializer(profile, data=request.data, partial=True)
-        if serializer.is_valid():
-            serializer.save()
+        with transaction.atomic():
+            # Not the cached copy: saving it would write back fields (e.g. volunteer_hours)
+            # that changed since it was cached. Read from the primary and locked instead.
+            profile, created = UserProfile.objects.select_for_update().get_or_create(user=request.user)
+            user = profile.user = request.user
             
-            return Response({
-                'success': True,
-                'message': 'Profile updated successfully',
-                'profile': serializer.data
-            })
-        else:
-            return Response({
-                'success': False,
-                'error': serializer.errors
-            }, status=status.HTTP_400_BAD_REQUEST)
+            serializer = UserProfileSerializer(profile, data=request.data, partial=True)
+            if not serializer.is_valid():
+                return Response({
+                    'success': False,
+                    'error': serializer.errors
+                }, status=status.HTTP_400_BAD_REQUEST)
+            
+            # Update user basic info
+            if 'first_name' in request.data:
+                user.first_name = request.data['first_name']
+            if 'last_name' in request.data:
+                user.last_name = request.data['last_name']
+            if 'email' in request.data:
+                user.email = normalize_email(request.data['email'])
+            # The case-insensitive unique email index decides, as in signup
+            try:
+                with transaction.atomic():
+                    user.save()
+            except IntegrityError:
+                return Response({
+                    'success': False,
+                    'error': 'Email already exists'
+                }, status=status.HTTP_400_BAD_REQUEST)
+            serializer.save()
+        pin_to_primary(user)
+        
+        return Response({
+            'success': True,
+            'message': 'Profile updated successfully',
+            'profile': serializer.data
+        })
             
     except Exception as e:
         return Response({
@@ -66,6 +224,7 @@ def update_user_profile(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@use_replicas
 def get_all_users(request):
     """Get all users with profiles (admin only)"""
     try:
@@ -75,7 +234,7 @@ def get_all_users(request):
                 'error': 'Admin access required'
             }, status=status.HTTP_403_FORBIDDEN)
         
-        profiles = UserProfile.objects.all().order_by('-created_at')
+        profiles = UserProfile.objects.select_related('user').order_by('-created_at')
         serializer = UserProfileSerializer(profiles, many=True)
         
         return Response({
@@ -91,17 +250,34 @@ def get_all_users(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticatedOrReadOnly])
+@use_replicas
+@conditional_view(opportunities_metadata)
 def get_volunteer_opportunities(request):
-    """Get all volunteer opportunities"""
+    """
+    Get open volunteer opportunities. ?include_archived=true also returns postings past
+    their deadline, and one page of the archived ones under "archived_opportunities"
+    (?archived_cursor= from "archived_next" fetches the next page).
+    """
     try:
-        opportunities = VolunteerOpportunity.objects.all().order_by('-date_posted')
+        include_archived = flag_param(request, 'include_archived')
+        opportunities = VolunteerOpportunity.objects.select_related('created_by').order_by('-date_posted')
+        if not include_archived:
+            opportunities = opportunities.open()
         serializer = VolunteerOpportunitySerializer(opportunities, many=True)
         
-        return Response({
+        data = {
             'success': True,
             'count': len(serializer.data),
             'opportunities': serializer.data
-        })
+        }
+        if include_archived:
+            archived = ArchivedVolunteerOpportunity.objects.select_related('created_by')
+            paginator = ArchivedOpportunitiesCursorPagination()
+            page = paginator.paginate_queryset(archived, request)
+            data['archived_opportunities'] = ArchivedVolunteerOpportunitySerializer(page, many=True).data
+            data['archived_next'] = paginator.get_next_link()
+            data['archived_previous'] = paginator.get_previous_link()
+        return Response(data)
     except Exception as e:
         return Response({
             'success': False,
@@ -110,12 +286,14 @@ def get_volunteer_opportunities(request):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@idempotent
 def create_volunteer_opportunity(request):
     """Create a new volunteer opportunity"""
     try:
         serializer = VolunteerOpportunitySerializer(data=request.data)
         if serializer.is_valid():
             serializer.save(created_by=request.user)
+            pin_to_primary(request.user)
             
             return Response({
                 'success': True,
@@ -136,16 +314,34 @@ def create_volunteer_opportunity(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@use_replicas
+@conditional_view(history_metadata)
 def get_user_volunteer_history(request):
-    """Get current user's volunteer history"""
+    """
+    Get current user's volunteer history, including entries for archived opportunities.
+    Optional ?since= / ?until= limit it to a created_at range.
+    """
     try:
-        history = VolunteerHistory.objects.filter(user=request.user).order_by('-created_at')
-        serializer = VolunteerHistorySerializer(history, many=True)
+        bounds = history_range(request)
+        history = list(VolunteerHistory.objects.filter(bounds, user=request.user).select_related(
+            'user', 'opportunity__created_by'
+        ).order_by('-created_at'))
+        archived = list(ArchivedVolunteerHistory.objects.filter(bounds, user=request.user).select_related(
+            'user', 'opportunity__created_by'
+        ).order_by('-created_at'))
+        # Merged on the datetimes: the serialized strings carry local UTC offsets, which
+        # do not sort chronologically across a DST change
+        rows = [
+            *zip(history, VolunteerHistorySerializer(history, many=True).data),
+            *zip(archived, ArchivedVolunteerHistorySerializer(archived, many=True).data),
+        ]
+        rows.sort(key=lambda row: row[0].created_at, reverse=True)
+        entries = [entry for _, entry in rows]
         
         return Response({
             'success': True,
-            'count': len(serializer.data),
-            'history': serializer.data
+            'count': len(entries),
+            'history': entries
         })
     except Exception as e:
         return Response({
@@ -155,11 +351,18 @@ def get_user_volunteer_history(request):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@idempotent
 def apply_for_opportunity(request, opportunity_id):
     """Apply for a volunteer opportunity"""
     try:
         opportunity = VolunteerOpportunity.objects.get(id=opportunity_id)
         
+        if opportunity.deadline and opportunity.deadline < timezone.now():
+            return Response({
+                'success': False,
+                'error': 'This opportunity is no longer accepting applications'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
         # Check if user already applied
         if VolunteerHistory.objects.filter(user=request.user, opportunity=opportunity).exists():
             return Response({
@@ -174,6 +377,8 @@ def apply_for_opportunity(request, opportunity_id):
             start_date=request.data.get('start_date'),
             status='applied'
         )
+        pin_to_primary(request.user)
+        events.record_apply(opportunity.id, request.user)
         
         serializer = VolunteerHistorySerializer(history)
         
@@ -192,4 +397,257 @@ def apply_for_opportunity(request, opportunity_id):
         return Response({
             'success': False,
             'error': str(e)
-        }, status=status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+@throttle_classes([OpportunityViewThrottle])
+def record_opportunity_view(request, opportunity_id):
+    """
+    Count one view of an opportunity. The client sends it when a posting is actually
+    opened or shown; the listing itself records nothing. Rate limited per client, and
+    repeats from the same client within OPPORTUNITY_VIEW_DEDUPE_SECONDS are not counted.
+    Buffered, so no database query runs here: views of unknown or archived
+    opportunities are dropped when the buffer flushes.
+    """
+    if OpportunityViewThrottle().first_view(request, opportunity_id):
+        events.record_views([opportunity_id], request.user)
+    return Response({'success': True}, status=status.HTTP_202_ACCEPTED)
+
+@api_view(['POST'])
+@permission_classes([IsOrganizer])
+@idempotent
+def transition_volunteer_history(request):
+    """
+    Move applications to a new status in one statement.
+    Body: {"status": "completed", "ids": [1, 2]} or {"status": ..., "items": [{"id": 1, "hours": 4}]}
+    """
+    try:
+        if 'items' in request.data:
+            items = [(item['id'], item.get('hours')) for item in request.data['items']]
+        else:
+            items = request.data.get('ids') or []
+        results = bulk_transition(items, request.data.get('status'), request.user)
+        pin_to_primary(request.user)
+
+        updated = sum(1 for result in results if result['success'])
+        return Response({
+            'success': True,
+            'updated': updated,
+            'skipped': len(results) - updated,
+            'results': results
+        })
+
+    # DataError: ids or hours out of range for their columns
+    except (TransitionError, DataError, KeyError, TypeError, ValueError) as e:
+        return Response({
+            'success': False,
+            'error': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+@use_replicas
+def trending_opportunities(request):
+    """
+    Open opportunities ranked from the per-opportunity counters only. ?sort=trending
+    (recent views and applications, the default), views, applications or conversion
+    (applications per view, among postings with at least TRENDING_MIN_VIEWS views).
+    """
+    try:
+        sort = request.query_params.get('sort', 'trending')
+        if sort not in TRENDING_SORTS:
+            return Response({
+                'success': False,
+                'error': f'sort must be one of {", ".join(TRENDING_SORTS)}'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        limit = min(int(request.query_params.get('limit', 20)), TRENDING_MAX_LIMIT)
+        
+        now = timezone.now()
+        stats = OpportunityStats.objects.filter(
+            Q(opportunity__deadline__isnull=True) | Q(opportunity__deadline__gte=now)
+        ).select_related('opportunity__created_by')
+        if sort == 'conversion':
+            stats = stats.filter(views__gte=settings.TRENDING_MIN_VIEWS).annotate(
+                conversion=F('applications') * 1.0 / F('views')
+            )
+        stats = stats.order_by(*TRENDING_SORTS[sort])[:limit]
+        data = OpportunityStatsSerializer(stats, many=True).data
+        
+        return Response({
+            'success': True,
+            'sort': sort,
+            'count': len(data),
+            'opportunities': data
+        })
+    except Exception as e:
+        return Response({
+            'success': False,
+            'error': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def skill_autocomplete(request):
+    """Skills whose name or alias has a word starting with ?q=, from the in-memory trie"""
+    try:
+        prefix = request.query_params.get('q', '').strip()
+        limit = min(int(request.query_params.get('limit', 10)), settings.SKILL_AUTOCOMPLETE_LIMIT)
+        results = taxonomy.get_taxonomy().complete(prefix, limit) if prefix else []
+        
+        return Response({
+            'success': True,
+            'count': len(results),
+            'results': results
+        })
+    except Exception as e:
+        return Response({
+            'success': False,
+            'error': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@use_replicas
+def staff_search(request):
+    """Typo-tolerant search over users (?scope=users) or contact submissions (?scope=contacts), staff only"""
+    try:
+        if not request.user.is_staff:
+            return Response({
+                'success': False,
+                'error': 'Admin access required'
+            }, status=status.HTTP_403_FORBIDDEN)
+        
+        term = request.query_params.get('q', '').strip()
+        scope = request.query_params.get('scope', 'users')
+        if not term or scope not in STAFF_SEARCH_SCOPES:
+            return Response({
+                'success': False,
+                'error': f'q and a scope of {", ".join(STAFF_SEARCH_SCOPES)} are required'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        limit = min(int(request.query_params.get('limit', 20)), STAFF_SEARCH_MAX_LIMIT)
+        
+        queryset, fields, serializer_class = STAFF_SEARCH_SCOPES[scope]
+        matches = list(queryset.filter(pk__in=trigram_match_ids(queryset, fields, term)).annotate(
+            score=trigram_rank(fields, term)
+        ).order_by('-score')[:limit])
+        data = serializer_class(matches, many=True).data
+        results = [
+            {**item, 'score': round(match.score, 3)}
+            for item, match in zip(data, matches)
+        ]
+        
+        return Response({
+            'success': True,
+            'count': len(results),
+            'results': results
+        })
+    except Exception as e:
+        return Response({
+            'success': False,
+            'error': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+@api_view(['GET'])
+@permission_classes([IsOrganizer])
+@use_replicas
+def search_volunteers(request):
+    """
+    Find volunteers for organizers, e.g.
+    ?skills=teaching,first_aid&availability=weekends&match=all (or match=any)
+    Skills, interests and certifications may be names, aliases or ids.
+    ?opportunity=<id> keeps volunteers available for that opportunity's whole schedule
+    
+    Volunteers whose privacy_settings set "searchable": false are never returned.
+    """
+    try:
+        match_all = request.query_params.get('match', 'all') != 'any'
+        condition = Q()
+        for param, field in VOLUNTEER_SEARCH_LIST_FIELDS.items():
+            values = split_param(request.query_params.get(param))
+            if values:
+                values = [int(value) if value.isdigit() else value for value in values]
+                skill_ids = taxonomy.search_ids(values)
+                condition &= containment_filter(field, [[skill_id] for skill_id in skill_ids], match_all)
+        
+        volunteers = UserProfile.objects.select_related('user').filter(
+            condition, user__is_active=True
+        ).exclude(privacy_settings__contains={'searchable': False})
+        
+        # Schedule matching is a single bitwise predicate on availability_mask
+        slots = split_param(request.query_params.get('availability'))
+        if slots:
+            wanted = availability_to_mask({slot: True for slot in slots})
+            if not wanted:
+                return Response({
+                    'success': False,
+                    'error': f'Unknown availability: {", ".join(slots)}'
+                }, status=status.HTTP_400_BAD_REQUEST)
+            volunteers = filter_available(volunteers, wanted, full_coverage=match_all)
+        opportunity_id = request.query_params.get('opportunity')
+        if opportunity_id:
+            shift_mask = VolunteerOpportunity.objects.filter(id=opportunity_id).values_list(
+                'shift_mask', flat=True
+            ).first()
+            if shift_mask is None:
+                return Response({
+                    'success': False,
+                    'error': 'Opportunity not found'
+                }, status=status.HTTP_404_NOT_FOUND)
+            if shift_mask:
+                volunteers = filter_available(volunteers, shift_mask)
+        
+        paginator = NewestProfilesCursorPagination()
+        page = paginator.paginate_queryset(volunteers, request)
+        serializer = VolunteerSearchResultSerializer(page, many=True)
+        
+        return Response({
+            'success': True,
+            'next': paginator.get_next_link(),
+            'previous': paginator.get_previous_link(),
+            'results': serializer.data
+        })
+    except Exception as e:
+        return Response({
+            'success': False,
+            'error': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+# Variant URLs name the picture's content, so responses never go stale
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+def picture_for_digest(digest):
+    profile = UserProfile.objects.filter(picture_digest=digest).exclude(
+        profile_picture=''
+    ).only('profile_picture').first()
+    return profile.profile_picture if profile else None
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def profile_picture_variant(request, digest, variant, extension):
+    """Resized profile picture, rendered on first request (see profiles.images)"""
+    try:
+        if variant not in VARIANTS or extension not in FORMATS or len(digest) != 64:
+            return Response({
+                'success': False,
+                'error': 'Unknown image variant'
+            }, status=status.HTTP_404_NOT_FOUND)
+        
+        etag = variant_etag(digest, variant, extension)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            path = get_variant(digest, variant, extension, picture_for_digest)
+            if path is None:
+                return Response({
+                    'success': False,
+                    'error': 'Image not found'
+                }, status=status.HTTP_404_NOT_FOUND)
+            response = FileResponse(open(path, 'rb'), content_type=FORMATS[extension][1])
+            response['ETag'] = etag
+        response['Cache-Control'] = f'public, max-age={IMMUTABLE_MAX_AGE}, immutable'
+        return response
+    except Exception as e:
+        return Response({
+            'success': False,
+            'error': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,52 @@
+# zare_backend_new/admin_tools.py
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+def estimated_row_count(queryset):
+    """
+    Planner estimate of the table's row count (pg_class.reltuples), or None if unknown.
+    Partitioned tables have no estimate of their own, so their partitions are summed.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT CASE WHEN parent.relkind = 'p' THEN (
+                SELECT SUM(GREATEST(child.reltuples, 0))
+                FROM pg_inherits JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+                WHERE pg_inherits.inhparent = parent.oid
+            ) ELSE parent.reltuples END::bigint
+            FROM pg_class parent WHERE parent.oid = %s::regclass
+            """,
+            [queryset.model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    return row[0] if row and row[0] is not None and row[0] >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Use the planner's estimate instead of COUNT(*) for unfiltered changelists on large
+    tables. Filtered or searched changelists, and small tables, still count exactly.
+    """
+
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, 'query', None)
+        if query is not None and not query.where:
+            estimate = estimated_row_count(self.object_list)
+            if estimate is not None and estimate >= settings.ADMIN_ESTIMATED_COUNT_THRESHOLD:
+                return estimate
+        return super().count
+
+
+class LargeTableAdminMixin:
+    """Changelist defaults for tables with millions of rows"""
+    paginator = EstimatedCountPaginator
+    # Skip the second, unfiltered COUNT(*) behind "N results (M total)"
+    show_full_result_count = False
@@ -0,0 +1,50 @@
+# zare_backend_new/auth_backends.py
+"""
+Case-insensitive email lookups served by the ``auth_user_email_ci_uniq`` index.
+
+The index (created by profiles migration 0015) is ``UNIQUE (lower(NULLIF(email, '')))``:
+blank emails are exempt, and two accounts can never share an address that differs only
+in case. Queries must use the same expression to be served by it, hence
+``users_by_email()`` rather than ``email__iexact`` (which Django compiles to UPPER()).
+"""
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.models import BaseUserManager, User
+from django.db.models import Value
+from django.db.models.functions import Lower, NullIf
+
+EMAIL_INDEX = 'auth_user_email_ci_uniq'
+
+
+def normalize_email(email):
+    """Trimmed address with a lowercased domain, as stored"""
+    return BaseUserManager.normalize_email((email or '').strip())
+
+
+def users_by_email(email, queryset=None):
+    """Users whose email matches ``email`` ignoring case (at most one, given the index)"""
+    queryset = User.objects.all() if queryset is None else queryset
+    email = normalize_email(email)
+    if not email:
+        return queryset.none()
+    return queryset.alias(email_key=Lower(NullIf('email', Value('')))).filter(email_key=email.lower())
+
+
+def get_user_by_email(email, queryset=None):
+    return users_by_email(email, queryset).first()
+
+
+class EmailBackend(ModelBackend):
+    """Password login by email address; usernames fall through to ModelBackend"""
+
+    def authenticate(self, request, username=None, password=None, email=None, **kwargs):
+        email = email or username
+        if not email or '@' not in email or password is None:
+            return None
+        user = get_user_by_email(email)
+        if user is None:
+            # Hash anyway so response time does not reveal which addresses exist
+            User().set_password(password)
+            return None
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
@@ -6,28 +6,36 @@ from rest_framework.response import Response
 from rest_framework.authtoken.models import Token
 from django.contrib.auth import authenticate
 from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+from .auth_backends import normalize_email
+from profiles.idempotency import idempotent
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@idempotent
 def signup(request):
     try:
-        email = request.data.get('email')
+        email = normalize_email(request.data.get('email'))
         password = request.data.get('password')
         first_name = request.data.get('first_name', '')
         last_name = request.data.get('last_name', '')
         
-        if User.objects.filter(email=email).exists():
-            return Response({'error': 'Email already exists'}, status=400)
-        
-        user = User.objects.create_user(
-            username=email,
-            email=email,
-            password=password,
-            first_name=first_name,
-            last_name=last_name
-        )
+        if not email or not password:
+            return Response({'error': 'Email and password are required'}, status=400)
         
-        token, created = Token.objects.get_or_create(user=user)
+        # The case-insensitive unique email index (and the username) decide races, not a pre-check
+        try:
+            with transaction.atomic():
+                user = User.objects.create_user(
+                    username=email,
+                    email=email,
+                    password=password,
+                    first_name=first_name,
+                    last_name=last_name
+                )
+                token = Token.objects.create(user=user)
+        except IntegrityError:
+            return Response({'error': 'Email already exists'}, status=400)
         
         return Response({
             'token': token.key,
@@ -48,7 +56,7 @@ def login(request):
         email = request.data.get('email')
         password = request.data.get('password')
         
-        user = authenticate(username=email, password=password)
+        user = authenticate(request, username=email, password=password)
         
         if user:
             token, created = Token.objects.get_or_create(user=user)
@@ -0,0 +1,166 @@
+# zare_backend_new/db_routers.py
+"""
+Read-replica routing.
+
+Reads go to a replica only inside ``replica_reads()`` (or views decorated with
+``use_replicas``), and only while the user is not pinned to the primary. Writes
+pin the user for ``READ_YOUR_WRITES_SECONDS`` so they always see their own changes.
+Replicas lagging more than ``REPLICA_MAX_LAG_SECONDS`` (or unreachable) are skipped.
+
+Pins live in the default cache, which must be shared by every worker process (Redis,
+see REDIS_URL in settings); ``check_pin_cache`` makes ``manage.py check`` warn when
+replicas are configured over a per-process cache.
+
+Local setup with two Postgres instances: run the second one on port 5433 (a streaming
+replica, or any copy of the database) and start Django with
+``DATABASE_REPLICA_HOSTS=localhost:5433``.
+"""
+import contextvars
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import cache
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+_replica_reads = contextvars.ContextVar('replica_reads', default=False)
+
+REPLICA_LAG_SQL = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+
+def _pin_key(user_id):
+    return f'db:pin-primary:{user_id}'
+
+
+def pin_to_primary(user):
+    """Route this user's reads to the primary for READ_YOUR_WRITES_SECONDS"""
+    if user is not None and user.is_authenticated and settings.DATABASE_REPLICAS:
+        cache.set(_pin_key(user.pk), True, settings.READ_YOUR_WRITES_SECONDS)
+
+
+def is_pinned(user):
+    return user is not None and user.is_authenticated and bool(cache.get(_pin_key(user.pk)))
+
+
+# Backends whose entries are only visible to the process that wrote them
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def check_pin_cache(app_configs, **kwargs):
+    backend = settings.CACHES['default']['BACKEND']
+    if settings.DATABASE_REPLICAS and backend in PROCESS_LOCAL_CACHES:
+        return [checks.Warning(
+            'Read replicas are configured but the default cache is per-process, so a write '
+            'handled by one worker does not pin the user to the primary in the others.',
+            hint='Set REDIS_URL so read-your-writes pins are shared.',
+            id='zare.W001',
+        )]
+    return []
+
+
+class ReplicaHealth:
+    """Per-process view of which replicas are reachable and close enough to the primary"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._checked_at = None
+        self._healthy = []
+
+    def healthy_replicas(self):
+        interval = settings.REPLICA_HEALTH_CHECK_INTERVAL
+        if self._checked_at is None or time.monotonic() - self._checked_at >= interval:
+            # Only one thread refreshes; the others keep using the previous result
+            if self._lock.acquire(blocking=self._checked_at is None):
+                try:
+                    self._healthy = [alias for alias in settings.DATABASE_REPLICAS if self._is_healthy(alias)]
+                    self._checked_at = time.monotonic()
+                finally:
+                    self._lock.release()
+        return self._healthy
+
+    def _is_healthy(self, alias):
+        try:
+            with connections[alias].cursor() as cursor:
+                cursor.execute(REPLICA_LAG_SQL)
+                lag = float(cursor.fetchone()[0])
+        except Exception as e:
+            logger.warning('Replica %s failed its health check: %s', alias, e)
+            return False
+        if lag > settings.REPLICA_MAX_LAG_SECONDS:
+            logger.warning('Replica %s is %.1fs behind the primary, skipping it', alias, lag)
+            return False
+        return True
+
+
+replica_health = ReplicaHealth()
+
+
+@contextmanager
+def replica_reads(user=None):
+    """Allow reads in this block to be served by a healthy replica"""
+    if not settings.DATABASE_REPLICAS or is_pinned(user):
+        yield
+        return
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def use_replicas(view_func):
+    """Serve a read-only view from replicas; apply it below ``@api_view`` so request.user is set"""
+    @wraps(view_func)
+    def _wrapped_view(request, *args, **kwargs):
+        with replica_reads(request.user):
+            return view_func(request, *args, **kwargs)
+    return _wrapped_view
+
+
+class ReplicaReadsAdminMixin:
+    """Serve admin changelist pages (GET only) from replicas"""
+
+    def changelist_view(self, request, extra_context=None):
+        if request.method != 'GET':
+            return super().changelist_view(request, extra_context)
+        with replica_reads(request.user):
+            response = super().changelist_view(request, extra_context)
+            # The changelist queryset is evaluated while rendering the template
+            if hasattr(response, 'render'):
+                response.render()
+            return response
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if _replica_reads.get():
+            healthy = replica_health.healthy_replicas()
+            if healthy:
+                return random.choice(healthy)
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.DATABASE_REPLICAS
@@ -0,0 +1,106 @@
+# zare_backend_new/diagnostics.py
+import os
+
+from django.conf import settings
+from django.db import connections
+from django.http import FileResponse, HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
+from rest_framework import status
+from rest_framework.response import Response
+
+from profiles import profile_cache
+
+from . import profiling
+from .metrics import render_prometheus
+
+
+def get_pool_stats():
+    """Connection pool statistics of this worker process, per database alias"""
+    stats = {}
+    for alias in connections:
+        pool = getattr(connections[alias], 'pool', None)
+        if pool is not None:
+            stats[alias] = pool.get_stats()
+    return stats
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def db_pool_stats(request):
+    """Expose connection pool statistics (staff only)"""
+    return Response({
+        'success': True,
+        'pid': os.getpid(),
+        'pools': get_pool_stats(),
+    })
+
+
+def _has_metrics_token(request):
+    keyword, _, token = request.META.get('HTTP_AUTHORIZATION', '').partition(' ')
+    return bool(settings.METRICS_TOKEN) and keyword.lower() == 'bearer' and constant_time_compare(
+        token.strip(), settings.METRICS_TOKEN
+    )
+
+
+def prometheus_metrics(request):
+    """Per-route request histograms and pool gauges in Prometheus text format"""
+    if not _has_metrics_token(request) and not request.user.is_staff:
+        return HttpResponseForbidden()
+
+    lines = [render_prometheus()]
+    pool_stats = get_pool_stats()
+    for name, stat in (('pool_size', 'pool_size'), ('pool_available', 'pool_available'),
+                       ('pool_requests_waiting', 'requests_waiting')):
+        lines.append(f'# TYPE zare_db_{name} gauge')
+        for alias, stats in pool_stats.items():
+            lines.append(f'zare_db_{name}{{database="{alias}"}} {stats.get(stat, 0)}')
+    cache_stats = profile_cache.cache.stats()
+    lines.append('# TYPE zare_profile_cache_lookups_total counter')
+    for result in ('hits', 'misses', 'bypasses'):
+        lines.append(f'zare_profile_cache_lookups_total{{result="{result}"}} {cache_stats[result]}')
+    for name in ('invalidations', 'evictions', 'reconnects'):
+        lines.append(f'# TYPE zare_profile_cache_{name}_total counter')
+        lines.append(f'zare_profile_cache_{name}_total {cache_stats[name]}')
+    for name in ('entries', 'listening'):
+        lines.append(f'# TYPE zare_profile_cache_{name} gauge')
+        lines.append(f'zare_profile_cache_{name} {int(cache_stats[name])}')
+    return HttpResponse('\n'.join(lines) + '\n', content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def profile_cache_stats(request):
+    """Hit/miss counters of this worker's profile cache (staff only)"""
+    return Response({
+        'success': True,
+        'enabled': settings.PROFILE_CACHE_ENABLED,
+        'cache': profile_cache.cache.stats(),
+    })
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def profiling_captures(request):
+    """List stored profiling captures, newest first (staff only)"""
+    captures = profiling.list_captures()
+    return Response({
+        'success': True,
+        'count': len(captures),
+        'captures': captures,
+    })
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def profiling_capture_download(request, name):
+    """Download a capture: ?format=folded (collapsed stacks, default) or ?format=json"""
+    suffix = '.json' if request.query_params.get('format') == 'json' else '.folded'
+    path = profiling.capture_path(name, suffix)
+    if path is None:
+        return Response({
+            'success': False,
+            'error': 'Capture not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+    return FileResponse(open(path, 'rb'), as_attachment=True, filename=path.name)
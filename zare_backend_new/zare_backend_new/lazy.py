@@ -0,0 +1,24 @@
+# zare_backend_new/lazy.py
+from django.utils.module_loading import import_string
+
+
+def lazy_view(dotted_path, csrf_exempt=True):
+    """
+    URL pattern target that imports ``dotted_path`` on its first request rather than
+    when the URLconf loads. ``csrf_exempt`` has to be declared up front because
+    CsrfViewMiddleware reads it from this wrapper; DRF views are exempt there and
+    enforce CSRF themselves.
+    """
+    module_name, _, view_name = dotted_path.rpartition('.')
+    view = None
+
+    def wrapper(request, *args, **kwargs):
+        nonlocal view
+        if view is None:
+            view = import_string(dotted_path)
+        return view(request, *args, **kwargs)
+
+    wrapper.__module__ = module_name
+    wrapper.__name__ = wrapper.__qualname__ = view_name
+    wrapper.csrf_exempt = csrf_exempt
+    return wrapper
@@ -0,0 +1,258 @@
+# zare_backend_new/metrics.py
+"""
+Per-request performance instrumentation.
+
+``RequestMetricsMiddleware`` measures total time, SQL query count/time, serializer time
+and external HTTP time for every request, reports them in a ``Server-Timing`` header
+and feeds per-route histograms rendered by ``render_prometheus()``. Histograms are kept
+per worker process. Code outside the middleware adds phases with ``timer('name')``.
+"""
+import contextvars
+import logging
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from time import perf_counter
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.backends.signals import connection_created
+from rest_framework import serializers
+
+logger = logging.getLogger(__name__)
+
+_current = contextvars.ContextVar('request_timings', default=None)
+
+PHASES = ('db', 'serializer', 'external')
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class RequestTimings:
+    __slots__ = ('durations', 'query_count')
+
+    def __init__(self):
+        self.durations = dict.fromkeys(PHASES, 0.0)
+        self.query_count = 0
+
+    def add(self, phase, seconds):
+        self.durations[phase] = self.durations.get(phase, 0.0) + seconds
+
+
+def current_timings():
+    """The RequestTimings of the request being handled, or None outside a request"""
+    return _current.get()
+
+
+@contextmanager
+def timer(phase):
+    """Add the time spent in the block to ``phase`` of the current request"""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    started = perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(phase, perf_counter() - started)
+
+
+def _sql_timer(execute, sql, params, many, context):
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    started = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.durations['db'] += perf_counter() - started
+        timings.query_count += 1
+
+
+def _install_sql_timer(sender, connection, **kwargs):
+    # Fires on every (pooled) connect, but the wrapper list lives as long as the DatabaseWrapper
+    if _sql_timer not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_sql_timer)
+
+
+connection_created.connect(_install_sql_timer)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+SAVEPOINT_STATEMENTS = ('SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT')
+
+
+class QueryBudget:
+    """
+    Count the queries a block sends to ``using``, leaving out the SAVEPOINT statements
+    of atomic blocks nested in an outer transaction. Going over ``limit`` raises
+    QueryBudgetExceeded with DEBUG on and logs a warning otherwise. Call ``waive()``
+    inside the block when a slower path (e.g. a first-time signup) is expected.
+    """
+
+    def __init__(self, limit, label, using=DEFAULT_DB_ALIAS):
+        self.limit = limit
+        self.label = label
+        self.using = using
+        self.count = 0
+        self.enforced = True
+
+    def _counter(self, execute, sql, params, many, context):
+        # Savepoints depend on whether the caller already opened a transaction, not on the block
+        if not sql.lstrip()[:21].upper().startswith(SAVEPOINT_STATEMENTS):
+            self.count += 1
+        return execute(sql, params, many, context)
+
+    def waive(self):
+        self.enforced = False
+
+    def __enter__(self):
+        connections[self.using].execute_wrappers.append(self._counter)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        connections[self.using].execute_wrappers.remove(self._counter)
+        if exc_type is not None or not self.enforced or self.count <= self.limit:
+            return
+        message = f'{self.label} ran {self.count} queries (budget {self.limit})'
+        if settings.DEBUG:
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
+
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'total', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._durations = {}
+        self._queries = {}
+
+    def record(self, route, method, timings, total):
+        with self._lock:
+            for phase, seconds in (('total', total), *timings.durations.items()):
+                key = (route, method, phase)
+                histogram = self._durations.get(key)
+                if histogram is None:
+                    histogram = self._durations[key] = Histogram(DURATION_BUCKETS)
+                histogram.observe(seconds)
+            histogram = self._queries.get((route, method))
+            if histogram is None:
+                histogram = self._queries[(route, method)] = Histogram(QUERY_COUNT_BUCKETS)
+            histogram.observe(timings.query_count)
+
+    def render(self):
+        lines = []
+        with self._lock:
+            self._render_histograms(
+                lines, 'zare_http_request_duration_seconds',
+                'Request time by route and phase (total, db, serializer, external)',
+                {(route, method, phase): {'route': route, 'method': method, 'phase': phase}
+                 for route, method, phase in self._durations},
+                self._durations,
+            )
+            self._render_histograms(
+                lines, 'zare_http_request_queries',
+                'SQL queries per request by route',
+                {(route, method): {'route': route, 'method': method} for route, method in self._queries},
+                self._queries,
+            )
+        return '\n'.join(lines) + '\n'
+
+    def _render_histograms(self, lines, name, description, labels, histograms):
+        lines.append(f'# HELP {name} {description}')
+        lines.append(f'# TYPE {name} histogram')
+        for key, histogram in sorted(histograms.items()):
+            label_text = ','.join(f'{k}="{_escape(v)}"' for k, v in labels[key].items())
+            cumulative = 0
+            for bound, count in zip((*histogram.buckets, '+Inf'), histogram.counts):
+                cumulative += count
+                lines.append(f'{name}_bucket{{{label_text},le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_sum{{{label_text}}} {histogram.total}')
+            lines.append(f'{name}_count{{{label_text}}} {histogram.count}')
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+registry = MetricsRegistry()
+
+
+def render_prometheus():
+    return registry.render()
+
+
+def route_name(request):
+    """Route pattern (bounded label cardinality) of the resolved view"""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    return match.route or match.view_name
+
+
+def server_timing_header(timings, total):
+    entries = [f'db;dur={timings.durations["db"] * 1000:.1f};desc="{timings.query_count} queries"']
+    for phase in PHASES[1:]:
+        if timings.durations[phase]:
+            entries.append(f'{phase};dur={timings.durations[phase] * 1000:.1f}')
+    entries.append(f'total;dur={total * 1000:.1f}')
+    return ', '.join(entries)
+
+
+class RequestMetricsMiddleware:
+    """Keep first in MIDDLEWARE so the total covers every other middleware"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timings = RequestTimings()
+        token = _current.set(timings)
+        started = perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        total = perf_counter() - started
+
+        response['Server-Timing'] = server_timing_header(timings, total)
+        registry.record(route_name(request), request.method, timings, total)
+        return response
+
+
+class TimedListSerializer(serializers.ListSerializer):
+    @property
+    def data(self):
+        with timer('serializer'):
+            return super().data
+
+
+class TimedSerializerMixin:
+    """
+    Count top-level ``.data`` rendering as serializer time. Nested serializers render
+    through to_representation(), so they are not counted twice. Pair with
+    ``list_serializer_class = TimedListSerializer`` in Meta for ``many=True``.
+    """
+
+    @property
+    def data(self):
+        with timer('serializer'):
+            return super().data
@@ -0,0 +1,240 @@
+# zare_backend_new/profiling.py
+"""
+On-demand request profiling.
+
+``RequestProfilingMiddleware`` samples the stack of the thread handling a request
+(view + serializer + rendering) and keeps the result when either:
+
+* a staff user sent ``X-Profile: 1``, or
+* the request took longer than ``PROFILING_SLOW_REQUEST_MS``.
+
+Ordinary requests are only sampled once they have run for
+``PROFILING_SLOW_START_FRACTION`` of the threshold, so fast requests cost a dict insert
+and removal. The stacks of a slow capture therefore cover the later part of the request.
+
+Staff status is known before the view runs only for session logins. Those requests get
+tracemalloc allocation diffs as well. Token-authenticated ``X-Profile`` requests are
+stack-sampled from the start, and the capture is kept only if DRF authenticated a staff
+user. No extra query runs and nothing global (tracemalloc) is enabled on the word of
+an unauthenticated header.
+
+Captures are written to ``PROFILING_DIR`` as collapsed stacks (``*.folded``, ready for
+flamegraph.pl / speedscope) next to a JSON summary, and listed by the staff-only
+diagnostics endpoints. The sampler is one daemon thread that sleeps while no request
+is due; it only sees synchronous views.
+"""
+import json
+import os
+import re
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+
+from django.conf import settings
+
+from .metrics import route_name
+
+CAPTURE_NAME_RE = re.compile(r'^[\w.-]+$')
+MAX_STACK_DEPTH = 128
+TRACEMALLOC_FRAMES = 25
+TRACEMALLOC_TOP = 30
+
+
+def collapse_stack(frame):
+    """Root-first 'func (file:line);...' string, the collapsed-stack format flamegraphs read"""
+    names = []
+    while frame is not None and len(names) < MAX_STACK_DEPTH:
+        code = frame.f_code
+        names.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+class StackSampler:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # thread id -> (stack counter, monotonic time sampling starts)
+        self._active = {}
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def register(self, stacks, delay=0.0):
+        with self._lock:
+            self._active[threading.get_ident()] = (stacks, time.monotonic() + delay)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='request-stack-sampler', daemon=True)
+                self._thread.start()
+        self._wakeup.set()
+
+    def unregister(self):
+        # Taking the lock guarantees the sampler is not writing into this request's counter
+        with self._lock:
+            self._active.pop(threading.get_ident(), None)
+
+    def _run(self):
+        interval = settings.PROFILING_SAMPLE_INTERVAL_MS / 1000
+        while True:
+            self._wakeup.clear()
+            now = time.monotonic()
+            with self._lock:
+                due = {thread_id: stacks for thread_id, (stacks, begin) in self._active.items() if begin <= now}
+                next_begin = min((begin for stacks, begin in self._active.values()), default=None)
+            if due:
+                # Walk the stacks outside the lock so requests can start and finish meanwhile
+                frames = sys._current_frames()
+                collapsed = {
+                    thread_id: collapse_stack(frames[thread_id]) for thread_id in due if thread_id in frames
+                }
+                del frames
+                with self._lock:
+                    for thread_id, stack in collapsed.items():
+                        entry = self._active.get(thread_id)
+                        if entry is not None and entry[0] is due[thread_id]:
+                            entry[0][stack] += 1
+                time.sleep(interval)
+            elif next_begin is None:
+                self._wakeup.wait()
+            else:
+                self._wakeup.wait(next_begin - now)
+
+
+sampler = StackSampler()
+
+_tracemalloc_lock = threading.Lock()
+_tracemalloc_users = 0
+_tracemalloc_owned = False
+
+
+def _start_tracemalloc():
+    global _tracemalloc_users, _tracemalloc_owned
+    with _tracemalloc_lock:
+        if _tracemalloc_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+            _tracemalloc_owned = True
+        _tracemalloc_users += 1
+    return tracemalloc.take_snapshot()
+
+
+def _stop_tracemalloc(before):
+    global _tracemalloc_users, _tracemalloc_owned
+    after = tracemalloc.take_snapshot()
+    with _tracemalloc_lock:
+        _tracemalloc_users -= 1
+        if _tracemalloc_users == 0 and _tracemalloc_owned:
+            tracemalloc.stop()
+            _tracemalloc_owned = False
+    return [
+        {
+            'location': str(stat.traceback[0]) if stat.traceback else '',
+            'size_diff_bytes': stat.size_diff,
+            'count_diff': stat.count_diff,
+        }
+        for stat in after.compare_to(before, 'lineno')[:TRACEMALLOC_TOP]
+    ]
+
+
+def _sends_token(request):
+    keyword, _, key = request.META.get('HTTP_AUTHORIZATION', '').partition(' ')
+    return keyword.lower() == 'token' and bool(key.strip())
+
+
+def capture_dir():
+    path = Path(settings.PROFILING_DIR)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def save_capture(request, stacks, duration_ms, trigger, allocations):
+    route = route_name(request)
+    started = datetime.now(timezone.utc)
+    slug = re.sub(r'[^\w-]+', '_', route).strip('_')[:60] or 'root'
+    name = f"{started:%Y%m%dT%H%M%S}-{slug}-{uuid.uuid4().hex[:8]}"
+    directory = capture_dir()
+
+    with open(directory / f'{name}.folded', 'w') as handle:
+        for stack, count in stacks.most_common():
+            handle.write(f'{stack} {count}\n')
+    summary = {
+        'name': name,
+        'route': route,
+        'method': request.method,
+        'path': request.path,
+        'captured_at': started.isoformat(),
+        'duration_ms': round(duration_ms, 2),
+        'trigger': trigger,
+        'samples': sum(stacks.values()),
+        'sample_interval_ms': settings.PROFILING_SAMPLE_INTERVAL_MS,
+        'allocations': allocations,
+    }
+    with open(directory / f'{name}.json', 'w') as handle:
+        json.dump(summary, handle, indent=2)
+
+    _prune_captures(directory)
+    return summary
+
+
+def _prune_captures(directory):
+    summaries = sorted(directory.glob('*.json'))
+    for old in summaries[:max(0, len(summaries) - settings.PROFILING_MAX_CAPTURES)]:
+        old.unlink(missing_ok=True)
+        old.with_suffix('.folded').unlink(missing_ok=True)
+
+
+def list_captures():
+    summaries = []
+    for path in sorted(capture_dir().glob('*.json'), reverse=True):
+        with open(path) as handle:
+            summary = json.load(handle)
+        summary.pop('allocations', None)
+        summaries.append(summary)
+    return summaries
+
+
+def capture_path(name, suffix):
+    """Path of a stored capture file, or None for unknown or malformed names"""
+    if not CAPTURE_NAME_RE.match(name):
+        return None
+    path = capture_dir() / f'{name}{suffix}'
+    return path if path.is_file() else None
+
+
+class RequestProfilingMiddleware:
+    """Place after AuthenticationMiddleware"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        threshold_ms = settings.PROFILING_SLOW_REQUEST_MS
+        requested = bool(request.META.get('HTTP_X_PROFILE'))
+        staff_session = requested and request.user.is_authenticated and request.user.is_staff
+        # Token users are authenticated by DRF inside the view; their staff status is checked afterwards
+        token_request = requested and not request.user.is_authenticated and _sends_token(request)
+        explicit = staff_session or token_request
+        if not explicit and not threshold_ms:
+            return self.get_response(request)
+
+        stacks = Counter()
+        snapshot = _start_tracemalloc() if staff_session else None
+        delay = 0 if explicit else threshold_ms * settings.PROFILING_SLOW_START_FRACTION / 1000
+        sampler.register(stacks, delay)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            sampler.unregister()
+            duration_ms = (time.perf_counter() - started) * 1000
+            allocations = _stop_tracemalloc(snapshot) if snapshot is not None else None
+
+        if token_request and not request.user.is_staff:
+            explicit = False
+        if explicit or (threshold_ms and duration_ms >= threshold_ms):
+            summary = save_capture(request, stacks, duration_ms, 'header' if explicit else 'slow', allocations)
+            if explicit:
+                response['X-Profile-Capture'] = summary['name']
+        return response
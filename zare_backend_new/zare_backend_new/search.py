@@ -0,0 +1,94 @@
+# zare_backend_new/search.py
+"""
+Trigram (pg_trgm) search helpers.
+
+Indexes are built on ``UPPER(field::text)`` with ``gin_trgm_ops``: that is exactly the
+expression Django compiles ``icontains`` (and therefore admin ``search_fields``) to, so
+substring searches and the ``%`` similarity operator below both use the same GIN index.
+
+Each index covers one table, so a single OR of conditions on several tables (say
+``user__username`` and ``phone``) cannot use any of them and Postgres scans instead.
+``trigram_match_ids`` therefore issues one SELECT per table and UNIONs the matching ids.
+"""
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.lookups import TrigramSimilar
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db import models
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast, Greatest, Upper
+
+MIN_FUZZY_TERM_LENGTH = 3
+
+
+def trigram_expression(field):
+    return Upper(Cast(field, output_field=models.TextField()))
+
+
+def trigram_index(field, name):
+    """GIN trigram index matching icontains/admin search and trigram_match_ids() on ``field``"""
+    return GinIndex(OpClass(trigram_expression(field), name='gin_trgm_ops'), name=name)
+
+
+def _relation(field):
+    return field.rpartition('__')[0]
+
+
+def _union_ids(queryset, fields, condition):
+    """
+    SQL selecting the pks of ``queryset``'s model where any of ``fields`` satisfies
+    ``condition(field)``: one SELECT per relation, UNIONed
+    """
+    relations = {}
+    for field in fields:
+        relations.setdefault(_relation(field), []).append(field)
+    selects, params = [], []
+    for relation_fields in relations.values():
+        matches = Q()
+        for field in relation_fields:
+            matches |= condition(field)
+        subquery = queryset.model._base_manager.filter(matches).order_by().values('pk')
+        sql, subquery_params = subquery.query.get_compiler(using=queryset.db).as_sql()
+        selects.append(f'({sql})')
+        params.extend(subquery_params)
+    return ' UNION '.join(selects), params
+
+
+def trigram_match_ids(queryset, fields, term):
+    """
+    Subquery of pks for ``queryset.filter(pk__in=...)``: rows where every word of ``term``
+    is contained in some field, or where a field is trigram-similar to the whole term (typos)
+    """
+    parts, params = [], []
+    for word in term.split():
+        sql, word_params = _union_ids(queryset, fields, lambda field: Q(**{f'{field}__icontains': word}))
+        parts.append(f'({sql})')
+        params.extend(word_params)
+    sql = ' INTERSECT '.join(parts)
+    if len(term) >= MIN_FUZZY_TERM_LENGTH:
+        fuzzy_sql, fuzzy_params = _union_ids(
+            queryset, fields, lambda field: Q(TrigramSimilar(trigram_expression(field), term.upper())),
+        )
+        sql = f'({sql}) UNION ({fuzzy_sql})'
+        params.extend(fuzzy_params)
+    return RawSQL(sql, params)
+
+
+def trigram_rank(fields, term):
+    """Best similarity of ``term`` across ``fields`` (0..1), for ordering results"""
+    scores = [TrigramSimilarity(trigram_expression(field), term.upper()) for field in fields]
+    return scores[0] if len(scores) == 1 else Greatest(*scores)
+
+
+class TrigramSearchAdminMixin:
+    """
+    Admin search over plain ``search_fields`` (no ^/=/@ prefixes) with typo-tolerant
+    matches, served table by table from the trigram indexes
+    """
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        if not term or not self.search_fields:
+            return super().get_search_results(request, queryset, search_term)
+        # pk IN (...) cannot produce duplicate rows
+        return queryset.filter(pk__in=trigram_match_ids(queryset, self.search_fields, term)), False
@@ -2,6 +2,7 @@
 Django settings for zare_backend_new project.
 """
 
+import os
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -22,6 +23,7 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'django.contrib.sites',
+    'django.contrib.postgres',
     
     # Third party apps
     'rest_framework',
@@ -38,7 +40,16 @@ INSTALLED_APPS = [
     'profiles',
 ]
 
+# API-only workers (e.g. serverless) can skip importing the admin and its URLs
+ADMIN_ENABLED = os.environ.get('DJANGO_ADMIN_ENABLED', '1') == '1'
+if not ADMIN_ENABLED:
+    INSTALLED_APPS.remove('django.contrib.admin')
+
 MIDDLEWARE = [
+    # First, so its total covers every other middleware
+    'zare_backend_new.metrics.RequestMetricsMiddleware',
+    # Inside the metrics middleware so samples carry the request's query count
+    'zare_backend_new.traffic.TrafficCaptureMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',  
@@ -46,6 +57,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'zare_backend_new.profiling.RequestProfilingMiddleware',
     'allauth.account.middleware.AccountMiddleware', 
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
@@ -79,9 +91,67 @@ DATABASES = {
         'PASSWORD': 'zare_password',
         'HOST': 'localhost',
         'PORT': '5432',
+        # Pooled connections are handed back at the end of every request instead of being
+        # closed, so persistent connections (CONN_MAX_AGE) must stay off.
+        'CONN_MAX_AGE': 0,
+        # Also verify a connection that errored before reusing it within a request
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            # One pool per worker process (threads under WSGI, the sync thread under ASGI):
+            # keep max_size * workers below the server's max_connections.
+            'pool': {
+                'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+                'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', 10)),
+                'timeout': float(os.environ.get('DB_POOL_TIMEOUT', 10)),
+                'max_idle': float(os.environ.get('DB_POOL_MAX_IDLE', 300)),
+                'max_lifetime': float(os.environ.get('DB_POOL_MAX_LIFETIME', 1800)),
+                # No 'check' here: Django already passes ConnectionPool.check_connection, so
+                # broken connections are discarded and replaced on checkout
+            },
+        },
     }
 }
 
+# Read replicas: DATABASE_REPLICA_HOSTS="host:port,host:port" adds one alias per replica.
+# Reads are only routed to them from views that opt in (see zare_backend_new.db_routers).
+DATABASE_REPLICAS = []
+for _index, _address in enumerate(filter(None, os.environ.get('DATABASE_REPLICA_HOSTS', '').split(',')), start=1):
+    _host, _, _port = _address.strip().partition(':')
+    _replica = {**DATABASES['default'], 'HOST': _host, 'PORT': _port or '5432', 'TEST': {'MIRROR': 'default'}}
+    # Fail fast on a dead replica so the health check can fall back to the primary
+    _replica['OPTIONS'] = {'pool': {**DATABASES['default']['OPTIONS']['pool'], 'timeout': 2}}
+    DATABASES[f'replica_{_index}'] = _replica
+    DATABASE_REPLICAS.append(f'replica_{_index}')
+
+DATABASE_ROUTERS = ['zare_backend_new.db_routers.ReplicaRouter']
+REPLICA_MAX_LAG_SECONDS = float(os.environ.get('REPLICA_MAX_LAG_SECONDS', 5))
+REPLICA_HEALTH_CHECK_INTERVAL = 10
+# How long a user's reads stay on the primary after they write
+READ_YOUR_WRITES_SECONDS = 15
+
+# Read-your-writes pins must be visible to every worker process, so with replicas the
+# default cache has to be shared: REDIS_URL="redis://host:6379/0". Without it the cache
+# is per-process and `manage.py check` warns when replicas are configured.
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        },
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+    }
+
+# Email logins use the case-insensitive email index; usernames still work through ModelBackend
+AUTHENTICATION_BACKENDS = [
+    'zare_backend_new.auth_backends.EmailBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -104,6 +174,12 @@ LOCALE_PATHS = [
 ]
 
 STATIC_URL = '/static/'
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+# Uploaded files (profile pictures); resized variants are rendered next to them on demand
+MEDIA_URL = '/media/'
+MEDIA_ROOT = Path(os.environ.get('MEDIA_ROOT', BASE_DIR / 'media'))
+IMAGE_VARIANT_ROOT = MEDIA_ROOT / 'variants'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # CORS settings
@@ -130,4 +206,124 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
-}
\ No newline at end of file
+    # Only views that name a throttle class are throttled
+    'DEFAULT_THROTTLE_RATES': {
+        'opportunity_view': '120/hour',
+    },
+}
+
+# Prometheus scrapes /metrics/ with "Authorization: Bearer <METRICS_TOKEN>" (the scrape
+# config's authorization.credentials); staff sessions may read it too. Client addresses
+# are not trusted: behind the reverse proxy they are all the proxy's.
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+# Request profiling: staff send "X-Profile: 1", or any request slower than the threshold
+# (0 disables automatic captures) is sampled and stored for download.
+PROFILING_DIR = BASE_DIR / 'var' / 'profiling'
+PROFILING_SLOW_REQUEST_MS = int(os.environ.get('PROFILING_SLOW_REQUEST_MS', 2000))
+PROFILING_SAMPLE_INTERVAL_MS = 10
+# Requests are only sampled once they have run this fraction of the slow threshold
+PROFILING_SLOW_START_FRACTION = 0.5
+PROFILING_MAX_CAPTURES = 200
+
+# Per-process cache of assembled profiles, invalidated by Postgres NOTIFY (profiles.profile_cache).
+# The listener pings its connection after this many quiet seconds.
+PROFILE_CACHE_ENABLED = os.environ.get('PROFILE_CACHE_ENABLED', '1') == '1'
+PROFILE_CACHE_MAX_ENTRIES = int(os.environ.get('PROFILE_CACHE_MAX_ENTRIES', 10000))
+PROFILE_CACHE_HEALTHCHECK_SECONDS = 30
+
+# Traffic capture for replay_traffic: this fraction of requests is written, anonymized, to
+# rotating NDJSON files (one per worker process). Off unless TRAFFIC_CAPTURE_ENABLED=1.
+TRAFFIC_CAPTURE_ENABLED = os.environ.get('TRAFFIC_CAPTURE_ENABLED', '') == '1'
+TRAFFIC_CAPTURE_SAMPLE_RATE = float(os.environ.get('TRAFFIC_CAPTURE_SAMPLE_RATE', 0.01))
+TRAFFIC_CAPTURE_DIR = Path(os.environ.get('TRAFFIC_CAPTURE_DIR', BASE_DIR / 'var' / 'traffic'))
+TRAFFIC_CAPTURE_MAX_BYTES = 50 * 1024 * 1024
+TRAFFIC_CAPTURE_BACKUP_COUNT = 10
+TRAFFIC_CAPTURE_MAX_BODY_BYTES = 64 * 1024
+# Parameters whose values are stored verbatim (enumerations and limits, not user data)
+TRAFFIC_CAPTURE_KEEP_PARAMS = [
+    'status', 'sort', 'match', 'scope', 'provider', 'include_archived', 'availability',
+    'limit', 'page_size', 'archived_page_size',
+]
+
+# Admin changelists show the planner's row estimate instead of COUNT(*) above this size.
+# explain_queries watches tables from the same size, so no exact count goes unchecked.
+ADMIN_ESTIMATED_COUNT_THRESHOLD = 10_000
+
+# Members of this group may search volunteers (staff always can)
+ORGANIZER_GROUP = 'Organizers'
+
+# archive_opportunities moves postings this long past their deadline, in batches of this size
+OPPORTUNITY_ARCHIVE_AFTER_DAYS = int(os.environ.get('OPPORTUNITY_ARCHIVE_AFTER_DAYS', 30))
+OPPORTUNITY_ARCHIVE_BATCH_SIZE = 500
+
+# VolunteerHistory partitions are created this many months ahead (manage_history_partitions,
+# also run after every migrate); older partitions are only detached/dropped on request.
+HISTORY_PARTITION_MONTHS_AHEAD = 3
+
+# Outgoing email. For local testing run `python -m aiosmtpd -n -l localhost:1025`
+# and set EMAIL_HOST=localhost EMAIL_PORT=1025.
+EMAIL_HOST = os.environ.get('EMAIL_HOST', 'localhost')
+EMAIL_PORT = int(os.environ.get('EMAIL_PORT', 25))
+EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', '')
+EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
+EMAIL_USE_TLS = os.environ.get('EMAIL_USE_TLS', '') == '1'
+DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'webmaster@localhost')
+
+# send_notifications: SMTP connections, rows claimed per batch, recipients queued per
+# fan-out batch, and delivery attempts before a notification is marked failed
+NOTIFICATION_WORKERS = int(os.environ.get('NOTIFICATION_WORKERS', 4))
+NOTIFICATION_BATCH_SIZE = 200
+NOTIFICATION_FANOUT_BATCH_SIZE = 1000
+NOTIFICATION_MAX_ATTEMPTS = 3
+# Delay before the first retry of a failed send; doubles with every further attempt
+NOTIFICATION_RETRY_BASE_SECONDS = 60
+
+# check_import_time fails when a worker cold start (WSGI app + URLconf) exceeds this
+IMPORT_TIME_BUDGET_MS = int(os.environ.get('IMPORT_TIME_BUDGET_MS', 1500))
+
+# Idempotency-Key responses are replayed for this long; a duplicate waits this long for
+# the original request to finish before getting a 409
+IDEMPOTENCY_TTL_HOURS = int(os.environ.get('IDEMPOTENCY_TTL_HOURS', 24))
+IDEMPOTENCY_LOCK_TIMEOUT_MS = 10000
+
+# ID tokens from Google and Apple are verified locally against each provider's JWKS
+# (profiles.providers.jwks). Tokens must be issued for one of the listed client ids;
+# jwks_url may point at a file:// key set (see mint_id_token) to test logins offline.
+SOCIAL_ID_TOKENS = {
+    'google': {
+        'jwks_url': os.environ.get('GOOGLE_JWKS_URL', 'https://www.googleapis.com/oauth2/v3/certs'),
+        'issuers': ['https://accounts.google.com', 'accounts.google.com'],
+        'audiences': [a for a in os.environ.get('GOOGLE_CLIENT_IDS', '').split(',') if a],
+    },
+    'apple': {
+        'jwks_url': os.environ.get('APPLE_JWKS_URL', 'https://appleid.apple.com/auth/keys'),
+        'issuers': ['https://appleid.apple.com'],
+        'audiences': [a for a in os.environ.get('APPLE_CLIENT_IDS', '').split(',') if a],
+    },
+}
+# Accept "mock_*" access tokens without asking the provider (frontend demo, loadtest).
+# Off unless DEBUG, and SOCIAL_LOGIN_ALLOW_MOCK_TOKENS=0 turns it off there too
+SOCIAL_LOGIN_ALLOW_MOCK_TOKENS = os.environ.get('SOCIAL_LOGIN_ALLOW_MOCK_TOKENS', '1' if DEBUG else '0') == '1'
+JWKS_CACHE_DIR = BASE_DIR / 'var' / 'jwks'
+# Keys older than this are refreshed in the background; an unknown kid refreshes at most
+# once per interval
+JWKS_MAX_AGE_SECONDS = 6 * 60 * 60
+JWKS_MIN_REFRESH_INTERVAL_SECONDS = 60
+JWKS_LEEWAY_SECONDS = 60
+
+# Opportunity view/apply events are buffered per process and written in bulk every
+# EVENT_FLUSH_SECONDS or once EVENT_BUFFER_SIZE are waiting (profiles.events).
+# Trending activity halves every TRENDING_HALF_LIFE_HOURS.
+EVENT_BUFFER_SIZE = 1000
+EVENT_FLUSH_SECONDS = 5
+# A client's repeated views of one opportunity count once per this many seconds
+OPPORTUNITY_VIEW_DEDUPE_SECONDS = 30 * 60
+TRENDING_HALF_LIFE_HOURS = 24
+# ?sort=conversion only ranks postings with at least this many views
+TRENDING_MIN_VIEWS = 20
+
+# Skill taxonomy (profiles.taxonomy): each process re-checks for changes made elsewhere
+# this often; autocomplete returns at most this many suggestions
+SKILL_TAXONOMY_CHECK_SECONDS = 30
+SKILL_AUTOCOMPLETE_LIMIT = 20
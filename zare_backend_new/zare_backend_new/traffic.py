@@ -0,0 +1,180 @@
+# zare_backend_new/traffic.py
+"""
+Sampled production traffic capture for replay benchmarks.
+
+``TrafficCaptureMiddleware`` (enabled with ``TRAFFIC_CAPTURE_ENABLED``) writes a
+``TRAFFIC_CAPTURE_SAMPLE_RATE`` fraction of requests as one JSON object per line to
+rotating ``traffic.<pid>.ndjson`` files in ``TRAFFIC_CAPTURE_DIR`` (one file per worker
+process, so rotation never races). Each line holds the route pattern, method, the
+anonymized path/query/JSON body parameters, the auth class, a pseudonymous user, the
+status, the duration and the SQL query count.
+
+Nothing identifying is stored. Parameters are replaced by markers that keep only what
+replay needs, keyed with ``SECRET_KEY`` so the same value always gets the same marker:
+
+* ``{"$id": n}`` for ids (``id``/``*_id``/``*_ids``/``opportunity``/``user`` and path ids),
+* ``{"$email": n}`` for email addresses,
+* ``{"$num": n, "len": l}`` for numbers, also as digit strings (``"str": true``), since
+  a phone number or postcode is identifying too,
+* ``{"$text": n, "len": l}`` for other strings,
+* ``{"$secret": n}`` for passwords, tokens, cursors and similar.
+
+Only booleans and the values of ``TRAFFIC_CAPTURE_KEEP_PARAMS`` (enumerations and
+limits) are kept as is. ``profiles.replay`` turns the markers back into requests
+against seeded data.
+"""
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.crypto import salted_hmac
+
+from .metrics import current_timings, route_name
+
+logger = logging.getLogger(__name__)
+
+SECRET_KEYS = re.compile(r'password|token|secret|code|cursor|signature|key$', re.IGNORECASE)
+ID_KEYS = re.compile(r'(^|_)ids?$|^(opportunity|user)$')
+EMAIL_RE = re.compile(r'^[^@\s]+@[^@\s]+$')
+EXCLUDED_PREFIXES = ('/admin/', '/metrics/', '/api/diagnostics/', '/static/', '/media/')
+
+
+def pseudonym(value):
+    """Stable 32-bit stand-in for ``value``; not reversible without SECRET_KEY"""
+    return int(salted_hmac('traffic-capture', str(value)).hexdigest()[:8], 16)
+
+
+def anonymize(value, key=''):
+    if isinstance(value, dict):
+        return {k: anonymize(v, k) for k, v in value.items()}
+    if isinstance(value, list):
+        return [anonymize(item, key) for item in value]
+    if value is None or isinstance(value, bool):
+        return value
+    if SECRET_KEYS.search(key):
+        return {'$secret': pseudonym(value)}
+    if ID_KEYS.search(key):
+        return {'$id': pseudonym(value)}
+    if key in settings.TRAFFIC_CAPTURE_KEEP_PARAMS:
+        return value
+    if isinstance(value, (int, float)):
+        return {'$num': pseudonym(value), 'len': len(f'{abs(value):.0f}')}
+    value = str(value)
+    # Query strings carry numbers as text
+    if value.isdigit():
+        return {'$num': pseudonym(value), 'len': len(value), 'str': True}
+    if EMAIL_RE.match(value):
+        return {'$email': pseudonym(value.lower())}
+    return {'$text': pseudonym(value), 'len': len(value)}
+
+
+def auth_class(request):
+    keyword = request.META.get('HTTP_AUTHORIZATION', '').partition(' ')[0].lower()
+    if keyword:
+        return keyword
+    if getattr(request, 'user', None) is not None and request.user.is_authenticated:
+        return 'session'
+    return 'anonymous'
+
+
+def _json_body(request):
+    """Parsed JSON body, read before the view runs (Django keeps it for DRF)"""
+    if request.method in ('GET', 'HEAD', 'OPTIONS') or request.content_type != 'application/json':
+        return None
+    try:
+        length = int(request.META.get('CONTENT_LENGTH') or 0)
+    except ValueError:
+        return None
+    if not length or length > settings.TRAFFIC_CAPTURE_MAX_BODY_BYTES:
+        return None
+    try:
+        return json.loads(request.body)
+    except ValueError:
+        return None
+
+
+def _path_params(kwargs):
+    # Integer path converters are always row ids
+    return {
+        key: {'$id': pseudonym(value)} if isinstance(value, int) else anonymize(value, key)
+        for key, value in kwargs.items()
+    }
+
+
+class TrafficLog:
+    """Per-process rotating NDJSON writer; reopened after a fork"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._handler = None
+        self._pid = None
+
+    def write(self, record):
+        line = json.dumps(record, separators=(',', ':'), default=str)
+        with self._lock:
+            if self._pid != os.getpid():
+                directory = Path(settings.TRAFFIC_CAPTURE_DIR)
+                directory.mkdir(parents=True, exist_ok=True)
+                self._handler = RotatingFileHandler(
+                    directory / f'traffic.{os.getpid()}.ndjson',
+                    maxBytes=settings.TRAFFIC_CAPTURE_MAX_BYTES,
+                    backupCount=settings.TRAFFIC_CAPTURE_BACKUP_COUNT,
+                    delay=True,
+                )
+                self._handler.setFormatter(logging.Formatter('%(message)s'))
+                self._pid = os.getpid()
+            self._handler.emit(logging.makeLogRecord({'msg': line}))
+
+
+traffic_log = TrafficLog()
+
+
+class TrafficCaptureMiddleware:
+    """Place right after RequestMetricsMiddleware so the query count covers the request"""
+
+    def __init__(self, get_response):
+        if not settings.TRAFFIC_CAPTURE_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if (random.random() >= settings.TRAFFIC_CAPTURE_SAMPLE_RATE
+                or request.path.startswith(EXCLUDED_PREFIXES)):
+            return self.get_response(request)
+
+        body = _json_body(request)
+        captured_at = time.time()
+        started = time.perf_counter()
+        response = self.get_response(request)
+        duration_ms = (time.perf_counter() - started) * 1000
+
+        match = getattr(request, 'resolver_match', None)
+        if match is None:
+            return response
+        try:
+            timings = current_timings()
+            user = getattr(request, 'user', None)
+            traffic_log.write({
+                'ts': round(captured_at, 3),
+                'method': request.method,
+                'route': route_name(request),
+                'kwargs': _path_params(match.kwargs),
+                'query': anonymize({key: request.GET.getlist(key) for key in request.GET}),
+                'body': anonymize(body) if body is not None else None,
+                'auth': auth_class(request),
+                'user': pseudonym(user.pk) if user is not None and user.is_authenticated else None,
+                'status': response.status_code,
+                'duration_ms': round(duration_ms, 2),
+                'queries': timings.query_count if timings is not None else None,
+            })
+        except Exception:
+            logger.exception('Could not record traffic sample')
+        return response
@@ -14,12 +14,11 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
-from django.contrib import admin
 from django.urls import path, include
 from django.http import JsonResponse
 from django.conf import settings
 from django.conf.urls.static import static
-from . import authentication
+from . import authentication, diagnostics
 
 def test_view(request):
     return JsonResponse({'message': 'Django is working!'})
@@ -38,23 +37,34 @@ def home_view(request):
 
 urlpatterns = [
     path('', home_view, name='home'),
-    path('admin/', admin.site.urls),
     path('test/', test_view, name='test'),
     path('api/contact/', include('contact.urls')),
     
     # Authentication endpoints
     path('api/auth/login/', authentication.login, name='login'),
     path('api/auth/signup/', authentication.signup, name='signup'),
-    path('accounts/', include('allauth.urls')),
-    path('api/auth/', include('profiles.urls')),
+    # Only the social auth views; the profile, user, opportunity and history views that
+    # profiles.urls also used to expose here are served under /api/profiles/ alone
+    path('api/auth/', include('profiles.auth_urls')),
     
     # Profile endpoints
     path('api/profiles/', include('profiles.urls')),
     
     # Social authentication
     path('accounts/', include('allauth.urls')),
+    
+    # Operational diagnostics (staff only)
+    path('api/diagnostics/db-pool/', diagnostics.db_pool_stats, name='db_pool_stats'),
+    path('metrics/', diagnostics.prometheus_metrics, name='metrics'),
+    path('api/diagnostics/profile-cache/', diagnostics.profile_cache_stats, name='profile_cache_stats'),
+    path('api/diagnostics/profiling/', diagnostics.profiling_captures, name='profiling_captures'),
+    path('api/diagnostics/profiling/<str:name>/', diagnostics.profiling_capture_download, name='profiling_capture'),
 ]
 
+if settings.ADMIN_ENABLED:
+    from django.contrib import admin
+    urlpatterns.insert(1, path('admin/', admin.site.urls))
+
 # Serve media files during development
 if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)